@@ -0,0 +1,137 @@
+# progress.json(JSON) 과 progress.bin(RecordStore) 의 재시작 비용 비교
+#
+# 사용법: python benchmarks/bench_progress.py [progress.json 경로] [--scale 9000]
+# 측정 항목마다 별도 프로세스에서 실행해 최대 RSS 를 따로 잰다.
+# '재시작 경로' 는 us_etf main() 의 재시작과 같이 모든 기록을 OrderedWriter 로 넘겨 두 출력 파일을 쓰는 비용이다.
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+from stock_finder.records import RecordStore
+from stock_finder.ordered_writer import OrderedWriter, StreamingTextFile
+from stock_finder.formatting import format_etf_text, format_etf_summary
+
+
+def max_rss_mb():
+    # 리눅스는 KB, macOS 는 바이트 단위
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / 1024 / 1024 if sys.platform == 'darwin' else rss / 1024
+
+
+def scaled_progress(source, scale):
+    with open(source, 'r') as f:
+        data = json.load(f)
+    if not scale or scale <= len(data):
+        return data
+    # 종목 수를 늘리기 위해 기존 기록을 복제 (심볼 뒤에 번호를 붙임)
+    records = list(data.items())
+    i = 0
+    while len(data) < scale:
+        symbol, value = records[i % len(records)]
+        data[f"{symbol}.{i // len(records) + 1}"] = value
+        i += 1
+    return data
+
+
+def resume(progress, out_dir):
+    symbols = list(progress)
+    text_file = StreamingTextFile(os.path.join(out_dir, 'text.txt'), format_etf_text)
+    nl_file = StreamingTextFile(os.path.join(out_dir, 'summary.txt'),
+                                lambda etf: format_etf_summary(etf) + "\n\n" + '=' * 50,
+                                separator="\n\n")
+    writer = OrderedWriter(symbols, len(symbols), [text_file, nl_file], progress)
+    for symbol in symbols:
+        writer.put(symbol)
+    writer.close()
+    text_file.commit(os.path.join(out_dir, 'text.txt'))
+    nl_file.commit(os.path.join(out_dir, 'summary.txt'))
+
+
+def child(mode, path):
+    out_dir = tempfile.mkdtemp()
+    baseline = max_rss_mb()
+    start = time.perf_counter()
+    if mode == 'json-load':
+        with open(path, 'r') as f:
+            progress = json.load(f)
+        'AAA' in progress
+    elif mode == 'store-open':
+        progress = RecordStore(path)
+        'AAA' in progress
+    elif mode == 'json-read-all':
+        with open(path, 'r') as f:
+            progress = json.load(f)
+        for value in progress.values():
+            pass
+    elif mode == 'store-read-all':
+        progress = RecordStore(path)
+        for symbol in progress:
+            progress[symbol]
+    elif mode == 'json-resume':
+        with open(path, 'r') as f:
+            progress = json.load(f)
+        resume(progress, out_dir)
+    elif mode == 'store-resume':
+        resume(RecordStore(path), out_dir)
+    elapsed = time.perf_counter() - start
+    print(json.dumps({'seconds': elapsed, 'rss_mb': max_rss_mb() - baseline}))
+
+
+def run_child(mode, path):
+    output = subprocess.check_output([sys.executable, __file__, '--child', mode, path])
+    return json.loads(output)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('progress', nargs='?', default=os.path.join(ROOT, 'us_etf', 'progress.json'))
+    parser.add_argument('--scale', type=int, default=9000, help="복제해서 맞출 종목 수")
+    parser.add_argument('--child', nargs=2, metavar=('MODE', 'PATH'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(*args.child)
+        return
+
+    data = scaled_progress(args.progress, args.scale)
+    with tempfile.TemporaryDirectory() as tmp:
+        json_path = os.path.join(tmp, 'progress.json')
+        bin_path = os.path.join(tmp, 'progress.bin')
+        with open(json_path, 'w') as f:
+            json.dump(data, f)
+        store = RecordStore(bin_path)
+        for symbol, value in data.items():
+            store[symbol] = value
+
+        # 종목 하나를 처리할 때마다 드는 체크포인트 비용
+        start = time.perf_counter()
+        with open(json_path, 'w') as f:
+            json.dump(data, f)
+        json_save = time.perf_counter() - start
+        start = time.perf_counter()
+        store['AAA'] = data.get('AAA') or next(iter(data.values()))
+        store_save = time.perf_counter() - start
+        store.close()
+
+        print(f"종목 수: {len(data)}")
+        print(f"{'':<22}{'JSON':>14}{'RecordStore':>14}")
+        print(f"{'파일 크기 (MB)':<22}{os.path.getsize(json_path) / 1e6:>14.2f}{os.path.getsize(bin_path) / 1e6:>14.2f}")
+        print(f"{'체크포인트 1회 (ms)':<22}{json_save * 1000:>14.2f}{store_save * 1000:>14.3f}")
+        for label, json_mode, store_mode in [('재시작', 'json-load', 'store-open'),
+                                             ('재시작+전체 읽기', 'json-read-all', 'store-read-all'),
+                                             ('재시작 경로', 'json-resume', 'store-resume')]:
+            json_result = run_child(json_mode, json_path)
+            store_result = run_child(store_mode, bin_path)
+            print(f"{label + ' (ms)':<22}{json_result['seconds'] * 1000:>14.1f}{store_result['seconds'] * 1000:>14.1f}")
+            print(f"{label + ' RSS (MB)':<22}{json_result['rss_mb']:>14.1f}{store_result['rss_mb']:>14.1f}")
+
+
+if __name__ == '__main__':
+    main()
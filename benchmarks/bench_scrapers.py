@@ -0,0 +1,266 @@
+# 스크레이퍼 전체 처리량 벤치마크 (가짜 Yahoo/번역기/FinanceDataReader 사용)
+#
+# 사용법:
+#   python benchmarks/bench_scrapers.py                      # 모든 대상 실행, 결과 저장 후 직전 결과와 비교
+#   python benchmarks/bench_scrapers.py us_stock --count 500 --latency 0.05 --error-rate 0.02
+#   python benchmarks/bench_scrapers.py --compare benchmarks/results/20240801_120000_abc1234.json
+#
+# 각 대상은 임시 디렉터리에 입력 파일을 복사한 뒤 별도 프로세스에서 main() 을 실행하고,
+# 처리량(symbols/sec), 종목별 지연 p50/p99, 체크포인트 쓰기 바이트, 최대 RSS 를 측정한다.
+import argparse
+import glob
+import importlib.util
+import json
+import os
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(ROOT, 'benchmarks', 'results')
+
+# 대상별 스크립트, 입력 파일, 종목 수 변수, 종목별로 시간을 잴 함수
+TARGETS = {
+    'us_stock': {
+        'script': 'us_stock/main_read_file_korean.py',
+        'inputs': ['extracted_symbols.txt', 'us_stocks_list_240726.txt'],
+        'count': 'STOCK_COUNT',
+        'timed': ['get_stock_data'],
+    },
+    'us_etf': {
+        'script': 'us_etf/main_read_file_korean.py',
+        'inputs': ['extracted_symbols.txt', 'us_etf_list_240724.txt'],
+        'count': 'ETF_COUNT',
+        'timed': ['get_etf_data', 'get_top_holdings'],
+    },
+    'us_etf_en': {
+        'script': 'us_etf/main_read_file.py',
+        'inputs': ['extracted_symbols.txt'],
+        'count': 'ETF_COUNT',
+        'timed': ['get_etf_data'],
+    },
+    'krx': {
+        'script': 'kr_stock/krx_stock_calculator.py',
+        'inputs': [],
+        'count': 'STOCK_LIMIT',
+        'timed': ['get_prices', 'get_fundamentals'],
+    },
+}
+
+# 실제 환경의 긴 대기 시간은 줄여서 측정 (설정값은 결과에 함께 저장)
+OVERRIDES = {
+    'RETRY_DELAY': (0.05, 0.1),
+    'REQUEST_DELAY': 0,
+}
+
+
+def percentile(values, p):
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(p / 100 * (len(values) - 1))))]
+
+
+def max_rss_mb():
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / 1024 / 1024 if sys.platform == 'darwin' else rss / 1024
+
+
+class SymbolTimer:
+    """종목별 첫 호출 시작부터 마지막 호출 종료까지의 시간을 기록."""
+
+    def __init__(self):
+        self.spans = {}
+        self._lock = threading.Lock()
+
+    def wrap(self, fn):
+        def timed(symbol, *args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return fn(symbol, *args, **kwargs)
+            finally:
+                end = time.perf_counter()
+                with self._lock:
+                    first, _ = self.spans.get(symbol, (start, end))
+                    self.spans[symbol] = (min(first, start), end)
+        return timed
+
+    def latencies(self):
+        return [end - start for start, end in self.spans.values()]
+
+
+def run_child(target, config, result_path):
+    spec = TARGETS[target]
+    sys.path.insert(0, os.path.join(ROOT, 'benchmarks'))
+    sys.path.insert(0, ROOT)
+    import fakes
+    backend = fakes.install(config['latency'], config['jitter'], config['error_rate'], config['seed'])
+
+    workdir = tempfile.mkdtemp(prefix=f'bench_{target}_')
+    script_dir = os.path.dirname(os.path.join(ROOT, spec['script']))
+    for name in spec['inputs']:
+        shutil.copy(os.path.join(script_dir, name), workdir)
+    script_path = os.path.join(workdir, os.path.basename(spec['script']))
+    shutil.copy(os.path.join(ROOT, spec['script']), script_path)
+    os.makedirs(os.path.join(workdir, 'data'))  # 저장소에 있는 data 디렉터리와 동일하게
+    os.chdir(workdir)
+
+    module_spec = importlib.util.spec_from_file_location(f'bench_{target}', script_path)
+    module = importlib.util.module_from_spec(module_spec)
+    module_spec.loader.exec_module(module)
+
+    setattr(module, spec['count'], config['count'])
+    for name, value in OVERRIDES.items():
+        if hasattr(module, name):
+            setattr(module, name, value)
+    timer = SymbolTimer()
+    for name in spec['timed']:
+        setattr(module, name, timer.wrap(getattr(module, name)))
+
+    # JSON 체크포인트는 저장할 때마다 파일 전체를 다시 쓰므로 매번 크기를 더함
+    checkpoint_bytes = [0]
+    if hasattr(module, 'save_progress'):
+        save_progress = module.save_progress
+
+        def counted_save_progress(processed, filename='progress.json'):
+            save_progress(processed, filename)
+            checkpoint_bytes[0] += os.path.getsize(filename)
+        module.save_progress = counted_save_progress
+
+    start = time.perf_counter()
+    module.main()
+    elapsed = time.perf_counter() - start
+
+    if os.path.exists('progress.bin'):
+        checkpoint_bytes[0] += os.path.getsize('progress.bin')
+    output_bytes = sum(os.path.getsize(path) for path in glob.glob('data/*') if os.path.isfile(path))
+    latencies = timer.latencies()
+    result = {
+        'symbols': len(latencies),
+        'seconds': elapsed,
+        'symbols_per_sec': len(latencies) / elapsed if elapsed else None,
+        'p50_ms': (percentile(latencies, 50) or 0) * 1000,
+        'p99_ms': (percentile(latencies, 99) or 0) * 1000,
+        'checkpoint_bytes': checkpoint_bytes[0],
+        'output_bytes': output_bytes,
+        'peak_rss_mb': max_rss_mb(),
+        'backend_calls': backend.calls,
+        'backend_errors': backend.errors,
+    }
+    with open(result_path, 'w') as f:
+        json.dump(result, f)
+    shutil.rmtree(workdir, ignore_errors=True)
+
+
+def run_target(target, config):
+    with tempfile.NamedTemporaryFile(suffix='.json', delete=False) as f:
+        result_path = f.name
+    try:
+        subprocess.run([sys.executable, os.path.abspath(__file__), '--child', target,
+                        json.dumps(config), result_path],
+                       check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        with open(result_path) as f:
+            return json.load(f)
+    finally:
+        os.remove(result_path)
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT,
+                                       text=True, stderr=subprocess.DEVNULL).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def latest_result(exclude=None):
+    paths = sorted(glob.glob(os.path.join(RESULTS_DIR, '*.json')))
+    paths = [path for path in paths if path != exclude]
+    return paths[-1] if paths else None
+
+
+COLUMNS = [
+    ('symbols_per_sec', 'sym/s', '{:.1f}', True),
+    ('p50_ms', 'p50 ms', '{:.0f}', False),
+    ('p99_ms', 'p99 ms', '{:.0f}', False),
+    ('checkpoint_bytes', 'ckpt KB', '{:.0f}', False),
+    ('peak_rss_mb', 'RSS MB', '{:.1f}', False),
+]
+
+
+def print_report(report, previous=None):
+    print(f"revision {report['revision']}  config {json.dumps(report['config'])}")
+    if previous:
+        print(f"compared with {previous['revision']} ({previous['created_at']})")
+    print(f"{'target':<12}" + "".join(f"{label:>18}" for _, label, _, _ in COLUMNS))
+    for target, result in report['results'].items():
+        row = f"{target:<12}"
+        old = (previous or {}).get('results', {}).get(target)
+        for key, _, fmt, higher_is_better in COLUMNS:
+            value = result[key] / 1024 if key == 'checkpoint_bytes' else result[key]
+            cell = fmt.format(value)
+            if old and old.get(key):
+                change = (result[key] - old[key]) / old[key] * 100
+                worse = change < 0 if higher_is_better else change > 0
+                cell += f" ({change:+.0f}%{'!' if worse and abs(change) >= 10 else ''})"
+            row += f"{cell:>18}"
+        print(row)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('targets', nargs='*', help=f"실행할 대상 (기본: 전체) {list(TARGETS)}")
+    parser.add_argument('--count', type=int, default=300, help="대상별 처리할 종목 수")
+    parser.add_argument('--latency', type=float, default=0.05, help="가짜 원격 호출 평균 지연(초)")
+    parser.add_argument('--jitter', type=float, default=0.5, help="지연 시간 변동 비율")
+    parser.add_argument('--error-rate', type=float, default=0.02, help="원격 호출 실패 비율")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--compare', help="비교할 이전 결과 파일 (기본: 가장 최근 결과)")
+    parser.add_argument('--no-save', action='store_true', help="결과를 저장하지 않음")
+    parser.add_argument('--child', nargs=3, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        target, config, result_path = args.child
+        run_child(target, json.loads(config), result_path)
+        return
+
+    unknown = set(args.targets) - set(TARGETS)
+    if unknown:
+        parser.error(f"unknown targets: {sorted(unknown)}")
+
+    config = {'count': args.count, 'latency': args.latency, 'jitter': args.jitter,
+              'error_rate': args.error_rate, 'seed': args.seed}
+    report = {
+        'revision': git_revision(),
+        'created_at': time.strftime('%Y-%m-%d %H:%M:%S'),
+        'config': config,
+        'results': {},
+    }
+    for target in args.targets or TARGETS:
+        print(f"Running {target}...", flush=True)
+        report['results'][target] = run_target(target, config)
+
+    previous_path = args.compare or latest_result()
+    previous = None
+    if previous_path:
+        with open(previous_path) as f:
+            previous = json.load(f)
+        if previous.get('config') != config:
+            print(f"warning: {previous_path} was run with a different config {previous.get('config')}")
+    print_report(report, previous)
+
+    if not args.no_save:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        path = os.path.join(RESULTS_DIR, f"{time.strftime('%Y%m%d_%H%M%S')}_{report['revision']}.json")
+        with open(path, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Saved results to {path}")
+
+
+if __name__ == '__main__':
+    main()
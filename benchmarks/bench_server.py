@@ -0,0 +1,199 @@
+# 질의 서비스(python -m stock_finder serve) 부하 테스트
+#
+# 사용법: python benchmarks/bench_server.py [--duration 10] [--clients 4] [--cache-size 1024] [--reload-every 2]
+# 서버를 별도 프로세스로 띄워 CPU 하나에 고정하고, 클라이언트 프로세스들이 연결을 재사용하며
+# lookup/search/screen 을 섞어 보낸다. 캐시 사용/미사용을 각각 측정하며, --reload-every 를 주면
+# 측정 중에 POST /reload 를 보내 다시 읽는 동안에도 오류 없이 응답하는지 함께 확인한다.
+import argparse
+import http.client
+import json
+import multiprocessing
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+import urllib.parse
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+from stock_finder.cli import open_dataset
+
+# 질의 종류별 비율
+MIX = (('lookup', 0.6), ('search', 0.25), ('screen', 0.15))
+# 주식 스크리너 조건 (ETF 는 수집된 category 값으로 조건을 만든다)
+STOCK_SCREENS = [
+    ('부채비율 < 50 and 잉여현금흐름 > 0', '잉여현금흐름'), ('영업이익 / 매출액 > 0.2', '매출액'),
+    ('유동비율 > 150', '유동비율'), ('순이익 > 0 and sector == "Technology"', '순이익'),
+]
+
+
+def percentile(values, p):
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(p / 100 * (len(values) - 1))))]
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def build_workload(size, seed):
+    """수집된 데이터에서 (경로) 목록을 만든다. 같은 seed 면 같은 질의."""
+    rng = random.Random(seed)
+    symbols, words, screens = [], [], []
+    for dataset in ('stocks', 'etfs'):
+        store = open_dataset(dataset)
+        if store is None:
+            continue
+        for symbol in store:
+            info = store[symbol].get('info', {})
+            symbols.append(symbol)
+            words.extend(word for word in str(info.get('longName', '')).split() if len(word) >= 4)
+            if dataset == 'etfs' and info.get('category'):
+                screens.append(('etfs', f'category == "{info["category"]}"', None))
+        if dataset == 'stocks':
+            screens.extend(('stocks', expression, sort) for expression, sort in STOCK_SCREENS)
+        if hasattr(store, 'close'):
+            store.close()
+    if not symbols:
+        sys.exit("No stock/ETF progress files found; run a scrape first")
+
+    kinds, weights = zip(*MIX)
+    paths = []
+    for _ in range(size):
+        kind = rng.choices(kinds, weights)[0]
+        if kind == 'lookup':
+            params = {'symbol': rng.choice(symbols)}
+        elif kind == 'search':
+            params = {'q': rng.choice(words), 'limit': 10}
+        else:
+            dataset, expression, sort = rng.choice(screens)
+            params = {'dataset': dataset, 'expr': expression, 'limit': 20}
+            if sort:
+                params['sort'] = sort
+        paths.append(f"/{kind}?{urllib.parse.urlencode(params)}")
+    return paths
+
+
+def client(port, paths, duration, seed):
+    """duration 초 동안 요청을 보내고 (요청 수, 오류 수, 지연 시간 목록) 을 반환."""
+    rng = random.Random(seed)
+    connection = http.client.HTTPConnection('127.0.0.1', port)
+    latencies, errors = [], 0
+    deadline = time.perf_counter() + duration
+    while time.perf_counter() < deadline:
+        path = rng.choice(paths)
+        start = time.perf_counter()
+        try:
+            connection.request('GET', path)
+            response = connection.getresponse()
+            response.read()
+            if response.status >= 500:
+                errors += 1
+        except (OSError, http.client.HTTPException):
+            errors += 1
+            connection.close()
+            connection = http.client.HTTPConnection('127.0.0.1', port)
+        latencies.append(time.perf_counter() - start)
+    connection.close()
+    return len(latencies), errors, latencies
+
+
+def request(port, method, path):
+    connection = http.client.HTTPConnection('127.0.0.1', port, timeout=60)
+    try:
+        connection.request(method, path)
+        response = connection.getresponse()
+        return response.status, json.loads(response.read())
+    finally:
+        connection.close()
+
+
+def start_server(port, cache_size, cpu):
+    def pin():
+        if hasattr(os, 'sched_setaffinity'):
+            os.sched_setaffinity(0, {cpu})
+
+    process = subprocess.Popen([sys.executable, '-m', 'stock_finder', 'serve', '--port', str(port),
+                                '--cache-size', str(cache_size), '--reload-interval', '0'],
+                               cwd=ROOT, preexec_fn=pin, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.time() + 120
+    while time.time() < deadline:
+        if process.poll() is not None:
+            sys.exit(f"Server exited with code {process.returncode}")
+        try:
+            request(port, 'GET', '/status')
+            return process
+        except OSError:
+            time.sleep(0.2)
+    process.kill()
+    sys.exit("Server did not start within 120 s")
+
+
+def run(paths, args, cache_size):
+    port = free_port()
+    server = start_server(port, cache_size, args.cpu)
+    try:
+        # 캐시를 쓰는 경우 질의 목록을 한 번 돌려 채워 둔 뒤 측정
+        if cache_size:
+            client(port, paths, args.warmup, args.seed)
+        before = request(port, 'GET', '/status')[1]['cache']
+        with multiprocessing.Pool(args.clients) as pool:
+            results = pool.starmap_async(client, [(port, paths, args.duration, args.seed + i + 1)
+                                                  for i in range(args.clients)])
+            reloads = 0
+            while not results.ready():
+                results.wait(args.reload_every or None)
+                if args.reload_every and not results.ready():
+                    request(port, 'POST', '/reload')
+                    reloads += 1
+            results = results.get()
+        after = request(port, 'GET', '/status')[1]['cache']
+    finally:
+        server.terminate()
+        server.wait()
+
+    latencies = [latency for _, _, client_latencies in results for latency in client_latencies]
+    hits, misses = after['hits'] - before['hits'], after['misses'] - before['misses']
+    return {
+        'queries': len(latencies),
+        'qps': len(latencies) / args.duration,
+        'p50_ms': percentile(latencies, 50) * 1000,
+        'p99_ms': percentile(latencies, 99) * 1000,
+        'errors': sum(errors for _, errors, _ in results),
+        'hit_rate': hits / (hits + misses) if hits + misses else 0.0,
+        'reloads': reloads,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--duration', type=float, default=10, help="측정 시간(초)")
+    parser.add_argument('--warmup', type=float, default=3, help="캐시를 채우는 시간(초)")
+    parser.add_argument('--clients', type=int, default=4, help="동시 클라이언트 프로세스 수")
+    parser.add_argument('--queries', type=int, default=2000, help="서로 다른 질의 수")
+    parser.add_argument('--cache-size', type=int, default=1024)
+    parser.add_argument('--reload-every', type=float, default=0, help="측정 중 POST /reload 간격(초)")
+    parser.add_argument('--cpu', type=int, default=0, help="서버를 고정할 CPU 번호")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    paths = build_workload(args.queries, args.seed)
+    print(f"{len(paths)} distinct queries, {args.clients} clients, {args.duration:.0f}s per run, "
+          f"server pinned to CPU {args.cpu} ({os.cpu_count()} CPUs)")
+    if os.cpu_count() == 1:
+        print("warning: clients share the server's CPU; qps is a lower bound")
+    print(f"{'cache':<10}{'qps':>10}{'p50 ms':>10}{'p99 ms':>10}{'errors':>10}{'hit rate':>10}{'reloads':>10}")
+    for label, cache_size in ((f'{args.cache_size}', args.cache_size), ('off', 0)):
+        result = run(paths, args, cache_size)
+        print(f"{label:<10}{result['qps']:>10.0f}{result['p50_ms']:>10.2f}{result['p99_ms']:>10.2f}"
+              f"{result['errors']:>10}{result['hit_rate']:>10.0%}{result['reloads']:>10}", flush=True)
+
+
+if __name__ == '__main__':
+    main()
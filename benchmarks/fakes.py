@@ -0,0 +1,170 @@
+# 벤치마크용 가짜 Yahoo(yfinance/yahooquery), 번역기, FinanceDataReader
+#
+# install(latency, error_rate, seed) 로 sys.modules 에 등록한 뒤 스크립트를 import 하면
+# 네트워크 없이 지정한 지연 시간과 오류 비율로 동작한다. 같은 seed 면 같은 결과를 낸다.
+import datetime
+import os
+import random
+import sys
+import threading
+import time
+import types
+import zlib
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from stock_finder.krx_store import expected_fiscal_period
+
+
+class FakeBackend:
+    def __init__(self, latency=0.05, jitter=0.5, error_rate=0.0, seed=0):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.seed = seed
+        self.calls = 0
+        self.errors = 0
+        self._attempts = {}
+        self._lock = threading.Lock()
+
+    def rng(self, *key):
+        return random.Random(zlib.crc32(repr((self.seed,) + key).encode()))
+
+    def call(self, endpoint, symbol):
+        """한 번의 원격 호출을 흉내낸다: 지연 후 일정 비율로 ConnectionError."""
+        with self._lock:
+            self.calls += 1
+            attempt = self._attempts.get((endpoint, symbol), 0)
+            self._attempts[(endpoint, symbol)] = attempt + 1
+        rng = self.rng(endpoint, symbol, attempt)
+        time.sleep(self.latency * rng.uniform(1 - self.jitter, 1 + self.jitter))
+        if rng.random() < self.error_rate:
+            with self._lock:
+                self.errors += 1
+            raise ConnectionError(f"Fake {endpoint} error for {symbol}")
+        return self.rng(endpoint, symbol)
+
+
+_backend = FakeBackend()
+
+_WORDS = ("fund invests index securities equity market growth income options shares "
+          "company products services technology revenue global portfolio strategy").split()
+
+
+def _sentence(rng, words=200):
+    return " ".join(rng.choice(_WORDS) for _ in range(words)).capitalize() + "."
+
+
+class FakeYfTicker:
+    def __init__(self, symbol, session=None):
+        self.ticker = symbol
+
+    @property
+    def info(self):
+        rng = _backend.call('info', self.ticker)
+        return {
+            'symbol': self.ticker,
+            'longName': f"{self.ticker} Holdings Inc.",
+            'sector': rng.choice(['Technology', 'Healthcare', 'Energy', 'Financial Services']),
+            'industry': rng.choice(['Software', 'Biotechnology', 'Oil & Gas', 'Banks']),
+            'category': rng.choice(['Large Blend', 'Large Growth', 'Options Trading']),
+            'longBusinessSummary': _sentence(rng),
+        }
+
+    def _statement(self, name, rows):
+        rng = _backend.call(name, self.ticker)
+        values = [[rng.uniform(-1e9, 1e11) for _ in range(4)] for _ in rows]
+        columns = pd.date_range('2020-12-31', periods=4, freq='YE')[::-1]
+        return pd.DataFrame(values, index=rows, columns=columns)
+
+    @property
+    def financials(self):
+        return self._statement('financials', ['Total Revenue', 'Operating Income', 'Net Income', 'EBITDA'])
+
+    @property
+    def balance_sheet(self):
+        return self._statement('balance_sheet', ['Total Assets', 'Total Liabilities Net Minority Interest',
+                                                 'Total Stockholder Equity', 'Current Assets',
+                                                 'Current Liabilities', 'Cash And Cash Equivalents'])
+
+    @property
+    def cashflow(self):
+        return self._statement('cashflow', ['Operating Cash Flow', 'Investing Cash Flow',
+                                            'Financing Cash Flow', 'Free Cash Flow'])
+
+
+class FakeYqTicker:
+    def __init__(self, symbols, **kwargs):
+        self.symbol = symbols
+
+    @property
+    def fund_top_holdings(self):
+        rng = _backend.call('holdings', self.symbol)
+        count = rng.randint(0, 10)
+        return pd.DataFrame({
+            'symbol': [f"H{rng.randint(0, 3000)}" for _ in range(count)],
+            'holdingName': [f"Holding {i}" for i in range(count)],
+            'holdingPercent': sorted((rng.uniform(0.001, 0.1) for _ in range(count)), reverse=True),
+        })
+
+
+class FakeTranslator:
+    def __init__(self, source='auto', target='en', **kwargs):
+        self.target = target
+
+    def translate(self, text, **kwargs):
+        _backend.call('translate', zlib.crc32(text.encode()))
+        return f"[{self.target}] {text}"
+
+
+def _krx_listing(market):
+    return pd.DataFrame({
+        'Code': [f"{i:06d}" for i in range(1, 3001)],
+        'Name': [f"종목{i}" for i in range(1, 3001)],
+    })
+
+
+def _krx_reader(ticker, kind=None, start=None):
+    rng = _backend.call(kind or 'price', ticker)
+    if kind is None:
+        closes = np.random.default_rng(rng.getrandbits(32)).normal(0, 500, 250).cumsum() + 50000
+        df = pd.DataFrame({'Close': closes}, index=pd.bdate_range(end=pd.Timestamp.today().normalize(), periods=250))
+        return df[df.index >= pd.Timestamp(start)] if start else df
+    # fs/fr: (항목, 'YYYY/12') 행이 최근 3개 회계연도만큼 있는 형태 (loc[항목, 'Annual'] 이 연도별 Series 가 되도록)
+    if kind == 'fs':
+        items = {'BPS': (20000, 80000), 'EPS': (1000, 9000), 'DPS': (0, 3000)}
+    else:
+        items = {'ROE': (2, 25), 'Dividend Yield': (0, 6)}
+    latest = int(expected_fiscal_period(datetime.date.today()))
+    index, values = [], []
+    for item, (low, high) in items.items():
+        for year in range(latest - 2, latest + 1):
+            index.append((item, f"{year}/12"))
+            values.append(rng.uniform(low, high))
+    return pd.DataFrame({'Annual': values}, index=pd.MultiIndex.from_tuples(index))
+
+
+def install(latency=0.05, jitter=0.5, error_rate=0.0, seed=0):
+    """가짜 모듈을 sys.modules 에 등록하고 호출 통계를 담는 FakeBackend 를 반환."""
+    global _backend
+    _backend = FakeBackend(latency, jitter, error_rate, seed)
+
+    yfinance = types.ModuleType('yfinance')
+    yfinance.Ticker = FakeYfTicker
+    yahooquery = types.ModuleType('yahooquery')
+    yahooquery.Ticker = FakeYqTicker
+    deep_translator = types.ModuleType('deep_translator')
+    deep_translator.GoogleTranslator = FakeTranslator
+    fdr = types.ModuleType('FinanceDataReader')
+    fdr.StockListing = _krx_listing
+    fdr.DataReader = _krx_reader
+
+    sys.modules.update({
+        'yfinance': yfinance,
+        'yahooquery': yahooquery,
+        'deep_translator': deep_translator,
+        'FinanceDataReader': fdr,
+    })
+    return _backend
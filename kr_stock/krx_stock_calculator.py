@@ -1,9 +1,19 @@
 import FinanceDataReader as fdr
 import pandas as pd
-import numpy as np
-from datetime import datetime
+from datetime import date, timedelta
 import time
 import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from stock_finder import http_cache
+from stock_finder.krx_store import KrxMetricsStore, fiscal_period
+
+STOCK_LIMIT = 10  # 테스트를 위해 10개로 제한
+REQUEST_DELAY = 1  # 서버 부하 감소를 위한 종목 간 지연(초)
+HISTORY_DAYS = 365  # 처음 보는 종목은 이 기간의 종가부터 저장
+HTTP_CACHE_MODE = None  # 'record' | 'replay' | 'offline', None 이면 캐시 사용 안 함
+HTTP_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "http_cache")
 
 def get_krx_tickers():
     df_krx = fdr.StockListing('KRX')
@@ -11,62 +21,54 @@ def get_krx_tickers():
     print(f"Columns in KRX listing: {df_krx.columns}")
     return df_krx
 
-def get_financial_data(ticker):
+def get_prices(ticker, start=None):
+    """start 이후의 종가 (날짜 index 의 Series). 오류가 나면 None."""
     try:
-        # 주가 데이터 가져오기
-        df = fdr.DataReader(ticker)
-        current_price = df.iloc[-1]['Close']
-
-        # 재무제표 데이터 가져오기
-        fs = fdr.DataReader(ticker, 'fs')
-        fr = fdr.DataReader(ticker, 'fr')
-        
-        return current_price, fs, fr
+        df = fdr.DataReader(ticker, start=start)
+        return df['Close'].dropna()
     except Exception as e:
-        print(f"Error retrieving data for {ticker}: {str(e)}")
-        return None, None, None
+        print(f"Error retrieving prices for {ticker}: {str(e)}")
+        return None
+
+def get_fundamentals(ticker):
+    """재무제표/재무비율에 있는 연간 BPS, EPS, DPS, ROE, 배당수익률 {회계연도: {지표: 값}}. 오류가 나면 None.
 
-def calculate_metrics(current_price, fs, fr):
+    과거 종가의 지표도 당시 회계연도 기준으로 계산할 수 있도록 표에 있는 연도를 모두 가져온다.
+    """
     try:
-        # 재무제표에서 필요한 데이터 추출
-        bps = fs.loc['BPS', 'Annual'].iloc[-1]
-        eps = fs.loc['EPS', 'Annual'].iloc[-1]
-        dps = fs.loc['DPS', 'Annual'].iloc[-1]
-        roe = fr.loc['ROE', 'Annual'].iloc[-1] / 100
-        dividend_yield = fr.loc['Dividend Yield', 'Annual'].iloc[-1] / 100
-
-        # 지표 계산
-        per = current_price / eps if eps != 0 else np.nan
-        pbr = current_price / bps if bps != 0 else np.nan
-        
-        r = 0.1  # 요구수익률 (예시)
-        fair_value = round((roe/r) * bps, -1) if r != 0 and bps != 0 else np.nan
-        parity = current_price / fair_value if fair_value != 0 else np.nan
-        expected_return = (fair_value - current_price) / current_price if current_price != 0 else np.nan
-
-        return {
-            'Current Price': current_price,
-            'BPS': bps,
-            'EPS': eps,
-            'DPS': dps,
-            'ROE': roe,
-            'Dividend Yield': dividend_yield,
-            'PER': per,
-            'PBR': pbr,
-            'Fair Value': fair_value,
-            'Parity': parity,
-            'Expected Return': expected_return
+        fs = fdr.DataReader(ticker, 'fs')
+        fr = fdr.DataReader(ticker, 'fr')
+        columns = {
+            'BPS': fs.loc['BPS', 'Annual'],
+            'EPS': fs.loc['EPS', 'Annual'],
+            'DPS': fs.loc['DPS', 'Annual'],
+            'ROE': fr.loc['ROE', 'Annual'] / 100,
+            'Dividend Yield': fr.loc['Dividend Yield', 'Annual'] / 100,
         }
+        periods = {}
+        for label in columns['BPS'].index:
+            period = fiscal_period([label])
+            if period is not None and not pd.isna(columns['BPS'][label]):
+                periods[period] = {key: values.get(label, float('nan')) for key, values in columns.items()}
+        if not periods:
+            print(f"Unknown fiscal period for {ticker}: {list(columns['BPS'].index)[-1:]}")
+            return None
+        return periods
     except Exception as e:
-        print(f"Error calculating metrics: {str(e)}")
+        print(f"Error retrieving fundamentals for {ticker}: {str(e)}")
         return None
 
 def main():
+    cache = http_cache.install(HTTP_CACHE_DIR, HTTP_CACHE_MODE)
+    save_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+    store = KrxMetricsStore.load(save_dir)
+    today = date.today()
     krx_tickers = get_krx_tickers()
-    results = []
-    total_stocks = min(10, len(krx_tickers))  # 테스트를 위해 10개로 제한
+    total_stocks = min(STOCK_LIMIT, len(krx_tickers))
     processed_stocks = 0
     error_stocks = 0
+    fundamentals_fetched = 0
+    new_closes = 0
 
     for index, row in krx_tickers.iloc[:total_stocks].iterrows():
         ticker = row.get('Symbol') or row.get('Code')
@@ -78,35 +80,43 @@ def main():
             continue
 
         print(f"Processing {name} ({ticker}) - {processed_stocks + 1}/{total_stocks}")
-        
-        current_price, fs, fr = get_financial_data(ticker)
-        if current_price is not None and fs is not None and fr is not None:
-            metrics = calculate_metrics(current_price, fs, fr)
-            if metrics is not None:
-                metrics['Symbol'] = ticker
-                metrics['Name'] = name
-                results.append(metrics)
-                processed_stocks += 1
-                print(f"Successfully analyzed {name} ({ticker})")
-            else:
-                error_stocks += 1
-        else:
+
+        # 재무 지표는 새 회계연도 공시가 나왔을 수 있을 때만 다시 가져온다
+        if store.needs_fundamentals(ticker, today):
+            periods = get_fundamentals(ticker)
+            if periods is not None:
+                for period, fundamentals in periods.items():
+                    store.set_fundamentals(ticker, name, period, fundamentals, today)
+                fundamentals_fetched += 1
+
+        # 종가는 저장된 마지막 날짜부터만. 장중에 저장한 종가일 수 있으므로 마지막 날짜는 다시 받아 덮어씀
+        last_date = store.last_date(ticker)
+        start = today - timedelta(days=HISTORY_DAYS) if last_date is None else last_date
+        closes = get_prices(ticker, start.isoformat())
+
+        if closes is None or store.current_fundamentals(ticker) is None:
             error_stocks += 1
-        
-        time.sleep(1)  # 서버 부하 감소를 위한 지연
+        else:
+            store.add_prices(ticker, closes.index.values, closes.values)
+            added = len(closes) if last_date is None else int((closes.index > pd.Timestamp(last_date)).sum())
+            new_closes += added
+            processed_stocks += 1
+            print(f"Successfully analyzed {name} ({ticker}): {added} new closes")
 
-    df_results = pd.DataFrame(results)
-    
-    # 결과 파일 저장
-    current_time = datetime.now().strftime("%Y%m%d_%H%M%S")
-    filename = f"stock_analysis_results_{current_time}.csv"
-    save_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
-    os.makedirs(save_dir, exist_ok=True)
-    full_path = os.path.join(save_dir, filename)
-    
+        time.sleep(REQUEST_DELAY)  # 서버 부하 감소를 위한 지연
+
+    computed = store.update()
+    store.save()
+
+    # 종목별 최신 지표 (매 실행마다 덮어씀, 날짜별 이력은 저장소에 있음)
+    df_results = pd.DataFrame(store.latest())
+    full_path = os.path.join(save_dir, "stock_analysis_results.csv")
     df_results.to_csv(full_path, index=False)
     print(f"Analysis results saved to {full_path}")
     print(f"Total stocks: {total_stocks}, Processed: {processed_stocks}, Errors: {error_stocks}")
+    print(f"Fundamentals fetched: {fundamentals_fetched}, New closes: {new_closes}, Metrics computed: {computed}")
+    if cache:
+        print(f"HTTP cache ({cache.mode}): {cache.hits} hits, {cache.misses} misses")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
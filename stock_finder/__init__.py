@@ -0,0 +1 @@
+# us_stock / us_etf / kr_stock 스크립트가 함께 사용하는 공용 모듈 모음
@@ -0,0 +1,3 @@
+from stock_finder.cli import main
+
+main()
@@ -0,0 +1,365 @@
+# stock_finder 통합 명령어
+#
+#   python -m stock_finder scrape-stocks [--count 500] [--shards 4]
+#   python -m stock_finder scrape-etfs [--shard 0/4 | --merge 4]
+#   python -m stock_finder krx-value [--limit 10]
+#   python -m stock_finder check us_stock/data/stock_data_korean_translated_240726.txt
+#   python -m stock_finder search AAPL
+#   python -m stock_finder similar AAPR      (SYMBOL 없이 실행하면 near-duplicate 묶음 목록)
+#   python -m stock_finder overlap QQQ --metric cosine
+#   python -m stock_finder delta stocks [--since 20240801_120000]   (--since 없으면 실행 기록 목록)
+#   python -m stock_finder parity-trend [005930] --days 20   (종목 없이 실행하면 기울기 순 목록)
+#   python -m stock_finder serve [--port 8765]   (lookup/search/screen/overlap JSON 질의 서비스)
+#   python -m stock_finder screen '부채비율 < 50 and 잉여현금흐름 > 0 and sector == "Technology"' --sort 잉여현금흐름
+#
+# yfinance, yahooquery, pandas, deep_translator, FinanceDataReader 같은 무거운 라이브러리는
+# 필요한 하위 명령 안에서만 import 한다. check/search 는 표준 라이브러리만 사용하므로 바로 시작한다.
+import argparse
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 하위 명령별 스크립트와 종목 수 변수
+SCRIPTS = {
+    'scrape-stocks': ('us_stock/main_read_file_korean.py', 'STOCK_COUNT'),
+    'scrape-etfs': ('us_etf/main_read_file_korean.py', 'ETF_COUNT'),
+    'krx-value': ('kr_stock/krx_stock_calculator.py', 'STOCK_LIMIT'),
+}
+
+# search 대상 진행 상황 파일 (progress.bin 이 없으면 이전 형식의 progress.json 을 읽음)
+DATASETS = {
+    'stocks': 'us_stock/progress',
+    'etfs': 'us_etf/progress',
+}
+KRX_DATA_DIR = 'kr_stock/data'
+
+
+def load_script(command):
+    """스크립트를 모듈로 불러온다. 스크립트는 상대 경로로 입력/출력 파일을 찾으므로 해당 디렉터리로 이동."""
+    import importlib.util
+
+    path = os.path.join(ROOT, SCRIPTS[command][0])
+    os.chdir(os.path.dirname(path))
+    spec = importlib.util.spec_from_file_location(command.replace('-', '_'), path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def configure(module, command, args):
+    if args.count is not None:
+        setattr(module, SCRIPTS[command][1], args.count)
+    if args.http_cache is not None:
+        module.HTTP_CACHE_MODE = args.http_cache
+
+
+def run_scraper(args):
+    from stock_finder import shards
+
+    module = load_script(args.command)
+    configure(module, args.command, args)
+    if args.shards:
+        # 샤드 프로세스는 스크립트를 직접 실행하므로 --count/--http-cache 는 명령행 옵션으로 넘긴다
+        failed_shards = shards.run_local_shards(module.__file__, args.shards,
+                                                shards.shard_options(args.count, args.http_cache))
+        if failed_shards:
+            print(f"Shards {failed_shards} failed; merging available results")
+        module.merge_shards(args.shards)
+    elif args.merge:
+        module.merge_shards(args.merge)
+    else:
+        module.main(args.shard)
+
+
+def run_krx_value(args):
+    module = load_script(args.command)
+    configure(module, args.command, args)
+    module.main()
+
+
+def run_check(args):
+    from stock_finder.sections import check_section_lengths
+
+    check_section_lengths(args.file, min_length=args.min_length)
+
+
+def search_records(store, query):
+    """(순위, symbol, info) 를 반환. 티커 일치 > 이름 일치 > 설명 일치 순."""
+    query = query.casefold()
+    for symbol in store:
+        info = store[symbol].get('info', {})
+        if symbol.casefold() == query:
+            yield 0, symbol, info
+        elif query in str(info.get('longName', '')).casefold():
+            yield 1, symbol, info
+        elif query in str(info.get('longBusinessSummary', '')).casefold():
+            yield 2, symbol, info
+
+
+def open_dataset(dataset):
+    return open_progress(os.path.join(ROOT, DATASETS[dataset]))
+
+
+def open_progress(base):
+    """읽기 전용으로 진행 상황을 연다. 수집 중인 progress.bin 을 건드리거나 새로 만들지 않는다."""
+    if os.path.exists(base + '.bin'):
+        from stock_finder.records import RecordStore
+        return RecordStore(base + '.bin', readonly=True)
+    if os.path.exists(base + '.json'):
+        import json
+        with open(base + '.json', 'r') as f:
+            return json.load(f)
+    return None
+
+
+def run_search(args):
+    hits = []
+    for dataset in args.dataset or DATASETS:
+        store = open_dataset(dataset)
+        if store is None:
+            print(f"{dataset}: no progress file under {os.path.dirname(DATASETS[dataset])}/", file=sys.stderr)
+            continue
+        hits.extend((rank, symbol, dataset, info) for rank, symbol, info in search_records(store, args.query))
+        if hasattr(store, 'close'):
+            store.close()
+
+    hits.sort(key=lambda hit: hit[0])
+    for rank, symbol, dataset, info in hits[:args.limit]:
+        detail = info.get('category') or info.get('sector') or ''
+        print(f"{symbol:<8} {dataset:<6} {info.get('longName', '')}  {detail}")
+    if len(hits) > args.limit:
+        print(f"... {len(hits) - args.limit} more (--limit)")
+
+
+def run_similar(args):
+    from stock_finder.similarity import SimilarityIndex
+
+    store = open_dataset(args.dataset)
+    if store is None:
+        sys.exit(f"{args.dataset}: no progress file under {os.path.dirname(DATASETS[args.dataset])}/")
+    index = SimilarityIndex(threshold=args.threshold)
+    names = {}
+    for symbol in store:
+        info = store[symbol].get('info', {})
+        names[symbol] = info.get('longName', '')
+        # 영문 원문이 없는 이전 기록은 번역문으로 비교
+        index.add(symbol, info.get('originalSummary') or info.get('longBusinessSummary', ''))
+
+    if args.symbol is None:
+        clusters = index.clusters()
+        for group in clusters[:args.limit]:
+            print(f"[{len(group)}] " + ", ".join(sorted(group)))
+        print(f"{len(clusters)} groups, {sum(map(len, clusters))} of {len(index)} {args.dataset} have near-duplicates")
+        return
+    symbol = args.symbol.upper()
+    if symbol not in index:
+        sys.exit(f"{symbol} not found in {args.dataset} (or has no description)")
+    for other, score in index.query(key=symbol, limit=args.limit):
+        print(f"{other:<8} {score:.2f}  {names[other]}")
+
+
+def run_overlap(args):
+    from stock_finder.holdings import HoldingsMatrix
+
+    store = open_dataset('etfs')
+    if store is None:
+        sys.exit(f"etfs: no progress file under {os.path.dirname(DATASETS['etfs'])}/")
+    matrix = HoldingsMatrix.from_records(store)
+    symbol = args.symbol.upper()
+    if symbol not in matrix:
+        sys.exit(f"{symbol} has no holdings data")
+    for other, score in matrix.similar(symbol, args.metric, args.limit):
+        print(f"{other:<8} {score:.3f}  {store[other]['info'].get('longName', '')}")
+
+
+def run_screen(args):
+    import time
+    from stock_finder.screener import Screener, StockTable
+
+    store = open_dataset(args.dataset)
+    if store is None:
+        sys.exit(f"{args.dataset}: no progress file under {os.path.dirname(DATASETS[args.dataset])}/")
+    screener = Screener(StockTable.from_records(store))
+    try:
+        start = time.perf_counter()
+        indices = screener.screen(args.expression, args.sort, not args.ascending, args.limit)
+        elapsed = time.perf_counter() - start
+        columns = [key for key in screener.columns(args.expression, args.sort) if key != 'symbol']
+        sort_values = screener.values(args.sort) if args.sort else None
+    except ValueError as e:
+        sys.exit(str(e))
+
+    table = screener.table
+    for i in indices:
+        row = f"{table.symbols[i]:<8}"
+        for key in columns:
+            value = table.column(key)[i]
+            row += f"  {key}={value:,.2f}" if key in table.numeric else f"  {key}={value}"
+        if args.sort and args.sort not in columns:
+            row += f"  [{args.sort}]={sort_values[i]:,.2f}"
+        print(row)
+    total = len(screener.screen(args.expression)) if args.limit else len(indices)
+    print(f"{total} of {len(table)} match ({elapsed * 1000:.2f} ms)", file=sys.stderr)
+
+
+def run_delta(args):
+    from stock_finder import delta
+    from stock_finder.formatting import OUTPUTS
+
+    base_dir = os.path.join(ROOT, os.path.dirname(DATASETS[args.dataset]))
+    runs_dir = os.path.join(base_dir, delta.RUNS_DIR)
+    runs = delta.list_runs(runs_dir)
+    if not runs:
+        sys.exit(f"{args.dataset}: no recorded runs in {runs_dir}")
+    if args.since is None:
+        for run_id in runs:
+            print(f"{run_id}  {len(delta.load_manifest(run_id, runs_dir))} {args.dataset}")
+        return
+
+    # 지금 진행 상황 파일(checkpoint)의 모든 기록과 비교. 파일 이름은 그 내용의 checkpoint ID 로 붙인다.
+    store = open_dataset(args.dataset)
+    if not hasattr(store, 'digest'):
+        sys.exit(f"{args.dataset}: no progress.bin under {base_dir} (progress.json has no record hashes)")
+    try:
+        hashes = delta.record_hashes(store, store)
+        prefix, renderers = OUTPUTS[args.dataset]
+        filename = delta.export_delta(prefix, args.since, delta.checkpoint_id(hashes), hashes, store, renderers,
+                                      runs_dir, os.path.join(base_dir, delta.DATA_DIR))
+    except ValueError as e:
+        sys.exit(str(e))
+    finally:
+        store.close()
+    print(filename)
+
+
+def run_parity_trend(args):
+    import numpy as np
+    from stock_finder.krx_store import KrxMetricsStore
+
+    store = KrxMetricsStore.load(os.path.join(ROOT, KRX_DATA_DIR))
+    if not store.tickers:
+        sys.exit(f"krx: no metrics store under {KRX_DATA_DIR}/ (run krx-value first)")
+    if args.ticker:
+        try:
+            dates, closes, metrics = store.series(args.ticker, args.days)
+        except KeyError:
+            sys.exit(f"{args.ticker} not found in KRX metrics store")
+        for day, close, parity, expected in zip(dates, closes, metrics['Parity'], metrics['Expected Return']):
+            print(f"{day}  {close:>12,.0f}  parity={parity:.3f}  expected={expected:+.1%}")
+        return
+
+    # 기울기(거래일당 parity 변화)가 가장 크게 내려간 종목부터
+    first, last, slope = store.parity_trends(args.days)
+    order = np.argsort(np.where(np.isnan(slope), np.inf, slope), kind='stable')
+    for j in order[:args.limit or None]:
+        if np.isnan(slope[j]):
+            break
+        name = store.fundamentals.get(store.tickers[j], {}).get('name', '')
+        print(f"{store.tickers[j]:<8} {first[j]:.3f} -> {last[j]:.3f}  slope={slope[j]:+.4f}  {name}")
+
+
+def run_serve(args):
+    import logging
+    from stock_finder.server import QueryService, make_server
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    service = QueryService(cache_size=args.cache_size)
+    if args.reload_interval > 0:
+        service.watch(args.reload_interval)
+    server = make_server(service, args.host, args.port)
+    loaded = ', '.join(f"{name} ({len(dataset)})" for name, dataset in service.datasets.items()) or 'no datasets'
+    print(f"Serving {loaded} on http://{args.host}:{server.server_port}/", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        service.stop()
+        server.server_close()
+
+
+def parse_shard(text):
+    from stock_finder.shards import parse_shard as parse
+    try:
+        return parse(text)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='stock_finder', description="미국 주식/ETF 정보 수집과 KRX 가치 평가")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    for command, label in (('scrape-stocks', "미국 주식"), ('scrape-etfs', "미국 ETF")):
+        sub = subparsers.add_parser(command, help=f"{label} 정보 수집 및 한국어 번역")
+        sub.add_argument('--count', type=int, help="처리할 종목 수 (기본: 스크립트 설정값)")
+        sub.add_argument('--http-cache', choices=('record', 'replay', 'offline'), help="HTTP 캐시 모드")
+        group = sub.add_mutually_exclusive_group()
+        group.add_argument('--shard', type=parse_shard, help="i/N: N개로 나눈 종목 중 i번째만 처리")
+        group.add_argument('--shards', type=int, help="N개 프로세스로 나눠 실행한 뒤 결과를 합침")
+        group.add_argument('--merge', type=int, metavar='N', help="N개 샤드의 결과만 합침")
+        sub.set_defaults(run=run_scraper)
+
+    sub = subparsers.add_parser('krx-value', help="KRX 종목 PER/PBR/적정가치 계산")
+    sub.add_argument('--limit', dest='count', type=int, help="처리할 종목 수 (기본: 스크립트 설정값)")
+    sub.add_argument('--http-cache', choices=('record', 'replay', 'offline'), help="HTTP 캐시 모드")
+    sub.set_defaults(run=run_krx_value)
+
+    sub = subparsers.add_parser('check', help="출력 파일의 섹션별 길이 확인")
+    sub.add_argument('file')
+    sub.add_argument('--min-length', type=int, default=1000)
+    sub.set_defaults(run=run_check)
+
+    sub = subparsers.add_parser('search', help="수집된 주식/ETF 를 티커, 이름, 설명으로 검색")
+    sub.add_argument('query')
+    sub.add_argument('--dataset', action='append', choices=list(DATASETS), help="검색할 데이터 (기본: 전체)")
+    sub.add_argument('--limit', type=int, default=20)
+    sub.set_defaults(run=run_search)
+
+    sub = subparsers.add_parser('similar', help="설명이 거의 같은 ETF/주식 찾기 (MinHash/LSH)")
+    sub.add_argument('symbol', nargs='?', help="기준 티커 (없으면 near-duplicate 묶음 목록)")
+    sub.add_argument('--dataset', choices=list(DATASETS), default='etfs')
+    sub.add_argument('--threshold', type=float, default=0.8, help="추정 Jaccard 유사도 하한")
+    sub.add_argument('--limit', type=int, default=20)
+    sub.set_defaults(run=run_similar)
+
+    sub = subparsers.add_parser('overlap', help="편입종목 비중이 가장 많이 겹치는 ETF 찾기")
+    sub.add_argument('symbol')
+    sub.add_argument('--metric', choices=('overlap', 'cosine'), default='overlap',
+                     help="overlap: 공통 종목 min(비중) 합, cosine: 비중 벡터 코사인 유사도")
+    sub.add_argument('--limit', type=int, default=20)
+    sub.set_defaults(run=run_overlap)
+
+    sub = subparsers.add_parser('delta', help="이전 실행 이후 추가/변경/삭제된 기록만 JSONL 로 내보내기")
+    sub.add_argument('dataset', choices=list(DATASETS))
+    sub.add_argument('--since', help="기준 실행 ID (없으면 실행 기록 목록 출력)")
+    sub.set_defaults(run=run_delta)
+
+    sub = subparsers.add_parser('screen', help="재무 조건식으로 종목 걸러내기")
+    sub.add_argument('expression', nargs='?', help='예: 부채비율 < 50 and 잉여현금흐름 > 0 and sector == "Technology"')
+    sub.add_argument('--sort', help="정렬 기준 항목 또는 식 (예: 잉여현금흐름, '영업이익 / 매출액')")
+    sub.add_argument('--ascending', action='store_true', help="오름차순 (기본: 내림차순)")
+    sub.add_argument('--limit', type=int, default=20, help="상위 N개 (0 이면 전체)")
+    sub.add_argument('--dataset', choices=list(DATASETS), default='stocks')
+    sub.set_defaults(run=run_screen)
+
+    sub = subparsers.add_parser('parity-trend', help="KRX 종목의 최근 N 거래일 parity(주가/적정가치) 추이")
+    sub.add_argument('ticker', nargs='?', help="종목 코드 (없으면 전체 종목을 parity 기울기 순으로)")
+    sub.add_argument('--days', type=int, default=20)
+    sub.add_argument('--limit', type=int, default=20, help="목록 상위 N개 (0 이면 전체)")
+    sub.set_defaults(run=run_parity_trend)
+
+    sub = subparsers.add_parser('serve', help="주식/ETF/KRX 조회, 검색, 스크리너, ETF 겹침 JSON HTTP 서비스")
+    sub.add_argument('--host', default='127.0.0.1')
+    sub.add_argument('--port', type=int, default=8765)
+    sub.add_argument('--cache-size', type=int, default=1024, help="캐시할 응답 수 (0 이면 캐시 안 함)")
+    sub.add_argument('--reload-interval', type=float, default=5,
+                     help="데이터셋 버전 확인 주기(초), 0 이면 POST /reload 로만 다시 읽음")
+    sub.set_defaults(run=run_serve)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    args.run(args)
@@ -0,0 +1,128 @@
+import hashlib
+import json
+import logging
+import os
+import time
+
+# 실행별 변경분(delta) 내보내기
+#
+# 실행이 끝날 때마다 출력 파일에 들어간 종목의 내용 해시를 runs/<run_id>.json 에 남긴다.
+# 두 실행의 해시를 비교해 추가/변경/삭제된 종목만 JSONL 로 내보내면, 출력 파일을 색인하는
+# 쪽(검색 색인 등)은 전체를 다시 처리하지 않고 바뀐 종목만 반영할 수 있다.
+#
+#   {"op": "added" | "changed", "symbol": ..., "hash": ..., "text": ..., "summary": ...}
+#   {"op": "removed", "symbol": ..., "hash": <이전 해시>}
+#
+# 파일 이름은 <prefix>_delta_<기준 실행>_to_<대상>.jsonl. 대상은 실행 ID, 또는 실행 기록 없이
+# 진행 상황 파일을 직접 비교한 경우(python -m stock_finder delta) 그 내용으로 만든 checkpoint ID.
+RUNS_DIR = "runs"
+DATA_DIR = "data"
+
+logger = logging.getLogger(__name__)
+
+
+def new_run_id(runs_dir=RUNS_DIR):
+    """실행 시각(초 단위) ID. 같은 초에 기록된 실행이 있으면 _1, _2 ... 를 붙여 덮어쓰지 않는다."""
+    base = time.strftime('%Y%m%d_%H%M%S')
+    run_id, n = base, 0
+    while os.path.exists(manifest_path(run_id, runs_dir)):
+        n += 1
+        run_id = f"{base}_{n}"
+    return run_id
+
+
+def _run_order(run_id):
+    # '20240801_120000_10' 이 '_2' 보다 뒤에 오도록 번호는 숫자로 비교
+    date, _, rest = run_id.partition('_')
+    clock, _, n = rest.partition('_')
+    return date, clock, int(n) if n.isdigit() else 0
+
+
+def checkpoint_id(hashes):
+    """진행 상황 파일 내용({symbol: 해시})으로 정해지는 ID. 내용이 같으면 같은 ID."""
+    digest = hashlib.blake2b(json.dumps(hashes, sort_keys=True).encode(), digest_size=6).hexdigest()
+    return f"checkpoint_{digest}"
+
+
+def manifest_path(run_id, runs_dir=RUNS_DIR):
+    return os.path.join(runs_dir, f"{run_id}.json")
+
+
+def list_runs(runs_dir=RUNS_DIR):
+    if not os.path.isdir(runs_dir):
+        return []
+    return sorted((name[:-5] for name in os.listdir(runs_dir) if name.endswith('.json')), key=_run_order)
+
+
+def save_manifest(run_id, hashes, runs_dir=RUNS_DIR):
+    """hashes: 출력 순서의 {symbol: 내용 해시}"""
+    os.makedirs(runs_dir, exist_ok=True)
+    path = manifest_path(run_id, runs_dir)
+    with open(path + '.tmp', 'w') as f:
+        json.dump({'run_id': run_id, 'created_at': time.strftime('%Y-%m-%d %H:%M:%S'), 'hashes': hashes}, f)
+    os.replace(path + '.tmp', path)
+
+
+def load_manifest(run_id, runs_dir=RUNS_DIR):
+    path = manifest_path(run_id, runs_dir)
+    if not os.path.exists(path):
+        raise ValueError(f"Unknown run ID {run_id} (known: {', '.join(list_runs(runs_dir)) or 'none'})")
+    with open(path, 'r') as f:
+        return json.load(f)['hashes']
+
+
+def diff_hashes(old, new):
+    """(추가, 변경, 삭제) 심볼 목록. 추가/변경은 새 출력 순서, 삭제는 이전 출력 순서."""
+    added = [symbol for symbol in new if symbol not in old]
+    changed = [symbol for symbol in new if symbol in old and old[symbol] != new[symbol]]
+    removed = [symbol for symbol in old if symbol not in new]
+    return added, changed, removed
+
+
+def record_hashes(symbols, store):
+    """출력 파일에 들어간 순서대로 {symbol: 해시}. 저장소에 없는 종목(실패)은 출력에도 없으므로 제외."""
+    return {symbol: store.digest(symbol) for symbol in symbols if symbol in store}
+
+
+def write_delta(filename, old, new, store, renderers):
+    """old/new 해시 비교 결과를 JSONL 로 저장. renderers: {필드 이름: 기록 -> 출력 텍스트}.
+
+    (추가, 변경, 삭제) 개수를 반환.
+    """
+    added, changed, removed = diff_hashes(old, new)
+    os.makedirs(os.path.dirname(filename) or '.', exist_ok=True)
+    with open(filename + '.tmp', 'w', encoding='utf-8') as f:
+        for op, symbols in (('added', added), ('changed', changed)):
+            for symbol in symbols:
+                record = store[symbol]
+                line = {'op': op, 'symbol': symbol, 'hash': new[symbol]}
+                line.update((field, render(record)) for field, render in renderers.items())
+                f.write(json.dumps(line, ensure_ascii=False) + '\n')
+        for symbol in removed:
+            f.write(json.dumps({'op': 'removed', 'symbol': symbol, 'hash': old[symbol]}) + '\n')
+    os.replace(filename + '.tmp', filename)
+    return len(added), len(changed), len(removed)
+
+
+def export_delta(prefix, since, target, hashes, store, renderers, runs_dir=RUNS_DIR, data_dir=DATA_DIR):
+    """실행 since 이후 추가/변경/삭제된 기록만 <data_dir>/<prefix>_delta_<since>_to_<target>.jsonl 로 저장."""
+    filename = os.path.join(data_dir, f"{prefix}_delta_{since}_to_{target}.jsonl")
+    added, changed, removed = write_delta(filename, load_manifest(since, runs_dir), hashes, store, renderers)
+    logger.info(f"Delta since run {since}: {added} added, {changed} changed, {removed} removed -> {filename}")
+    return filename
+
+
+def record_run(symbols, store, prefix, renderers, since=None, runs_dir=RUNS_DIR, data_dir=DATA_DIR):
+    """출력 파일에 들어간 기록의 내용 해시를 남기고, since(없으면 직전 실행) 대비 변경분을 내보낸다.
+
+    새 실행 ID 를 반환.
+    """
+    previous_runs = list_runs(runs_dir)
+    run_id = new_run_id(runs_dir)
+    hashes = record_hashes(symbols, store)
+    save_manifest(run_id, hashes, runs_dir)
+    logger.info(f"Recorded run {run_id} ({len(hashes)} records)")
+    since = since or (previous_runs[-1] if previous_runs else None)
+    if since and since != run_id:
+        export_delta(prefix, since, run_id, hashes, store, renderers, runs_dir, data_dir)
+    return run_id
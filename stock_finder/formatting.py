@@ -0,0 +1,86 @@
+# 수집 스크립트의 출력 형식 (텍스트 파일, 자연어 요약, 변경분 JSONL 에 같은 형식을 사용)
+#
+# 스크립트 밖(stock_finder delta 등)에서도 yfinance 같은 수집 라이브러리를 불러오지 않고
+# 기록을 같은 형식으로 출력할 수 있도록 여기에 둔다.
+
+
+def truncate_to_last_sentence(text, max_length=1000):
+    if len(text) <= max_length:
+        return text
+    truncated = text[:max_length]
+    last_period = truncated.rfind('.')
+    if last_period != -1:
+        return truncated[:last_period + 1]
+    return truncated
+
+
+def format_stock_text(stock):
+    info = stock.get('info', {})
+    content = f"티커: {info.get('symbol', '')}\n"
+    content += f"이름: {info.get('longName', '')}\n"
+    content += f"섹터: {info.get('sector', '')}\n"
+    content += f"산업: {info.get('industry', '')}\n"
+    content += f"카테고리: {info.get('category', '')}\n"
+    content += "\n재무제표 정보 (최근 1년):\n"
+    financials = info.get('financials', {})
+    for key, value in financials.items():
+        content += f"{key}: {value}\n"
+    content += f"\n설명:\n{truncate_to_last_sentence(info.get('longBusinessSummary', ''))}\n\n"
+    content += '\n' + '='*50 + '\n\n'
+    return content
+
+
+def format_stock_summary(stock):
+    info = stock.get('info', {})
+    summary = f"{info.get('longName', '')}(티커: {info.get('symbol', '')})은 "
+    if info.get('sector'):
+        summary += f"{info.get('sector')} 섹터"
+    if info.get('industry'):
+        summary += f", {info.get('industry')} 산업"
+    summary += "에 속하는 주식입니다.\n"
+    if info.get('category'):
+        summary += f"카테고리: {info.get('category')}\n"
+    summary += "\n재무제표 정보 (최근 1년):\n"
+    for key, value in info.get('financials', {}).items():
+        summary += f"{key}: {value}\n"
+    summary += f"\n이 주식에 대한 설명은 다음과 같습니다.\n{truncate_to_last_sentence(info.get('longBusinessSummary', ''))}\n\n"
+    return summary
+
+
+def format_etf_text(etf):
+    info = etf['info']
+    content = f"티커: {info['symbol']}\n"
+    content += f"이름: {info['longName']}\n"
+    content += f"카테고리: {info['category']}\n"
+    content += f"\n설명:\n{info['longBusinessSummary']}\n\n"
+    
+    if etf['top_holdings']:
+        content += "편입종목 상위 5개:\n"
+        for holding in etf['top_holdings']:
+            content += f"- {holding['name']} ({holding['symbol']}): {holding['percent']}\n"
+    
+    if len(content) > 1000:
+        content += "\n[참고 : 1000 글자가 넘는 내용입니다.]\n"
+    
+    content += '\n' + '='*50 + '\n\n'
+    return content
+
+
+def format_etf_summary(etf):
+    info = etf['info']
+    summary = f"{info['longName']}(티커: {info['symbol']})은 {info['category']} 카테고리에 속하는 ETF입니다.\n"
+    summary += f"이 ETF에 대한 설명은 다음과 같습니다.\n{info['longBusinessSummary']}\n\n"
+    
+    if etf['top_holdings']:
+        summary += "주요 편입 종목으로는 "
+        holdings = [f"{h['name']}({h['percent']})" for h in etf['top_holdings']]
+        summary += ", ".join(holdings) + " 등이 있습니다."
+    
+    return summary
+
+
+# 데이터셋별 출력 파일 이름 앞부분과 변경분(delta) 에 넣을 필드 -> 출력 형식
+OUTPUTS = {
+    'stocks': ('stock_data', {'text': format_stock_text, 'summary': format_stock_summary}),
+    'etfs': ('etf_data', {'text': format_etf_text, 'summary': format_etf_summary}),
+}
@@ -0,0 +1,229 @@
+import math
+
+import numpy as np
+
+# ETF x 종목 편입 비중 희소 행렬로 "QQQ 와 가장 많이 겹치는 ETF" 같은 질의를 처리한다.
+#
+#   overlap : 공통 종목의 min(비중 A, 비중 B) 합 (두 ETF 가 실제로 같이 들고 있는 비중, 0~1)
+#   cosine  : 비중 벡터의 코사인 유사도
+#
+# 전체 계산은 종목별로 그 종목을 가진 ETF 쌍만 만들어 한 번에 합산하고(scipy 없이 numpy 만 사용),
+# 결과는 ETF 별 상위 k 개 이웃만 메모리에 보관한다. 한 ETF 의 편입종목이 바뀌면 그 ETF 와 종목을
+# 공유하는 ETF 들의 이웃 목록만 갱신한다. (3,600개 전체 계산이 1초 미만이라 디스크에는 저장하지 않음)
+# 질의 서비스는 다시 읽을 때 이전 행렬을 복사해 바뀐 ETF 만 update() 한다 (updated()).
+METRICS = ('overlap', 'cosine')
+TOP_K = 20
+INCREMENTAL_LIMIT = 15  # 바뀐 ETF 가 이보다 많으면 전체를 다시 계산 (ETF 하나 ~55ms, 전체 ~1s)
+# 점수 반올림 자릿수. 전체 계산과 update() 의 합산 순서가 달라 생기는 미세한 차이를 없애고,
+# 같은 점수는 ETF 이름 순으로 정렬해 두 방식의 이웃 목록이 같도록 한다 (overlap 은 동점이 흔함)
+SCORE_DIGITS = 10
+
+
+def parse_percent(text):
+    """'6.96%' -> 0.0696"""
+    try:
+        return float(str(text).rstrip('%').replace(',', '')) / 100
+    except ValueError:
+        return 0.0
+
+
+def holdings_weights(holdings):
+    """get_top_holdings 결과 -> {종목: 비중}. 같은 종목이 여러 번 나오면 합친다."""
+    weights = {}
+    for holding in holdings or []:
+        symbol = holding.get('symbol')
+        weight = parse_percent(holding.get('percent', ''))
+        if symbol and symbol != 'N/A' and weight > 0:
+            weights[symbol] = weights.get(symbol, 0.0) + weight
+    return weights
+
+
+class HoldingsMatrix:
+    def __init__(self, k=TOP_K):
+        self.k = k
+        self.rows = {}  # ETF -> {종목: 비중}
+        self.holders = {}  # 종목 -> {ETF: 비중} (역색인)
+        self.norms = {}  # ETF -> 비중 벡터 크기
+        self.neighbors = {metric: {} for metric in METRICS}  # metric -> ETF -> [(ETF, 점수)]
+        self.computed = False
+
+    def __len__(self):
+        return len(self.rows)
+
+    def __contains__(self, symbol):
+        return symbol in self.rows
+
+    def _set_row(self, symbol, weights):
+        self.norms.pop(symbol, None)
+        for security in self.rows.pop(symbol, {}):
+            holders = self.holders[security]
+            del holders[symbol]
+            if not holders:
+                del self.holders[security]
+        if weights:
+            self.rows[symbol] = weights
+            self.norms[symbol] = math.sqrt(sum(w * w for w in weights.values()))
+            for security, weight in weights.items():
+                self.holders.setdefault(security, {})[symbol] = weight
+
+    @classmethod
+    def from_records(cls, records, k=TOP_K):
+        """{ETF: 진행 상황 기록} 에서 행렬을 만든다. 편입종목이 없는 ETF 는 제외."""
+        matrix = cls(k)
+        for symbol in records:
+            weights = holdings_weights(records[symbol].get('top_holdings'))
+            if weights:
+                matrix._set_row(symbol, weights)
+        return matrix
+
+    def copy(self):
+        """이웃 목록까지 복사한 새 행렬. 행(비중 dict)과 이웃 목록(list)은 바꿀 때 새로 만들므로 공유한다."""
+        matrix = type(self)(self.k)
+        matrix.rows = dict(self.rows)
+        matrix.holders = {security: dict(holders) for security, holders in self.holders.items()}
+        matrix.norms = dict(self.norms)
+        matrix.neighbors = {metric: dict(neighbors) for metric, neighbors in self.neighbors.items()}
+        matrix.computed = self.computed
+        return matrix
+
+    def updated(self, records):
+        """records 기준의 새 행렬과 바뀐 ETF 수. 이 행렬은 그대로 두고, 바뀐 ETF 만 복사본에 update() 한다."""
+        changed = {}  # ETF -> 새 편입종목 (삭제된 ETF 는 [])
+        for symbol in records:
+            holdings = records[symbol].get('top_holdings')
+            if holdings_weights(holdings) != self.rows.get(symbol, {}):
+                changed[symbol] = holdings
+        changed.update((symbol, []) for symbol in self.rows if symbol not in records)
+        if not self.computed or len(changed) > INCREMENTAL_LIMIT:
+            matrix = type(self).from_records(records, self.k)
+            matrix.compute()
+            return matrix, len(changed)
+        matrix = self.copy()
+        for symbol, holdings in changed.items():
+            matrix.update(symbol, holdings)
+        return matrix, len(changed)
+
+    def to_arrays(self):
+        """(ETF 목록, 종목 목록, 행 번호, 열 번호, 비중) 좌표 형식 희소 행렬."""
+        etfs = list(self.rows)
+        securities = list(self.holders)
+        column = {security: j for j, security in enumerate(securities)}
+        counts = np.fromiter((len(weights) for weights in self.rows.values()), dtype=np.int64, count=len(etfs))
+        row_index = np.repeat(np.arange(len(etfs)), counts)
+        col_index = np.fromiter((column[s] for weights in self.rows.values() for s in weights),
+                                dtype=np.int64, count=int(counts.sum()))
+        values = np.fromiter((w for weights in self.rows.values() for w in weights.values()),
+                             dtype=np.float64, count=int(counts.sum()))
+        return etfs, securities, row_index, col_index, values
+
+    def compute(self):
+        """모든 ETF 쌍의 overlap/cosine 을 한 번에 계산하고 ETF 별 상위 k 개를 저장."""
+        etfs, _, rows, cols, values = self.to_arrays()
+        n = len(etfs)
+        norms = np.sqrt(np.bincount(rows, weights=values * values, minlength=n))
+
+        # 같은 종목을 가진 항목끼리 (왼쪽, 오른쪽) 쌍을 만든다
+        order = np.argsort(cols, kind='stable')
+        rows, cols, values = rows[order], cols[order], values[order]
+        starts = np.flatnonzero(np.r_[True, cols[1:] != cols[:-1]])
+        sizes = np.diff(np.r_[starts, len(cols)])
+        entry_sizes = np.repeat(sizes, sizes)
+        left = np.repeat(np.arange(len(cols)), entry_sizes)
+        offsets = np.arange(len(left)) - np.repeat(np.cumsum(entry_sizes) - entry_sizes, entry_sizes)
+        right = np.repeat(np.repeat(starts, sizes), entry_sizes) + offsets
+        keep = rows[left] != rows[right]
+        left, right = left[keep], right[keep]
+
+        # (ETF A, ETF B) 별로 합산
+        pairs, inverse = np.unique(rows[left] * n + rows[right], return_inverse=True)
+        overlap = np.bincount(inverse, weights=np.minimum(values[left], values[right]))
+        dot = np.bincount(inverse, weights=values[left] * values[right])
+        a, b = pairs // n, pairs % n
+        overlap = np.round(overlap, SCORE_DIGITS)
+        cosine = np.round(dot / (norms[a] * norms[b]), SCORE_DIGITS)
+        name_rank = np.argsort(np.argsort(np.array(etfs, dtype=object)))
+
+        for metric, scores in (('overlap', overlap), ('cosine', cosine)):
+            ranked = np.lexsort((name_rank[b], -scores, a))
+            group_starts = np.flatnonzero(np.r_[True, a[ranked][1:] != a[ranked][:-1]])
+            rank = np.arange(len(ranked)) - np.repeat(group_starts, np.diff(np.r_[group_starts, len(ranked)]))
+            top = ranked[rank < self.k]
+            neighbors = {symbol: [] for symbol in etfs}
+            for i, j, score in zip(a[top].tolist(), b[top].tolist(), scores[top].tolist()):
+                neighbors[etfs[i]].append((etfs[j], score))
+            self.neighbors[metric] = neighbors
+        self.computed = True
+
+    def scores(self, symbol):
+        """한 ETF 와 종목을 공유하는 모든 ETF 의 {ETF: (overlap, cosine)}."""
+        weights = self.rows.get(symbol, {})
+        overlap, dot = {}, {}
+        for security, weight in weights.items():
+            for other, other_weight in self.holders[security].items():
+                if other != symbol:
+                    overlap[other] = overlap.get(other, 0.0) + min(weight, other_weight)
+                    dot[other] = dot.get(other, 0.0) + weight * other_weight
+        if not overlap:
+            return {}
+        others = list(overlap)
+        overlap = np.round(np.fromiter(overlap.values(), dtype=np.float64, count=len(others)), SCORE_DIGITS)
+        norms = np.fromiter((self.norms[other] for other in others), dtype=np.float64, count=len(others))
+        dot = np.fromiter(dot.values(), dtype=np.float64, count=len(others))
+        cosine = np.round(dot / (self.norms[symbol] * norms), SCORE_DIGITS)
+        return dict(zip(others, zip(overlap.tolist(), cosine.tolist())))
+
+    def _refresh(self, symbol):
+        scores = self.scores(symbol)
+        for i, metric in enumerate(METRICS):
+            if symbol not in self.rows:
+                self.neighbors[metric].pop(symbol, None)
+                continue
+            ranked = sorted(scores.items(), key=lambda item: (-item[1][i], item[0]))[:self.k]
+            self.neighbors[metric][symbol] = [(other, score[i]) for other, score in ranked]
+
+    def _affected(self, symbols):
+        """symbols 의 변경으로 이웃 목록이 달라질 수 있는 ETF: 현재 종목을 공유하거나 이전에 이웃이었던 ETF."""
+        affected = set(symbols)
+        for symbol in symbols:
+            for security in self.rows.get(symbol, {}):
+                affected.update(self.holders[security])
+        for metric in METRICS:
+            affected.update(other for other, neighbors in self.neighbors[metric].items()
+                            if any(neighbor in symbols for neighbor, _ in neighbors))
+        return affected
+
+    def update(self, symbol, holdings):
+        """한 ETF 의 편입종목을 바꾸고 이웃 목록을 갱신. 영향을 받은 ETF 수를 반환."""
+        self._set_row(symbol, holdings_weights(holdings))
+        return len(self._apply(symbol)) if self.computed else 0
+
+    def _apply(self, symbol):
+        """이미 바뀐 행(symbol)을 이웃 목록에 반영하고 영향을 받은 ETF 를 반환.
+
+        바뀐 ETF 자신만 전체를 다시 계산하고, 다른 ETF 는 바뀐 ETF 와의 점수 하나만 목록에 반영한다.
+        단, 상위 k 안에 있던 바뀐 ETF 의 점수가 내려가면 k+1 번째 후보를 알 수 없으므로 그 ETF 도 다시 계산.
+        """
+        affected = self._affected({symbol})
+        self._refresh(symbol)
+        scores = self.scores(symbol)
+        for other in affected - {symbol}:
+            for i, metric in enumerate(METRICS):
+                neighbors = self.neighbors[metric].get(other)
+                if neighbors is None:
+                    continue
+                old = dict(neighbors).get(symbol)
+                new = scores[other][i] if other in scores else None
+                if old is not None and len(neighbors) == self.k and (new is None or new < old):
+                    self._refresh(other)
+                    break
+                neighbors = [item for item in neighbors if item[0] != symbol]
+                if new is not None:
+                    neighbors.append((symbol, new))
+                self.neighbors[metric][other] = sorted(neighbors, key=lambda item: (-item[1], item[0]))[:self.k]
+        return affected
+
+    def similar(self, symbol, metric='overlap', limit=None):
+        if not self.computed:
+            self.compute()
+        neighbors = self.neighbors[metric].get(symbol, [])
+        return neighbors[:limit] if limit else neighbors
@@ -0,0 +1,185 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+try:
+    from curl_cffi import requests as curl_requests
+except ImportError:
+    curl_requests = None
+
+# deep_translator, FinanceDataReader 는 requests 를, 최신 yfinance/yahooquery 는 curl_cffi 를 사용하므로
+# 두 라이브러리의 Session 요청 함수를 감싸 원본 응답을 디스크에 저장하고 다시 재생한다.
+#
+#   record  : 항상 네트워크로 요청하고 응답을 저장
+#   replay  : 유효한 저장본이 있으면 재생, 없으면 요청 후 저장
+#   offline : 저장본만 사용 (만료 무시), 없으면 ConnectionError
+MODES = ('record', 'replay', 'offline')
+
+# 세션마다 바뀌어 캐시 키에서 제외할 쿼리 파라미터
+VOLATILE_PARAMS = {'crumb', '_'}
+
+# URL 에 포함된 문자열별 유효 시간(초). None 은 만료 없음, 먼저 일치하는 항목 사용
+DEFAULT_TTLS = (
+    ('translate.google', None),  # 같은 원문의 번역은 바뀌지 않음
+    ('fc.yahoo.com', 3600),
+    ('getcrumb', 3600),
+    ('finance.yahoo.com', 24 * 3600),
+)
+
+_original_requests_send = requests.Session.send
+_original_curl_request = curl_requests.Session.request if curl_requests else None
+_lock = threading.Lock()
+_state = {'cache': None}
+
+
+class HttpCache:
+    def __init__(self, cache_dir, mode='replay', ttls=DEFAULT_TTLS, default_ttl=24 * 3600):
+        if mode not in MODES:
+            raise ValueError(f"mode must be one of {MODES}: {mode}")
+        self.cache_dir = cache_dir
+        self.mode = mode
+        self.ttls = ttls
+        self.default_ttl = default_ttl
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def key(self, method, url, params=None, body=None):
+        parts = urlsplit(url)
+        query = parse_qsl(parts.query, keep_blank_values=True)
+        if params:
+            query += list(params.items() if isinstance(params, dict) else params)
+        query = sorted((str(k), str(v)) for k, v in query if k not in VOLATILE_PARAMS)
+        url = urlunsplit((parts.scheme, parts.netloc, parts.path, urlencode(query), ''))
+        if isinstance(body, (dict, list)):
+            body = json.dumps(body, sort_keys=True)
+        if isinstance(body, str):
+            body = body.encode('utf-8')
+        digest = hashlib.sha256(method.upper().encode() + b' ' + url.encode() + b'\n' + (body or b'')).hexdigest()
+        return url, digest
+
+    def ttl(self, url):
+        for pattern, ttl in self.ttls:
+            if pattern in url:
+                return ttl
+        return self.default_ttl
+
+    def path(self, digest):
+        return os.path.join(self.cache_dir, digest[:2], digest + '.bin')
+
+    def load(self, url, digest):
+        path = self.path(digest)
+        if not os.path.exists(path):
+            return None
+        with open(path, 'rb') as f:
+            meta = json.loads(f.readline())
+            content = f.read()
+        ttl = self.ttl(url)
+        if self.mode != 'offline' and ttl is not None and time.time() - meta['stored_at'] > ttl:
+            return None
+        return meta, content
+
+    def store(self, url, digest, status_code, reason, headers, content):
+        path = self.path(digest)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        meta = {
+            'url': url,
+            'status_code': status_code,
+            'reason': reason,
+            # 저장된 본문은 이미 압축이 풀린 상태
+            'headers': {k: v for k, v in headers.items() if k.lower() not in ('content-encoding', 'content-length')},
+            'stored_at': time.time(),
+        }
+        # 같은 요청을 여러 worker 가 동시에 저장해도 깨진 파일이 남지 않도록 교체 방식으로 저장
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(json.dumps(meta).encode('utf-8') + b'\n')
+            f.write(content)
+        os.replace(tmp_path, path)
+
+    def fetch(self, method, url, params, body, send, build):
+        """저장본이 있으면 build(meta, content) 로 응답을 만들고, 없으면 send() 결과를 저장 후 반환."""
+        key_url, digest = self.key(method, url, params, body)
+        if self.mode != 'record':
+            cached = self.load(key_url, digest)
+            if cached is not None:
+                self.hits += 1
+                return build(*cached)
+            if self.mode == 'offline':
+                self.misses += 1
+                raise requests.ConnectionError(f"Offline cache miss: {method} {key_url}")
+
+        self.misses += 1
+        response = send()
+        # 성공 응답과 없는 종목(404)만 저장. 401/403(crumb 만료 등), 429, 5xx 는 일시적이므로 재생하지 않음
+        if 200 <= response.status_code < 300 or response.status_code == 404:
+            self.store(key_url, digest, response.status_code, response.reason,
+                       dict(response.headers), response.content)
+        return response
+
+
+def _requests_send(session, request, **kwargs):
+    cache = _state['cache']
+    if cache is None:
+        return _original_requests_send(session, request, **kwargs)
+
+    def build(meta, content):
+        response = requests.Response()
+        response.status_code = meta['status_code']
+        response.reason = meta['reason']
+        response.headers = CaseInsensitiveDict(meta['headers'])
+        response._content = content
+        response.url = request.url
+        response.request = request
+        response.encoding = requests.utils.get_encoding_from_headers(response.headers)
+        return response
+
+    return cache.fetch(request.method, request.url, None, request.body,
+                       lambda: _original_requests_send(session, request, **kwargs), build)
+
+
+def _curl_request(session, method, url, params=None, data=None, json=None, **kwargs):
+    cache = _state['cache']
+    if cache is None or kwargs.get('stream'):
+        return _original_curl_request(session, method, url, params=params, data=data, json=json, **kwargs)
+
+    def build(meta, content):
+        response = curl_requests.Response()
+        response.url = meta['url']
+        response.status_code = meta['status_code']
+        response.reason = meta['reason']
+        response.ok = 200 <= meta['status_code'] < 400
+        response.headers = curl_requests.Headers(meta['headers'])
+        response.content = content
+        return response
+
+    return cache.fetch(method, url, params, data if json is None else json,
+                       lambda: _original_curl_request(session, method, url, params=params, data=data,
+                                                      json=json, **kwargs),
+                       build)
+
+
+def install(cache_dir, mode='replay', **kwargs):
+    """프로세스 전체의 HTTP 요청에 캐시를 적용. mode 가 None 이면 아무것도 하지 않는다."""
+    if mode is None:
+        return None
+    with _lock:
+        _state['cache'] = HttpCache(cache_dir, mode, **kwargs)
+        requests.Session.send = _requests_send
+        if curl_requests:
+            curl_requests.Session.request = _curl_request
+    return _state['cache']
+
+
+def uninstall():
+    with _lock:
+        _state['cache'] = None
+        requests.Session.send = _original_requests_send
+        if curl_requests:
+            curl_requests.Session.request = _original_curl_request
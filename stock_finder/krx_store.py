@@ -0,0 +1,246 @@
+import datetime
+import json
+import os
+
+import numpy as np
+
+# KRX 가치 지표 저장소
+#
+#   krx_fundamentals.json : 종목별 재무 지표(BPS/EPS/DPS/ROE/배당수익률)를 회계연도별로 보관
+#   krx_metrics.npz       : 날짜 x 종목 행렬 (종가, PER, PBR, 적정가치, 괴리율(parity), 기대수익률)
+#
+# 재무 지표는 새 회계연도 사업보고서가 나올 때(또는 FUNDAMENTALS_MAX_AGE_DAYS 가 지났을 때)만 다시 가져오고,
+# 매일 실행에서는 새 종가만 추가해 아직 계산하지 않은 칸만 한 번에 계산한다. 각 날짜의 지표는 그 날짜에
+# 공시되어 있던 회계연도(expected_fiscal_period, 아직 없으면 그 이전 중 최신)의 재무 지표로 계산하므로,
+# 처음 실행에서 1년치 종가를 채울 때도 과거 날짜는 당시의 재무 지표를 쓴다 (재무제표에 있는 연도별 값을
+# 모두 저장). 저장된 가장 오래된 회계연도보다 이전 날짜만 가장 오래된 재무 지표로 계산한다.
+# 이미 계산한 칸은 나중에 재무 지표가 바뀌어도 다시 계산하지 않는다.
+FUNDAMENTAL_KEYS = ('BPS', 'EPS', 'DPS', 'ROE', 'Dividend Yield')
+METRICS = ('PER', 'PBR', 'Fair Value', 'Parity', 'Expected Return')
+REQUIRED_RETURN = 0.1  # 요구수익률 (예시)
+FUNDAMENTALS_MAX_AGE_DAYS = 90  # 분기마다 한 번은 다시 확인
+FUNDAMENTALS_FILE = 'krx_fundamentals.json'
+METRICS_FILE = 'krx_metrics.npz'
+
+
+def expected_fiscal_period(day):
+    """day 기준으로 공시되어 있어야 할 최신 연간 회계연도 (사업보고서는 3월 말까지 공시)."""
+    return str(day.year - 1 if (day.month, day.day) >= (4, 1) else day.year - 2)
+
+
+def effective_fiscal_periods(dates):
+    """datetime64[D] 배열의 날짜별 expected_fiscal_period (int 배열)."""
+    years = dates.astype('datetime64[Y]').astype(np.int64) + 1970
+    months = dates.astype('datetime64[M]').astype(np.int64) % 12 + 1
+    return np.where(months >= 4, years - 1, years - 2)
+
+
+def fiscal_period(labels):
+    """재무제표 열/행 이름(연도 또는 '2023/12' 같은 문자열)의 마지막 값에서 회계연도. 알 수 없으면 None."""
+    if not len(labels):
+        return None
+    label = labels[-1]
+    if hasattr(label, 'year'):
+        return str(label.year)
+    text = str(label).strip()
+    return text[:4] if text[:4].isdigit() else None
+
+
+def compute_metrics(close, bps, eps, roe, required_return=REQUIRED_RETURN):
+    """종가 배열과 (브로드캐스트 가능한) 재무 지표 배열로 METRICS 를 계산. ROE 는 비율(0.12 = 12%)."""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        fair_value = np.where(bps != 0, np.round((roe / required_return) * bps, -1), np.nan)
+        return {
+            'PER': np.where(eps != 0, close / eps, np.nan),
+            'PBR': np.where(bps != 0, close / bps, np.nan),
+            'Fair Value': fair_value + np.zeros_like(close),
+            'Parity': np.where(fair_value != 0, close / fair_value, np.nan),
+            'Expected Return': np.where(close != 0, (fair_value - close) / close, np.nan),
+        }
+
+
+class KrxMetricsStore:
+    def __init__(self, directory):
+        self.directory = directory
+        self.fundamentals = {}  # 종목 -> {'name', 'fetched_at', 'periods': {회계연도: {지표: 값}}}
+        self.tickers = []
+        self.dates = np.array([], dtype='datetime64[D]')
+        self.close = np.empty((0, 0))
+        self.metrics = {metric: np.empty((0, 0)) for metric in METRICS}
+        self.computed = np.empty((0, 0), dtype=bool)
+        self._pending = []  # (종목, 날짜 배열, 종가 배열)
+
+    @classmethod
+    def load(cls, directory):
+        store = cls(directory)
+        fundamentals_path = os.path.join(directory, FUNDAMENTALS_FILE)
+        if os.path.exists(fundamentals_path):
+            with open(fundamentals_path, 'r', encoding='utf-8') as f:
+                store.fundamentals = json.load(f)
+        metrics_path = os.path.join(directory, METRICS_FILE)
+        if os.path.exists(metrics_path):
+            with np.load(metrics_path) as data:
+                store.tickers = data['tickers'].tolist()
+                store.dates = data['dates']
+                store.close = data['close']
+                store.computed = data['computed']
+                store.metrics = {metric: data[metric] for metric in METRICS}
+        return store
+
+    def save(self):
+        self.update()
+        os.makedirs(self.directory, exist_ok=True)
+        fundamentals_path = os.path.join(self.directory, FUNDAMENTALS_FILE)
+        with open(fundamentals_path + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump(self.fundamentals, f, ensure_ascii=False, indent=1)
+        os.replace(fundamentals_path + '.tmp', fundamentals_path)
+        metrics_path = os.path.join(self.directory, METRICS_FILE)
+        with open(metrics_path + '.tmp', 'wb') as f:
+            np.savez(f, tickers=np.array(self.tickers, dtype=str), dates=self.dates, close=self.close,
+                     computed=self.computed, **self.metrics)
+        os.replace(metrics_path + '.tmp', metrics_path)
+
+    def column(self, ticker):
+        return self.tickers.index(ticker) if ticker in self.tickers else None
+
+    def last_date(self, ticker):
+        """저장된 마지막 종가 날짜 (datetime.date), 없으면 None."""
+        dates = [dates[-1] for pending, dates, _ in self._pending if pending == ticker and len(dates)]
+        j = self.column(ticker)
+        if j is not None:
+            valid = np.flatnonzero(~np.isnan(self.close[:, j]))
+            if len(valid):
+                dates.append(self.dates[valid[-1]])
+        return max(dates).astype(datetime.date) if dates else None
+
+    def needs_fundamentals(self, ticker, today):
+        entry = self.fundamentals.get(ticker)
+        if not entry or expected_fiscal_period(today) not in entry['periods']:
+            fetched_at = datetime.date.fromisoformat(entry['fetched_at']) if entry else None
+            # 새 회계연도 공시가 아직 없으면 매일 다시 묻지 않도록 일주일 간격으로만 확인
+            return fetched_at is None or (today - fetched_at).days >= 7
+        return (today - datetime.date.fromisoformat(entry['fetched_at'])).days >= FUNDAMENTALS_MAX_AGE_DAYS
+
+    def set_fundamentals(self, ticker, name, period, values, today):
+        """period 는 가져온 재무 지표의 회계연도 (아직 새 공시가 없으면 expected_fiscal_period 보다 이전)."""
+        entry = self.fundamentals.setdefault(ticker, {'periods': {}})
+        entry['name'] = name
+        entry['fetched_at'] = today.isoformat()
+        entry['periods'][period] = {key: float(values[key]) for key in FUNDAMENTAL_KEYS}
+
+    def current_fundamentals(self, ticker):
+        entry = self.fundamentals.get(ticker)
+        if not entry or not entry['periods']:
+            return None
+        return entry['periods'][max(entry['periods'])]
+
+    def add_prices(self, ticker, dates, closes):
+        """새 종가를 쌓아 두고 update() 에서 한 번에 행렬에 반영한다."""
+        self._pending.append((ticker, np.asarray(dates, dtype='datetime64[D]'), np.asarray(closes, dtype=np.float64)))
+
+    def _merge_pending(self):
+        new_tickers = [ticker for ticker in dict.fromkeys(t for t, _, _ in self._pending) if ticker not in self.tickers]
+        dates = np.unique(np.concatenate([self.dates] + [d for _, d, _ in self._pending]))
+        rows = np.searchsorted(dates, self.dates)
+        shape = (len(dates), len(self.tickers) + len(new_tickers))
+
+        def expand(matrix, fill):
+            expanded = np.full(shape, fill, dtype=matrix.dtype)
+            expanded[rows, :matrix.shape[1]] = matrix
+            return expanded
+
+        self.close = expand(self.close, np.nan)
+        self.computed = expand(self.computed, False)
+        self.metrics = {metric: expand(values, np.nan) for metric, values in self.metrics.items()}
+        self.tickers += new_tickers
+        self.dates = dates
+        for ticker, ticker_dates, closes in self._pending:
+            j = self.tickers.index(ticker)
+            rows = np.searchsorted(self.dates, ticker_dates)
+            self.close[rows, j] = closes
+            self.computed[rows, j] = False
+        self._pending = []
+
+    def _fundamentals_for(self, rows, cols):
+        """(행, 열) 칸별 BPS/EPS/ROE 배열. 칸의 날짜에 공시되어 있던 회계연도 기준, 재무 지표가 없으면 nan.
+
+        cols 는 정렬되어 있어야 한다 (종목별로 한 번씩만 회계연도를 찾음).
+        """
+        values = {key: np.full(len(rows), np.nan) for key in ('BPS', 'EPS', 'ROE')}
+        effective = effective_fiscal_periods(self.dates)
+        columns, starts = np.unique(cols, return_index=True)
+        for j, start, end in zip(columns.tolist(), starts.tolist(), np.r_[starts[1:], len(cols)].tolist()):
+            entry = self.fundamentals.get(self.tickers[j])
+            if not entry or not entry['periods']:
+                continue
+            periods = sorted(entry['periods'])
+            years = np.array([int(period) for period in periods])
+            index = np.maximum(np.searchsorted(years, effective[rows[start:end]], side='right') - 1, 0)
+            for key, out in values.items():
+                out[start:end] = np.array([entry['periods'][period][key] for period in periods])[index]
+        return values['BPS'], values['EPS'], values['ROE']
+
+    def update(self):
+        """쌓아 둔 종가를 반영하고, 재무 지표가 있는데 아직 계산하지 않은 칸만 계산. 계산한 칸 수를 반환."""
+        if self._pending:
+            self._merge_pending()
+        # 종목(열) 순으로 칸을 얻기 위해 전치해서 찾음
+        cols, rows = np.nonzero((~self.computed & ~np.isnan(self.close)).T)
+        bps, eps, roe = self._fundamentals_for(rows, cols)
+        known = ~np.isnan(bps)
+        if not known.any():
+            return 0
+        rows, cols, bps, eps, roe = rows[known], cols[known], bps[known], eps[known], roe[known]
+        values = compute_metrics(self.close[rows, cols], bps, eps, roe)
+        for metric, metric_values in values.items():
+            self.metrics[metric][rows, cols] = metric_values
+        self.computed[rows, cols] = True
+        return len(rows)
+
+    def series(self, ticker, days=None):
+        """(날짜 배열, 종가 배열, {지표: 배열}) 최근 days 거래일. 종가가 없는 날은 제외."""
+        j = self.column(ticker)
+        if j is None:
+            raise KeyError(ticker)
+        valid = np.flatnonzero(~np.isnan(self.close[:, j]))
+        if days:
+            valid = valid[-days:]
+        return self.dates[valid], self.close[valid, j], {metric: values[valid, j] for metric, values in self.metrics.items()}
+
+    def parity_trends(self, days):
+        """최근 days 행에서 종목별 parity 의 (시작값, 마지막값, 일별 기울기). 값이 2개 미만이면 nan."""
+        window = self.metrics['Parity'][-days:]
+        valid = ~np.isnan(window)
+        count = valid.sum(axis=0)
+        x = np.arange(len(window), dtype=np.float64)[:, None]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            x_mean = np.where(valid, x, 0).sum(axis=0) / count
+            y_mean = np.where(valid, window, 0).sum(axis=0) / count
+            dx = np.where(valid, x - x_mean, 0)
+            slope = (dx * np.where(valid, window - y_mean, 0)).sum(axis=0) / (dx * dx).sum(axis=0)
+        first_row = np.argmax(valid, axis=0)
+        last_row = len(window) - 1 - np.argmax(valid[::-1], axis=0)
+        columns = np.arange(window.shape[1])
+        first = np.where(count > 0, window[first_row, columns], np.nan)
+        last = np.where(count > 0, window[last_row, columns], np.nan)
+        slope = np.where(count >= 2, slope, np.nan)
+        return first, last, slope
+
+    def latest(self):
+        """종목별 마지막 종가 날짜의 지표 (기존 CSV 결과와 같은 열)."""
+        rows = []
+        for ticker in self.tickers:
+            fundamentals = self.current_fundamentals(ticker)
+            if fundamentals is None:
+                continue
+            dates, closes, metrics = self.series(ticker, 1)
+            if not len(dates):
+                continue
+            row = {'Current Price': closes[0]}
+            row.update(fundamentals)
+            row.update({metric: values[0] for metric, values in metrics.items()})
+            row['Symbol'] = ticker
+            row['Name'] = self.fundamentals[ticker].get('name', '')
+            row['Date'] = str(dates[0])
+            rows.append(row)
+        return rows
@@ -0,0 +1,171 @@
+import collections
+import contextlib
+import heapq
+import http.server
+import json
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+def _percentile(sorted_values, p):
+    if not sorted_values:
+        return None
+    return sorted_values[min(len(sorted_values) - 1, int(round(p / 100 * (len(sorted_values) - 1))))]
+
+
+class Metrics:
+    """종목/단계별 소요 시간, 재시도, 오류 종류를 모아 처리량과 ETA 를 JSON 으로 내보낸다.
+
+    filename 에 주기적으로 스냅샷을 쓰고, port 를 지정하면 http://127.0.0.1:port/ 에서도 제공한다.
+    종목별 로그는 sample_every 개마다 하나씩만 JSON 한 줄로 남긴다.
+    """
+
+    def __init__(self, filename='metrics.json', port=None, window=60, top_n=10,
+                 write_interval=5, sample_every=50):
+        self.filename = filename
+        self.port = port
+        self.window = window
+        self.top_n = top_n
+        self.write_interval = write_interval
+        self.sample_every = sample_every
+        self.total = 0
+        self.done = 0
+        self.failed = 0
+        self.retries = collections.Counter()  # endpoint -> 재시도 횟수
+        self.symbol_retries = collections.Counter()
+        self.started_at = time.time()
+        self.stage_durations = collections.defaultdict(list)
+        self.symbol_stages = collections.defaultdict(dict)
+        self.errors = collections.Counter()
+        self._completions = collections.deque()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._writer = None
+        self._server = None
+
+    def start(self, total):
+        self.total = total
+        self.started_at = time.time()
+        if self.filename:
+            self._writer = threading.Thread(target=self._write_loop, daemon=True)
+            self._writer.start()
+        if self.port:
+            self._serve()
+
+    @contextlib.contextmanager
+    def stage(self, symbol, name):
+        """with metrics.stage(symbol, 'translate'): ... 블록의 소요 시간을 기록."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                self.stage_durations[name].append(elapsed)
+                stages = self.symbol_stages[symbol]
+                stages[name] = stages.get(name, 0.0) + elapsed
+
+    def record_error(self, symbol, endpoint, error, final):
+        with self._lock:
+            self.errors[f"{endpoint}:{type(error).__name__}"] += 1
+            if not final:
+                self.retries[endpoint] += 1
+                self.symbol_retries[symbol] += 1
+
+    def symbol_done(self, symbol, ok=True):
+        now = time.time()
+        with self._lock:
+            self.done += 1
+            if not ok:
+                self.failed += 1
+            self._completions.append(now)
+            sampled = self.done % self.sample_every == 0
+            stages = {name: round(seconds, 3) for name, seconds in self.symbol_stages.get(symbol, {}).items()}
+        if sampled:
+            logger.info(json.dumps({'event': 'symbol_done', 'symbol': symbol, 'ok': ok, 'done': self.done,
+                                    'total': self.total, 'stages': stages}, ensure_ascii=False))
+
+    def snapshot(self):
+        now = time.time()
+        with self._lock:
+            while self._completions and self._completions[0] < now - self.window:
+                self._completions.popleft()
+            window = min(self.window, max(now - self.started_at, 1e-9))
+            rate = len(self._completions) / window
+            remaining = max(self.total - self.done, 0)
+            stages = {}
+            for name, durations in self.stage_durations.items():
+                durations = sorted(durations)
+                stages[name] = {
+                    'count': len(durations),
+                    'total_s': round(sum(durations), 3),
+                    'p50_ms': round(_percentile(durations, 50) * 1000, 1),
+                    'p99_ms': round(_percentile(durations, 99) * 1000, 1),
+                    'max_ms': round(durations[-1] * 1000, 1),
+                }
+            slowest = heapq.nlargest(self.top_n, self.symbol_stages.items(), key=lambda item: sum(item[1].values()))
+            return {
+                'updated_at': time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(now)),
+                'elapsed_s': round(now - self.started_at, 1),
+                'total': self.total,
+                'done': self.done,
+                'failed': self.failed,
+                'retries': sum(self.retries.values()),
+                'retries_by_endpoint': dict(self.retries.most_common()),
+                'most_retried': [{'symbol': symbol, 'retries': count}
+                                 for symbol, count in self.symbol_retries.most_common(self.top_n)],
+                'symbols_per_sec': round(rate, 2),
+                'eta_s': round(remaining / rate, 1) if rate else None,
+                'stages': stages,
+                'errors': dict(self.errors.most_common()),
+                'slowest': [{'symbol': symbol, 'total_s': round(sum(s.values()), 3),
+                             'stages': {name: round(seconds, 3) for name, seconds in s.items()}}
+                            for symbol, s in slowest],
+            }
+
+    def write(self):
+        snapshot = self.snapshot()
+        tmp_filename = self.filename + '.tmp'
+        with open(tmp_filename, 'w', encoding='utf-8') as f:
+            json.dump(snapshot, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_filename, self.filename)
+        return snapshot
+
+    def _write_loop(self):
+        while not self._stop.wait(self.write_interval):
+            snapshot = self.write()
+            logger.info(json.dumps({'event': 'progress', 'done': snapshot['done'], 'total': snapshot['total'],
+                                    'symbols_per_sec': snapshot['symbols_per_sec'], 'eta_s': snapshot['eta_s'],
+                                    'retries': snapshot['retries'], 'failed': snapshot['failed']}))
+
+    def _serve(self):
+        metrics = self
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+            def do_GET(self):
+                body = json.dumps(metrics.snapshot(), ensure_ascii=False).encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = http.server.ThreadingHTTPServer(('127.0.0.1', self.port), Handler)
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        logger.info(f"Serving metrics on http://127.0.0.1:{self.port}/")
+
+    def stop(self):
+        self._stop.set()
+        if self._writer is not None:
+            self._writer.join()
+        if self.filename:
+            self.write()
+        if self._server is not None:
+            self._server.shutdown()
@@ -0,0 +1,75 @@
+import os
+import shutil
+
+
+class StreamingTextFile:
+    """기록을 하나씩 임시 파일에 쓰고, 마지막에 최종 파일 이름으로 원자적으로 교체한다."""
+
+    def __init__(self, filename, render, separator=''):
+        self.tmp_filename = filename + '.tmp'
+        self.render = render
+        self.separator = separator
+        self.count = 0
+        os.makedirs(os.path.dirname(filename) or '.', exist_ok=True)
+        self._file = open(self.tmp_filename, 'w', encoding='utf-8')
+
+    def write(self, record):
+        if self.count:
+            self._file.write(self.separator)
+        self._file.write(self.render(record))
+        self.count += 1
+
+    def snapshot(self, filename):
+        # 중간 결과 저장: 지금까지 쓴 내용을 그대로 복사
+        self._file.flush()
+        shutil.copyfile(self.tmp_filename, filename)
+
+    def commit(self, filename):
+        self._file.close()
+        os.replace(self.tmp_filename, filename)
+
+
+class OrderedWriter:
+    """완료 순서와 무관하게 기록을 universe(symbols) 순서대로 내보낸다.
+
+    버퍼에는 종목별 완료 여부만 두고, 기록 내용은 쓸 차례가 되었을 때 records(진행 상황 저장소)에서
+    읽는다. 재시작 시 이미 저장된 종목을 모두 put() 해도 앞 종목을 기다리는 동안 기록을 메모리에
+    들고 있지 않는다. admits() 로 작업 시작을 next_index + window 이내로 제한한다.
+    """
+
+    def __init__(self, symbols, window, sinks, records, on_written=None):
+        self.symbols = symbols
+        self.index = {symbol: i for i, symbol in enumerate(symbols)}
+        self.window = window
+        self.sinks = sinks
+        self.records = records
+        self.on_written = on_written  # 기록 하나를 쓸 때마다 누적 개수로 호출 (중간 저장용)
+        self.next_index = 0
+        self.written = 0
+        self._buffer = {}  # 위치 -> 출력 여부
+
+    def admits(self, symbol):
+        return self.index[symbol] < self.next_index + self.window
+
+    def put(self, symbol, ok=True):
+        """종목 처리 완료 표시. ok 면 records[symbol] 을 순서가 되었을 때 쓰고, 아니면 출력 없이 건너뛴다."""
+        self._buffer[self.index[symbol]] = ok
+        while self.next_index in self._buffer:
+            if self._buffer.pop(self.next_index):
+                self._emit(self.symbols[self.next_index])
+            self.next_index += 1
+
+    def _emit(self, symbol):
+        record = self.records[symbol]
+        for sink in self.sinks:
+            sink.write(record)
+        self.written += 1
+        if self.on_written:
+            self.on_written(self.written)
+
+    def close(self):
+        # 예산 소진 등으로 오지 않은 종목은 건너뛰고 남은 기록을 순서대로 내보냄
+        for i in sorted(self._buffer):
+            if self._buffer[i]:
+                self._emit(self.symbols[i])
+        self._buffer.clear()
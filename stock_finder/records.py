@@ -0,0 +1,336 @@
+import hashlib
+import json
+import math
+import mmap
+import os
+import struct
+
+# 진행 상황(progress) 저장용 바이너리 기록 형식
+#
+#   파일 = MAGIC + 기록*
+#   기록 = u32 길이 + u16 심볼 길이 + 심볼(utf-8) + 값
+#
+# 기록은 뒤에 추가만 하고, 같은 심볼이 다시 나오면 마지막 기록이 유효하다.
+# 열 때는 길이만 읽어 심볼 -> 위치 색인을 만들고, 값은 접근할 때 mmap 에서 해석한다.
+#
+# 값은 태그 + 내용. 재무 항목(financials)은 숫자 배열(f)로 저장하고, 그것을 담지 않은 dict/list 는
+# 통째로 JSON(j) 으로 저장한다. 파이썬으로 태그를 하나씩 해석하는 것보다 json.loads(C 구현)가
+# 2배 정도 빨라서, 재시작 시 모든 기록을 읽는 비용이 JSON 파일을 읽는 것과 비슷해진다.
+MAGIC = b'SFR1'
+
+_U8 = struct.Struct('<B')
+_U16 = struct.Struct('<H')
+_U32 = struct.Struct('<I')
+_I64 = struct.Struct('<q')
+_F64 = struct.Struct('<d')
+
+# 자주 쓰는 키는 1바이트 번호로 저장 (순서를 바꾸면 기존 파일을 읽을 수 없으므로 뒤에만 추가)
+KEYS = (
+    'info', 'symbol', 'longName', 'sector', 'industry', 'category', 'longBusinessSummary',
+    'financials', 'top_holdings', 'name', 'percent',
+    '매출액', '영업이익', '순이익', 'EBITDA', '총자산', '총부채', '총자본', '유동자산', '유동부채',
+    '영업활동현금흐름', '투자활동현금흐름', '재무활동현금흐름', '잉여현금흐름', '현금및현금성자산',
+    '부채비율', '유동비율',
+    'originalSummary',
+)
+_KEY_INDEX = {key: i for i, key in enumerate(KEYS)}
+
+
+def parse_financial_value(text):
+    """'1,234.56' 형식 문자열을 숫자로. 빈 문자열은 nan."""
+    return float(text.replace(',', '')) if text else math.nan
+
+
+def format_financial_value(value):
+    return "" if math.isnan(value) else f"{value:,.2f}"
+
+
+def _numeric_financials(financials):
+    # 모든 값이 숫자로 바꿨다 되돌려도 같은 문자열이면 숫자 배열로 저장
+    if not isinstance(financials, dict) or any(key not in _KEY_INDEX for key in financials):
+        return None
+    values = []
+    for text in financials.values():
+        if not isinstance(text, str):
+            return None
+        try:
+            value = parse_financial_value(text)
+        except ValueError:
+            return None
+        if format_financial_value(value) != text:
+            return None
+        values.append(value)
+    return values
+
+
+def _has_packed_financials(value):
+    """value 안에 숫자 배열로 저장할 financials 가 있으면 True (그 경로만 태그 형식으로 저장)."""
+    if isinstance(value, dict):
+        if _numeric_financials(value.get('financials')) is not None:
+            return True
+        return any(_has_packed_financials(item) for item in value.values())
+    if isinstance(value, (list, tuple)):
+        return any(_has_packed_financials(item) for item in value)
+    return False
+
+
+def _encode_str(text, out):
+    data = text.encode('utf-8')
+    out += _U32.pack(len(data))
+    out += data
+
+
+def _encode_key(key, out):
+    index = _KEY_INDEX.get(key)
+    if index is not None:
+        out += b'k' + _U8.pack(index)
+    else:
+        out += b's'
+        _encode_str(key, out)
+
+
+def encode_value(value, out):
+    if value is None:
+        out += b'N'
+    elif value is True:
+        out += b'T'
+    elif value is False:
+        out += b'F'
+    elif isinstance(value, int):
+        out += b'i' + _I64.pack(value)
+    elif isinstance(value, float):
+        out += b'd' + _F64.pack(value)
+    elif isinstance(value, str):
+        out += b's'
+        _encode_str(value, out)
+    elif isinstance(value, (list, tuple, dict)) and not _has_packed_financials(value):
+        out += b'j'
+        _encode_str(json.dumps(value, ensure_ascii=False, separators=(',', ':')), out)
+    elif isinstance(value, (list, tuple)):
+        out += b'l' + _U32.pack(len(value))
+        for item in value:
+            encode_value(item, out)
+    elif isinstance(value, dict):
+        out += b'm' + _U32.pack(len(value))
+        for key, item in value.items():
+            _encode_key(key, out)
+            if key == 'financials':
+                numbers = _numeric_financials(item)
+                if numbers is not None:
+                    out += b'f' + _U8.pack(len(numbers))
+                    for name, number in zip(item, numbers):
+                        out += _U8.pack(_KEY_INDEX[name]) + _F64.pack(number)
+                    continue
+            encode_value(item, out)
+    else:
+        raise TypeError(f"Cannot encode {type(value).__name__}")
+    return out
+
+
+_unpack_u32 = _U32.unpack_from
+_unpack_i64 = _I64.unpack_from
+_unpack_f64 = _F64.unpack_from
+_TAG_STR, _TAG_KEY, _TAG_MAP, _TAG_LIST, _TAG_FINANCIALS, _TAG_JSON = b'skmlfj'
+_TAG_FLOAT, _TAG_INT, _TAG_NONE, _TAG_TRUE, _TAG_FALSE = b'diNTF'
+
+
+def decode_value(buf, pos):
+    """buf[pos:] 에서 값 하나를 읽어 (값, 다음 위치) 를 반환."""
+    # 재시작 시 모든 기록을 읽으므로 자주 나오는 태그부터 비교
+    tag = buf[pos]
+    pos += 1
+    if tag == _TAG_STR:
+        length = _unpack_u32(buf, pos)[0]
+        pos += 4
+        return str(buf[pos:pos + length], 'utf-8'), pos + length
+    if tag == _TAG_JSON:
+        length = _unpack_u32(buf, pos)[0]
+        pos += 4
+        return json.loads(buf[pos:pos + length]), pos + length
+    if tag == _TAG_MAP:
+        count = _unpack_u32(buf, pos)[0]
+        pos += 4
+        result = {}
+        for _ in range(count):
+            if buf[pos] == _TAG_KEY:
+                key = KEYS[buf[pos + 1]]
+                pos += 2
+            else:
+                key, pos = decode_value(buf, pos)
+            result[key], pos = decode_value(buf, pos)
+        return result, pos
+    if tag == _TAG_LIST:
+        count = _unpack_u32(buf, pos)[0]
+        pos += 4
+        result = []
+        for _ in range(count):
+            item, pos = decode_value(buf, pos)
+            result.append(item)
+        return result, pos
+    if tag == _TAG_FINANCIALS:
+        count = buf[pos]
+        pos += 1
+        result = {}
+        for _ in range(count):
+            result[KEYS[buf[pos]]] = format_financial_value(_unpack_f64(buf, pos + 1)[0])
+            pos += 9
+        return result, pos
+    if tag == _TAG_KEY:
+        return KEYS[buf[pos]], pos + 1
+    if tag == _TAG_FLOAT:
+        return _unpack_f64(buf, pos)[0], pos + 8
+    if tag == _TAG_INT:
+        return _unpack_i64(buf, pos)[0], pos + 8
+    if tag == _TAG_NONE:
+        return None, pos
+    if tag == _TAG_TRUE:
+        return True, pos
+    if tag == _TAG_FALSE:
+        return False, pos
+    raise ValueError(f"Unknown tag {tag!r} at {pos - 1}")
+
+
+def encode_record(symbol, value):
+    out = bytearray()
+    symbol_bytes = symbol.encode('utf-8')
+    out += _U16.pack(len(symbol_bytes)) + symbol_bytes
+    encode_value(value, out)
+    return _U32.pack(len(out)) + out
+
+
+class RecordStore:
+    """progress.json 을 대체하는 추가 전용 바이너리 저장소. dict 처럼 사용한다.
+
+    종목 하나를 저장할 때 파일 전체를 다시 쓰지 않고 기록 하나만 덧붙이며,
+    값은 필요할 때만 해석하므로 시작 시간과 메모리 사용량이 종목 수에 거의 비례하지 않는다.
+
+    readonly=True 이면 쓰기 핸들 없이 mmap 으로만 연다. 수집 중인 파일을 검색/질의 서비스가 열어도
+    마지막에 쓰는 중인 기록을 잘라내지 않고, 완전히 쓰인 기록까지만 색인한다.
+    """
+
+    def __init__(self, filename, legacy_json=None, readonly=False):
+        self.filename = filename
+        self.readonly = readonly
+        self._offsets = {}
+        self._file = None
+        self._mmap = None
+        self._mapped_size = 0
+        if readonly:
+            self._build_index()
+        elif not os.path.exists(filename):
+            with open(filename, 'wb') as f:
+                f.write(MAGIC)
+            self._file = open(filename, 'ab')
+            # 기존 JSON 진행 상황이 있으면 한 번만 변환
+            if legacy_json and os.path.exists(legacy_json):
+                with open(legacy_json, 'r') as f:
+                    for symbol, value in json.load(f).items():
+                        self[symbol] = value
+        else:
+            self._build_index()
+            self._file = open(filename, 'ab')
+
+    def _remap(self):
+        if self._file is not None:
+            self._file.flush()
+        size = os.path.getsize(self.filename)
+        if size == self._mapped_size:
+            return
+        if self._mmap is not None:
+            self._mmap.close()
+        with open(self.filename, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._mapped_size = size
+
+    def _build_index(self):
+        self._remap()
+        buf = self._mmap
+        if buf[:4] != MAGIC:
+            raise ValueError(f"{self.filename} is not a record file")
+        pos = 4
+        end = len(buf)
+        while pos + 4 <= end:
+            (length,) = _U32.unpack_from(buf, pos)
+            if pos + 4 + length > end:
+                break
+            (symbol_length,) = _U16.unpack_from(buf, pos + 4)
+            symbol = str(buf[pos + 6:pos + 6 + symbol_length], 'utf-8')
+            self._offsets[symbol] = (pos + 6 + symbol_length, pos + 4 + length)
+            pos += 4 + length
+        if pos < end and not self.readonly:
+            # 마지막 기록을 쓰다가 중단된 경우 잘라내고 이어서 추가
+            self._mmap.close()
+            self._mmap = None
+            self._mapped_size = 0
+            os.truncate(self.filename, pos)
+            self._remap()
+
+    def __contains__(self, symbol):
+        return symbol in self._offsets
+
+    def __len__(self):
+        return len(self._offsets)
+
+    def __iter__(self):
+        return iter(self._offsets)
+
+    def keys(self):
+        return self._offsets.keys()
+
+    def get(self, symbol, default=None):
+        return self[symbol] if symbol in self._offsets else default
+
+    def items(self):
+        for symbol in self._offsets:
+            yield symbol, self[symbol]
+
+    def _value_bytes(self, symbol):
+        start, end = self._offsets[symbol]
+        if end > self._mapped_size:
+            self._remap()
+        return self._mmap[start:end]
+
+    def __getitem__(self, symbol):
+        # 기록을 bytes 로 한 번 복사한 뒤 해석 (mmap 에서 한 바이트씩 읽는 것보다 빠름)
+        return decode_value(self._value_bytes(symbol), 0)[0]
+
+    def digest(self, symbol):
+        """기록 내용의 해시 (값을 해석하지 않고 저장된 바이트로 계산). 내용이 같으면 실행이 달라도 같다."""
+        return hashlib.blake2b(self._value_bytes(symbol), digest_size=16).hexdigest()
+
+    def _check_writable(self):
+        if self.readonly:
+            raise ValueError(f"{self.filename} is opened read-only")
+
+    def __setitem__(self, symbol, value):
+        self._check_writable()
+        record = encode_record(symbol, value)
+        start = self._file.tell()
+        self._file.write(record)
+        self._file.flush()  # 종목 단위 체크포인트
+        self._offsets[symbol] = (start + 6 + len(symbol.encode('utf-8')), start + len(record))
+
+    def flush(self):
+        if self._file is not None:
+            self._file.flush()
+
+    def compact(self):
+        """덮어쓴 이전 기록을 제거하고 파일을 다시 쓴다."""
+        self._check_writable()
+        tmp_filename = self.filename + '.tmp'
+        with open(tmp_filename, 'wb') as f:
+            f.write(MAGIC)
+            for symbol, value in self.items():
+                f.write(encode_record(symbol, value))
+        self.close()
+        os.replace(tmp_filename, self.filename)
+        self.__init__(self.filename)
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+        self._mapped_size = 0
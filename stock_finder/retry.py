@@ -0,0 +1,148 @@
+import collections
+import concurrent.futures
+import heapq
+import itertools
+import json
+import logging
+import os
+import random
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class _Task:
+    __slots__ = ('symbol', 'endpoint', 'fn', 'args', 'attempts', 'error')
+
+    def __init__(self, symbol, endpoint, fn, args):
+        self.symbol = symbol
+        self.endpoint = endpoint
+        self.fn = fn
+        self.args = args
+        self.attempts = 0
+        self.error = None
+
+
+class RetryScheduler:
+    """(symbol, endpoint) 작업을 executor 에 넣고, 실패한 작업은 시간순 지연 재시도 큐로 보낸다.
+
+    worker 안에서 sleep 하지 않으므로 재시도를 기다리는 동안에도 worker 는 다음 작업을 바로 처리한다.
+    작업 함수는 1회만 시도하고 실패 시 예외를 던져야 한다.
+    """
+
+    def __init__(self, executor, max_in_flight, max_retries=3, retry_delay=(5, 10), budget=None, gate=None, metrics=None):
+        self.executor = executor
+        self.max_in_flight = max_in_flight
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self.budget = budget
+        self.gate = gate  # gate(symbol) 이 False 면 새 작업 시작을 보류 (예: OrderedWriter.admits)
+        self.metrics = metrics
+        self.retry_count = 0
+        self.dead_letters = []
+        self.skipped = []
+        self.attempted = set()
+        self._new = collections.deque()
+        self._delayed = []  # (재시도 가능 시각, 순번, 작업) 힙
+        self._seq = itertools.count()
+        self._in_flight = {}
+
+    def add(self, symbol, endpoint, fn, *args, follow_up=False):
+        """새 작업 추가. follow_up 작업(이미 시작한 종목의 후속 요청)은 예산과 무관하게 먼저 처리."""
+        task = _Task(symbol, endpoint, fn, args)
+        if follow_up:
+            task.attempts = -1  # 예산 확인을 건너뛰기 위한 표시
+            self._new.appendleft(task)
+        else:
+            self._new.append(task)
+
+    def _next_task(self, now):
+        if self._delayed and self._delayed[0][0] <= now:
+            return heapq.heappop(self._delayed)[2]
+        while self._new:
+            task = self._new.popleft()
+            if task.attempts == -1:
+                task.attempts = 0
+                return task
+            # 처리 중인 작업이 하나도 없으면 보류하지 않음 (대기만 하다 멈추는 것을 방지)
+            if self.gate is not None and not self.gate(task.symbol) and (self._in_flight or self._delayed):
+                self._new.appendleft(task)
+                return None
+            if self.budget is None or self.budget.acquire():
+                return task
+            # 예산 소진: 아직 시작하지 않은 작업은 모두 건너뜀 (후속 작업은 계속 처리)
+            self.skipped.append(task)
+            follow_ups = [t for t in self._new if t.attempts == -1]
+            self.skipped.extend(t for t in self._new if t.attempts != -1)
+            self._new = collections.deque(follow_ups)
+        return None
+
+    def _dispatch(self):
+        now = time.monotonic()
+        while len(self._in_flight) < self.max_in_flight:
+            task = self._next_task(now)
+            if task is None:
+                break
+            task.attempts += 1
+            self.attempted.add(task.symbol)
+            self._in_flight[self.executor.submit(task.fn, *task.args)] = task
+
+    def run(self):
+        """완료되는 대로 (symbol, endpoint, result) 를 반환. 최종 실패한 작업의 result 는 None."""
+        while self._new or self._delayed or self._in_flight:
+            self._dispatch()
+            timeout = max(0.0, self._delayed[0][0] - time.monotonic()) if self._delayed else None
+            if not self._in_flight:
+                if timeout is not None:
+                    time.sleep(timeout)
+                continue
+
+            done, _ = concurrent.futures.wait(self._in_flight, timeout=timeout,
+                                              return_when=concurrent.futures.FIRST_COMPLETED)
+            for future in done:
+                task = self._in_flight.pop(future)
+                try:
+                    result = future.result()
+                except Exception as e:
+                    task.error = f"{type(e).__name__}: {e}"
+                    if self.metrics is not None:
+                        self.metrics.record_error(task.symbol, task.endpoint, e, task.attempts >= self.max_retries)
+                    logger.error(f"Error fetching {task.endpoint} for {task.symbol} "
+                                 f"(attempt {task.attempts}/{self.max_retries}): {e}")
+                    if task.attempts < self.max_retries:
+                        self.retry_count += 1
+                        ready_at = time.monotonic() + random.uniform(*self.retry_delay)
+                        heapq.heappush(self._delayed, (ready_at, next(self._seq), task))
+                        continue
+                    logger.error(f"Max retries reached for {task.symbol} ({task.endpoint})")
+                    self.dead_letters.append({
+                        'symbol': task.symbol,
+                        'endpoint': task.endpoint,
+                        'attempts': task.attempts,
+                        'error': task.error,
+                        'failed_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+                    })
+                    yield task.symbol, task.endpoint, None
+                    continue
+                yield task.symbol, task.endpoint, result
+
+
+def load_dead_letters(filename):
+    """최종 실패 기록(JSON lines)을 읽는다. 파일이 없으면 빈 리스트."""
+    if not os.path.exists(filename):
+        return []
+    with open(filename, 'r', encoding='utf-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def save_dead_letters(dead_letters, filename):
+    with open(filename, 'w', encoding='utf-8') as f:
+        for entry in dead_letters:
+            f.write(json.dumps(entry, ensure_ascii=False) + '\n')
+
+
+def merge_dead_letters(filename, scheduler):
+    """이번 실행에서 시도하지 않은 종목의 기존 실패 기록은 유지하고, 새 실패 기록으로 갱신."""
+    previous = [d for d in load_dead_letters(filename) if d['symbol'] not in scheduler.attempted]
+    save_dead_letters(previous + scheduler.dead_letters, filename)
+    return len(previous) + len(scheduler.dead_letters)
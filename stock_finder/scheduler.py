@@ -0,0 +1,67 @@
+import threading
+import time
+
+# 시가총액/자산 규모 단위 (stockanalysis.com 목록 파일 기준)
+_CAP_UNITS = {'K': 1e3, 'M': 1e6, 'B': 1e9, 'T': 1e12}
+
+
+def parse_market_cap(text):
+    """'1,077.76B', '$22.55M' 같은 문자열을 숫자로 변환. 값이 없거나 알 수 없는 형식이면 0."""
+    text = text.strip().replace(',', '').lstrip('$')
+    if not text or text == '-':
+        return 0.0
+    multiplier = _CAP_UNITS.get(text[-1].upper())
+    try:
+        if multiplier:
+            return float(text[:-1]) * multiplier
+        return float(text)
+    except ValueError:
+        return 0.0
+
+
+def load_market_caps(list_filename):
+    """목록 파일(Symbol ... Market Cap/Assets)에서 {symbol: 규모} 딕셔너리를 만든다."""
+    caps = {}
+    with open(list_filename, 'r') as file:
+        next(file)  # 헤더 건너뛰기
+        for line in file:
+            fields = line.rstrip('\n').split('\t')
+            symbol = fields[0].strip()
+            if symbol:
+                # 이름 열이 비어 있는 줄이 있어 마지막 열을 규모로 사용
+                caps[symbol] = parse_market_cap(fields[-1])
+    return caps
+
+
+def prioritize_symbols(symbols, market_caps):
+    """규모가 큰 종목부터 처리하도록 정렬. 규모가 같으면 기존 순서 유지."""
+    return sorted(symbols, key=lambda symbol: -market_caps.get(symbol, 0.0))
+
+
+class RunBudget:
+    """실행 시간(초) 또는 신규 요청 수 제한. None 이면 제한 없음."""
+
+    def __init__(self, max_seconds=None, max_requests=None):
+        self.max_seconds = max_seconds
+        self.max_requests = max_requests
+        self.started_at = time.monotonic()
+        self.requests = 0
+        self.exhausted = False
+        self._lock = threading.Lock()
+
+    def elapsed(self):
+        return time.monotonic() - self.started_at
+
+    def acquire(self):
+        """신규 요청 1건을 시작해도 되면 True. 예산이 소진되면 이후 계속 False."""
+        with self._lock:
+            if self.exhausted:
+                return False
+            if self.max_seconds is not None and self.elapsed() >= self.max_seconds:
+                self.exhausted = True
+                return False
+            if self.max_requests is not None and self.requests >= self.max_requests:
+                self.exhausted = True
+                return False
+            self.requests += 1
+            return True
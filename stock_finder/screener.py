@@ -0,0 +1,302 @@
+import ast
+import collections
+import operator
+import threading
+
+import numpy as np
+
+from stock_finder.records import parse_financial_value
+
+# 주식 스크리너: 재무 항목을 종목 순서의 numpy 열로 모아 두고, 조건식을 한 번 해석해
+# 열 전체에 대한 boolean mask 연산으로 바꿔 실행한다.
+#
+#   부채비율 < 50 and 잉여현금흐름 > 0 and sector == "Technology"
+#   영업이익 / 매출액 > 0.2 and not (industry in ["Banks", "Insurance"])
+#
+# 조건식은 파이썬 식 문법(and/or/not, 비교, + - * /, 괄호, in [...])만 허용한다.
+# 값이 없는 재무 항목(원래 0 이거나 수집 실패)은 nan 이고, nan 을 읽는 비교는 '알 수 없음' 으로 다룬다
+# (SQL 의 NULL 과 같음). != 나 not 을 써도 값이 없는 종목은 조건에 맞지 않는다.
+FINANCIAL_KEYS = (
+    '매출액', '영업이익', '순이익', 'EBITDA', '총자산', '총부채', '총자본', '유동자산', '유동부채',
+    '영업활동현금흐름', '투자활동현금흐름', '재무활동현금흐름', '잉여현금흐름', '현금및현금성자산',
+    '부채비율', '유동비율',
+)
+TEXT_KEYS = ('symbol', 'longName', 'sector', 'industry', 'category')
+EXPRESSION_CACHE_SIZE = 256  # 해석해 둘 조건식/정렬식 수 (질의 서비스에서는 클라이언트가 보낸 식이 키가 됨)
+
+_COMPARE = {
+    ast.Lt: operator.lt, ast.LtE: operator.le, ast.Gt: operator.gt, ast.GtE: operator.ge,
+    ast.Eq: operator.eq, ast.NotEq: operator.ne,
+}
+_ARITHMETIC = {ast.Add: operator.add, ast.Sub: operator.sub, ast.Mult: operator.mul, ast.Div: operator.truediv}
+
+
+class StockTable:
+    """종목별 기록을 열 단위로 저장. 숫자 열은 float64, 문자열 열은 (코드 배열, 값 목록)."""
+
+    def __init__(self, symbols, numeric, text):
+        self.symbols = symbols
+        self.numeric = numeric  # 항목 -> float64 배열
+        self.text = text  # 항목 -> (int32 코드 배열, 값 목록)
+
+    def __len__(self):
+        return len(self.symbols)
+
+    @classmethod
+    def from_records(cls, records):
+        symbols = list(records)
+        numeric = {key: np.full(len(symbols), np.nan) for key in FINANCIAL_KEYS}
+        values = {key: [] for key in TEXT_KEYS}
+        for i, symbol in enumerate(symbols):
+            info = records[symbol].get('info', {})
+            for key, text in info.get('financials', {}).items():
+                if key in numeric:
+                    try:
+                        numeric[key][i] = parse_financial_value(text)
+                    except ValueError:
+                        pass
+            for key in TEXT_KEYS:
+                values[key].append(str(info.get(key) or ''))
+        text = {}
+        for key, column in values.items():
+            categories, codes = np.unique(np.array(column, dtype=object), return_inverse=True)
+            text[key] = (codes.astype(np.int32), categories.tolist())
+        return cls(symbols, numeric, text)
+
+    def column(self, key):
+        if key in self.numeric:
+            return self.numeric[key]
+        if key in self.text:
+            codes, categories = self.text[key]
+            return np.array(categories, dtype=object)[codes]
+        raise KeyError(key)
+
+
+def _compile_condition(node, columns):
+    """조건 ast 노드 -> table 을 받아 (참인 종목 mask, 참/거짓을 아는 종목 mask) 를 반환하는 함수.
+
+    and/or/not 은 3값 논리: 알 수 없는 종목은 not 을 해도 참이 되지 않는다.
+    """
+    if isinstance(node, ast.BoolOp):
+        parts = [_compile_condition(value, columns) for value in node.values]
+        is_and = isinstance(node.op, ast.And)
+
+        def boolean(table):
+            results = [part(table) for part in parts]
+            trues = [true for true, _ in results]
+            falses = [known & ~true for true, known in results]
+            if is_and:
+                true, false = np.logical_and.reduce(trues), np.logical_or.reduce(falses)
+            else:
+                true, false = np.logical_or.reduce(trues), np.logical_and.reduce(falses)
+            return true, true | false
+        return boolean
+
+    if isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.Not):
+        inner = _compile_condition(node.operand, columns)
+
+        def negate(table):
+            true, known = inner(table)
+            return known & ~true, known
+        return negate
+
+    if isinstance(node, ast.Compare):
+        comparisons = []
+        left = node.left
+        for op, right in zip(node.ops, node.comparators):
+            comparisons.append(_compile_compare(left, op, right, columns))
+            left = right
+        if len(comparisons) == 1:
+            return comparisons[0]
+
+        def chain(table):
+            results = [compare(table) for compare in comparisons]
+            true = np.logical_and.reduce([true for true, _ in results])
+            false = np.logical_or.reduce([known & ~true for true, known in results])
+            return true, true | false
+        return chain
+
+    raise ValueError(f"Expected a condition: {ast.unparse(node)}")
+
+
+def _compile(node, columns):
+    """숫자 ast 노드 -> table 을 받아 numpy 배열(또는 상수)을 반환하는 함수."""
+    if isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.USub):
+        inner = _compile_number(node.operand, columns)
+        return lambda table: -inner(table)
+
+    if isinstance(node, ast.BinOp) and type(node.op) in _ARITHMETIC:
+        function = _ARITHMETIC[type(node.op)]
+        left, right = _compile_number(node.left, columns), _compile_number(node.right, columns)
+
+        def arithmetic(table):
+            with np.errstate(divide='ignore', invalid='ignore'):
+                return function(left(table), right(table))
+        return arithmetic
+
+    if isinstance(node, ast.Name):
+        if node.id in FINANCIAL_KEYS:
+            columns.add(node.id)
+            return lambda table: table.numeric[node.id]
+        if node.id in TEXT_KEYS:
+            raise ValueError(f"'{node.id}' is a text column; compare it with == / != / in")
+        raise ValueError(f"Unknown column: {node.id}")
+
+    if isinstance(node, ast.Constant) and isinstance(node.value, (int, float)) and not isinstance(node.value, bool):
+        value = float(node.value)
+        return lambda table: value
+
+    raise ValueError(f"Unsupported expression: {ast.unparse(node)}")
+
+
+def _compile_number(node, columns):
+    if isinstance(node, (ast.BoolOp, ast.Compare)) or (isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.Not)):
+        raise ValueError(f"Expected a number: {ast.unparse(node)}")
+    return _compile(node, columns)
+
+
+def _text_constant(node):
+    if isinstance(node, ast.Constant) and isinstance(node.value, str):
+        return node.value
+    raise ValueError(f"Expected a string: {ast.unparse(node)}")
+
+
+def _compile_compare(left, op, right, columns):
+    text_side = [isinstance(side, ast.Name) and side.id in TEXT_KEYS for side in (left, right)]
+    if text_side[1] and not text_side[0] and isinstance(op, (ast.Eq, ast.NotEq)):
+        left, right, text_side = right, left, [True, False]
+
+    if text_side[0]:
+        key = left.id
+        columns.add(key)
+        if isinstance(op, (ast.In, ast.NotIn)):
+            if not isinstance(right, (ast.List, ast.Tuple, ast.Set)):
+                raise ValueError(f"Expected a list after 'in': {ast.unparse(right)}")
+            wanted = [_text_constant(element) for element in right.elts]
+            negate = isinstance(op, ast.NotIn)
+
+            def member(table):
+                codes, categories = table.text[key]
+                index = {value: code for code, value in enumerate(categories)}
+                mask = np.isin(codes, [index[value] for value in wanted if value in index])
+                return ~mask if negate else mask, True
+            return member
+        if type(op) not in (ast.Eq, ast.NotEq):
+            raise ValueError(f"Text column '{key}' only supports ==, !=, in, not in")
+        value = _text_constant(right)
+        equal = isinstance(op, ast.Eq)
+
+        def text_equal(table):
+            codes, categories = table.text[key]
+            try:
+                mask = codes == categories.index(value)
+            except ValueError:
+                mask = np.zeros(len(codes), dtype=bool)
+            return mask if equal else ~mask, True
+        return text_equal
+
+    if type(op) not in _COMPARE:
+        raise ValueError(f"Unsupported comparison for numbers: {type(op).__name__}")
+    function = _COMPARE[type(op)]
+    left_value, right_value = _compile_number(left, columns), _compile_number(right, columns)
+
+    def compare(table):
+        left_values, right_values = left_value(table), right_value(table)
+        known = ~np.isnan(left_values) & ~np.isnan(right_values)
+        with np.errstate(invalid='ignore'):
+            return np.asarray(function(left_values, right_values), dtype=bool) & known, known
+    return compare
+
+
+class Filter:
+    """조건식을 한 번 해석해 둔 것. filter(table) 은 종목별 boolean mask 를 반환."""
+
+    def __init__(self, expression):
+        self.expression = expression
+        self.columns = set()
+        try:
+            tree = ast.parse(expression, mode='eval')
+        except SyntaxError as e:
+            raise ValueError(f"Invalid filter expression: {e.msg}") from None
+        self._condition = _compile_condition(tree.body, self.columns)
+
+    def __call__(self, table):
+        mask, _ = self._condition(table)
+        return np.broadcast_to(mask, (len(table),))
+
+
+class SortKey:
+    """정렬 기준 식(예: '잉여현금흐름', '영업이익 / 매출액') 을 한 번 해석해 둔 것."""
+
+    def __init__(self, expression):
+        self.expression = expression
+        self.columns = set()
+        try:
+            tree = ast.parse(expression, mode='eval')
+        except SyntaxError as e:
+            raise ValueError(f"Invalid sort expression: {e.msg}") from None
+        self._value = _compile_number(tree.body, self.columns)
+
+    def __call__(self, table):
+        return np.broadcast_to(np.asarray(self._value(table), dtype=np.float64), (len(table),))
+
+
+class Screener:
+    """StockTable 에 대해 조건식/정렬식을 캐시해 두고 반복 질의를 처리한다."""
+
+    def __init__(self, table, cache_size=EXPRESSION_CACHE_SIZE):
+        self.table = table
+        self.cache_size = cache_size
+        self._filters = collections.OrderedDict()
+        self._sort_keys = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def _compiled(self, cache, kind, expression):
+        # 최근에 쓴 식 cache_size 개만 보관 (여러 스레드가 같은 Screener 를 사용)
+        with self._lock:
+            compiled = cache.get(expression)
+            if compiled is not None:
+                cache.move_to_end(expression)
+                return compiled
+        compiled = kind(expression)
+        with self._lock:
+            cache[expression] = compiled
+            while len(cache) > self.cache_size:
+                cache.popitem(last=False)
+        return compiled
+
+    def _filter(self, expression):
+        return self._compiled(self._filters, Filter, expression)
+
+    def _sort_key(self, expression):
+        return self._compiled(self._sort_keys, SortKey, expression)
+
+    def screen(self, expression=None, sort=None, descending=True, limit=None):
+        """조건에 맞는 종목 index 배열. sort 가 있으면 정렬하고, limit 이 있으면 argpartition 으로 상위 limit 개만."""
+        if expression:
+            indices = np.flatnonzero(self._filter(expression)(self.table))
+        else:
+            indices = np.arange(len(self.table))
+        if sort is None:
+            return indices[:limit] if limit else indices
+
+        values = self._sort_key(sort)(self.table)[indices]
+        # 값이 없는 종목은 정렬 방향과 관계없이 맨 뒤로
+        keys = np.where(np.isnan(values), np.inf, -values if descending else values)
+        if limit and limit < len(indices):
+            top = np.argpartition(keys, limit - 1)[:limit]
+            return indices[top[np.argsort(keys[top], kind='stable')]]
+        return indices[np.argsort(keys, kind='stable')]
+
+    def values(self, expression):
+        """정렬식 값 (종목 순서의 float64 배열)."""
+        return self._sort_key(expression)(self.table)
+
+    def columns(self, expression=None, sort=None):
+        """조건식과 정렬식에 쓰인 열 이름 (출력용)."""
+        used = set()
+        if expression:
+            used |= self._filter(expression).columns
+        if sort:
+            used |= self._sort_key(sort).columns
+        return [key for key in TEXT_KEYS + FINANCIAL_KEYS if key in used]
@@ -0,0 +1,27 @@
+# 출력 텍스트 파일('=' * 50 으로 구분된 섹션)을 읽는 가벼운 함수 모음 (표준 라이브러리만 사용)
+DELIMITER = '=' * 50
+
+
+def iter_sections(file_path, delimiter=DELIMITER):
+    """(섹션 번호, 티커, 섹션 내용) 을 반환. 빈 섹션은 건너뛰되 번호는 유지한다."""
+    with open(file_path, 'r', encoding='utf-8') as file:
+        content = file.read()
+
+    for i, section in enumerate(content.split(delimiter), 1):
+        section = section.strip()
+        if not section:  # 빈 섹션 무시
+            continue
+        # 티커 정보 찾기
+        ticker = "N/A"
+        for line in section.split('\n'):
+            if line.startswith("티커:"):
+                ticker = line.split(":", 1)[1].strip()
+                break
+        yield i, ticker, section
+
+
+def check_section_lengths(file_path, delimiter=DELIMITER, min_length=1000):
+    for i, ticker, section in iter_sections(file_path, delimiter):
+        length = len(section)
+        status = "초과" if length > min_length else "미만"
+        print(f"섹션 {i}: 길이 {length}자 ({status}), 티커: {ticker}")
@@ -0,0 +1,400 @@
+import bisect
+import collections
+import http.server
+import json
+import logging
+import math
+import os
+import threading
+import time
+import urllib.parse
+
+from stock_finder import delta
+from stock_finder.cli import DATASETS, KRX_DATA_DIR, ROOT, open_progress
+from stock_finder.holdings import METRICS as OVERLAP_METRICS, HoldingsMatrix
+from stock_finder.krx_store import FUNDAMENTALS_FILE, METRICS_FILE, KrxMetricsStore
+from stock_finder.screener import Screener, StockTable
+
+logger = logging.getLogger(__name__)
+
+# 수집된 주식/ETF/KRX 데이터를 한 번 읽어 두고 JSON 으로 질의에 답하는 로컬 HTTP 서비스
+#
+#   GET  /lookup?symbol=AAPL[&dataset=stocks,etfs]
+#   GET  /search?q=semiconductor[&dataset=etfs][&limit=20]
+#   GET  /screen?expr=부채비율 < 50&sort=잉여현금흐름[&ascending=1][&limit=20][&dataset=stocks]
+#   GET  /overlap?symbol=QQQ[&metric=overlap|cosine][&limit=20]
+#   GET  /status
+#   POST /reload
+#
+# 데이터셋 버전은 마지막 실행 기록(runs/<run_id>.json)이고, 실행 기록이 없으면 파일 크기/수정 시각이다.
+# 버전이 바뀌면 그 데이터셋만 새로 읽어 새 스냅샷을 만든 뒤 참조만 바꾸므로, 읽는 동안에도 이전 데이터로
+# 계속 응답한다. 결과 캐시 키에는 질의에 쓰인 데이터셋의 버전이 들어가 있어 바뀐 뒤에는 이전 결과를 쓰지 않는다.
+# ETF 편입종목 겹침 행렬은 이전 스냅샷의 행렬에서 편입종목이 바뀐 ETF 만 갱신해 만든다.
+PORT = 8765
+CACHE_SIZE = 1024  # 캐시할 응답 수 (0 이면 캐시 안 함)
+RELOAD_INTERVAL = 5  # 버전 확인 주기(초)
+SEARCH_LIMIT = 20
+
+
+def default_paths():
+    paths = {dataset: os.path.join(ROOT, base) for dataset, base in DATASETS.items()}
+    paths['krx'] = os.path.join(ROOT, KRX_DATA_DIR)
+    return paths
+
+
+def _stat_version(*paths):
+    stats = [os.stat(path) for path in paths if os.path.exists(path)]
+    return '-'.join(f"{stat.st_mtime_ns}:{stat.st_size}" for stat in stats) or None
+
+
+def dataset_version(dataset, path):
+    """데이터가 없으면 None."""
+    if dataset == 'krx':
+        return _stat_version(os.path.join(path, METRICS_FILE), os.path.join(path, FUNDAMENTALS_FILE))
+    if not (os.path.exists(path + '.bin') or os.path.exists(path + '.json')):
+        return None
+    # 수집 중에는 progress 파일이 계속 바뀌므로, 실행 기록이 있으면 실행이 끝났을 때만 버전이 바뀐다
+    runs = delta.list_runs(os.path.join(os.path.dirname(path), delta.RUNS_DIR))
+    return f"run:{runs[-1]}" if runs else _stat_version(path + '.bin', path + '.json')
+
+
+def _json_value(value):
+    if isinstance(value, float) and not math.isfinite(value):
+        return None
+    return value.item() if hasattr(value, 'item') else value
+
+
+def load_records(dataset, path):
+    """{symbol: {'info': {...}, ...}}. KRX 는 종목별 최신 지표를 info 로 담는다. 데이터가 없으면 None."""
+    if dataset == 'krx':
+        rows = KrxMetricsStore.load(path).latest()
+        return {row['Symbol']: {'info': {'symbol': row['Symbol'], 'longName': row['Name'],
+                                         **{key: _json_value(value) for key, value in row.items()
+                                            if key not in ('Symbol', 'Name')}}}
+                for row in rows}
+    store = open_progress(path)
+    if store is None:
+        return None
+    records = {symbol: store[symbol] for symbol in store}
+    if hasattr(store, 'close'):
+        store.close()
+    return records
+
+
+class _Column:
+    """문자열 목록을 구분자로 이어 한 문자열로 두고, str.find 로 부분 문자열이 들어 있는 행을 찾는다."""
+
+    SEPARATOR = '\0'
+
+    def __init__(self, values):
+        self.text = self.SEPARATOR.join(value.replace(self.SEPARATOR, ' ') for value in values)
+        self.starts = []
+        position = 0
+        for value in values:
+            self.starts.append(position)
+            position += len(value) + 1
+
+    def rows(self, query):
+        """query 가 들어 있는 행 번호 (오름차순). query 에 구분자가 없으므로 두 행에 걸쳐 일치하지 않는다."""
+        rows = []
+        position = self.text.find(query)
+        while position != -1:
+            row = bisect.bisect_right(self.starts, position) - 1
+            rows.append(row)
+            if row + 1 >= len(self.starts):
+                break
+            position = self.text.find(query, self.starts[row + 1])
+        return rows
+
+
+class Dataset:
+    """한 데이터셋의 스냅샷: 기록, 검색용 소문자 문자열, 스크리너, ETF 겹침 행렬 (만든 뒤에는 바꾸지 않음)."""
+
+    def __init__(self, name, version, records, previous=None):
+        self.name = name
+        self.version = version
+        self.records = records
+        self.symbols = list(records)
+        self.tickers = {}  # 소문자 티커 -> 행 번호
+        names, summaries = [], []
+        for row, symbol in enumerate(self.symbols):
+            info = records[symbol].get('info', {})
+            self.tickers.setdefault(symbol.casefold(), row)
+            names.append(str(info.get('longName', '')).casefold())
+            summaries.append(str(info.get('longBusinessSummary', '')).casefold())
+        self.names = _Column(names)
+        self.summaries = _Column(summaries)
+        self.screener = Screener(StockTable.from_records(records)) if name in DATASETS else None
+        self.holdings = None
+        if name == 'etfs':
+            if previous is not None and previous.holdings is not None:
+                self.holdings, changed = previous.holdings.updated(records)
+            else:
+                self.holdings = HoldingsMatrix.from_records(records)
+                self.holdings.compute()
+                changed = len(self.holdings)
+            logger.info(json.dumps({'event': 'holdings', 'etfs': len(self.holdings), 'changed': changed}))
+
+    def __len__(self):
+        return len(self.records)
+
+
+class LRUCache:
+    def __init__(self, size=CACHE_SIZE):
+        self.size = size
+        self.hits = 0
+        self.misses = 0
+        self._items = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._items)
+
+    def get(self, key):
+        with self._lock:
+            value = self._items.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._items.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        if self.size <= 0:
+            return
+        with self._lock:
+            self._items[key] = value
+            self._items.move_to_end(key)
+            while len(self._items) > self.size:
+                self._items.popitem(last=False)
+
+
+def _limit(params, default):
+    try:
+        limit = int(params.get('limit', default))
+    except ValueError:
+        raise ValueError(f"Invalid limit: {params['limit']}") from None
+    return limit if limit > 0 else None
+
+
+def lookup(datasets, params):
+    symbol = params.get('symbol', '').strip()
+    if not symbol:
+        raise ValueError("Missing parameter: symbol")
+    results = []
+    for dataset in datasets:
+        record = dataset.records.get(symbol) or dataset.records.get(symbol.upper())
+        if record is not None:
+            results.append({'dataset': dataset.name, 'record': record})
+    if not results:
+        return 404, {'error': f"{symbol} not found"}
+    return 200, {'symbol': symbol, 'results': results}
+
+
+def search(datasets, params):
+    """티커 일치 > 이름 일치 > 설명 일치 순 (cli search 와 같은 순위)."""
+    query = params.get('q', '').replace(_Column.SEPARATOR, '').strip().casefold()
+    if not query:
+        raise ValueError("Missing parameter: q")
+    limit = _limit(params, SEARCH_LIMIT)
+    hits = []
+    for dataset in datasets:
+        ranks = {}
+        if query in dataset.tickers:
+            ranks[dataset.tickers[query]] = 0
+        for row in dataset.names.rows(query):
+            ranks.setdefault(row, 1)
+        for row in dataset.summaries.rows(query):
+            ranks.setdefault(row, 2)
+        hits.extend((rank, dataset, dataset.symbols[row]) for row, rank in sorted(ranks.items()))
+    hits.sort(key=lambda hit: hit[0])
+    results = []
+    for rank, dataset, symbol in hits[:limit]:
+        info = dataset.records[symbol].get('info', {})
+        results.append({'dataset': dataset.name, 'symbol': symbol, 'longName': info.get('longName', ''),
+                        'detail': info.get('category') or info.get('sector') or ''})
+    return 200, {'total': len(hits), 'results': results}
+
+
+def screen(datasets, params):
+    if len(datasets) != 1:
+        raise ValueError("Screen one dataset at a time")
+    dataset = datasets[0]
+    if dataset.screener is None:
+        raise ValueError(f"{dataset.name}: screening is not supported")
+    screener = dataset.screener
+    expression, sort = params.get('expr') or None, params.get('sort') or None
+    limit = _limit(params, SEARCH_LIMIT)
+    indices = screener.screen(expression, sort, params.get('ascending', '0') in ('0', ''), limit)
+    total = len(screener.screen(expression)) if limit else len(indices)
+    columns = screener.columns(expression, sort)
+    sort_values = screener.values(sort) if sort else None
+    table = screener.table
+    names = table.column('longName')
+    values = {key: table.column(key) for key in columns}
+    results = []
+    for i in indices.tolist():
+        row = {'symbol': table.symbols[i], 'longName': names[i]}
+        for key in columns:
+            row[key] = _json_value(values[key][i])
+        if sort:
+            row['sort'] = _json_value(sort_values[i])
+        results.append(row)
+    return 200, {'total': total, 'results': results}
+
+
+def overlap(datasets, params):
+    if len(datasets) != 1 or datasets[0].holdings is None:
+        raise ValueError("Overlap is only available for etfs")
+    holdings = datasets[0].holdings
+    symbol = params.get('symbol', '').strip().upper()
+    if not symbol:
+        raise ValueError("Missing parameter: symbol")
+    metric = params.get('metric', 'overlap')
+    if metric not in OVERLAP_METRICS:
+        raise ValueError(f"Unknown metric: {metric} (one of {', '.join(OVERLAP_METRICS)})")
+    if symbol not in holdings:
+        return 404, {'error': f"{symbol} has no holdings"}
+    neighbors = holdings.similar(symbol, metric, _limit(params, SEARCH_LIMIT))
+    return 200, {'symbol': symbol, 'metric': metric,
+                 'results': [{'symbol': other, 'score': score} for other, score in neighbors]}
+
+
+# 경로 -> (처리 함수, dataset 인자가 없을 때 쓸 데이터셋. None 이면 읽어 둔 전체)
+ENDPOINTS = {
+    '/lookup': (lookup, None),
+    '/search': (search, None),
+    '/screen': (screen, 'stocks'),
+    '/overlap': (overlap, 'etfs'),
+}
+
+
+class QueryService:
+    def __init__(self, paths=None, cache_size=CACHE_SIZE):
+        self.paths = paths or default_paths()
+        self.cache = LRUCache(cache_size)
+        self.datasets = {}  # 현재 스냅샷 (이름 -> Dataset). reload 는 dict 를 통째로 바꾼다
+        self.loaded_at = None
+        self.reloads = 0
+        self._reload_lock = threading.Lock()
+        self._stop = threading.Event()
+        self.reload()
+
+    def reload(self, force=False):
+        """버전이 바뀐 데이터셋만 다시 읽어 스냅샷을 교체. 바뀐 데이터셋 이름 목록을 반환."""
+        with self._reload_lock:
+            current = self.datasets
+            datasets, changed = {}, []
+            for name, path in self.paths.items():
+                version = dataset_version(name, path)
+                if not force and name in current and current[name].version == version:
+                    datasets[name] = current[name]
+                    continue
+                records = load_records(name, path) if version is not None else None
+                if records is not None:
+                    datasets[name] = Dataset(name, version, records, current.get(name))
+                if records is not None or name in current:
+                    changed.append(name)
+            if changed:
+                self.datasets = datasets
+                self.loaded_at = time.time()
+                self.reloads += 1 if current else 0
+                logger.info(json.dumps({'event': 'reload', 'changed': changed,
+                                        'versions': {name: d.version for name, d in datasets.items()}}))
+            return changed
+
+    def _watch_loop(self, interval):
+        while not self._stop.wait(interval):
+            try:
+                self.reload()
+            except Exception:
+                # 쓰는 중인 파일을 읽었을 수 있으므로 이전 스냅샷을 유지하고 다음 주기에 다시 시도
+                logger.exception("Reload failed; keeping previous snapshot")
+
+    def watch(self, interval=RELOAD_INTERVAL):
+        threading.Thread(target=self._watch_loop, args=(interval,), daemon=True).start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _select(self, datasets, names, default):
+        if names:
+            names = [name.strip() for name in names.split(',') if name.strip()]
+        else:
+            names = [default] if default else list(datasets)
+        for name in names:
+            if name not in datasets:
+                raise ValueError(f"Dataset not loaded: {name} (loaded: {', '.join(datasets) or 'none'})")
+        return [datasets[name] for name in names]
+
+    def query(self, path, params):
+        """(HTTP 상태, JSON 바이트). 관련 데이터셋 버전이 같은 동일 질의는 캐시에서 반환."""
+        datasets = self.datasets  # 요청 하나는 시작할 때의 스냅샷으로 끝까지 처리
+        if path not in ENDPOINTS:
+            return 404, json.dumps({'error': f"Unknown endpoint: {path}"}).encode('utf-8')
+        handler, default = ENDPOINTS[path]
+        try:
+            selected = self._select(datasets, params.get('dataset'), default)
+        except ValueError as e:
+            return 400, json.dumps({'error': str(e)}, ensure_ascii=False).encode('utf-8')
+        key = (path, tuple(sorted(params.items())), tuple(dataset.version for dataset in selected))
+        response = self.cache.get(key)
+        if response is None:
+            try:
+                status, payload = handler(selected, params)
+            except ValueError as e:
+                status, payload = 400, {'error': str(e)}
+            response = (status, json.dumps(payload, ensure_ascii=False).encode('utf-8'))
+            self.cache.put(key, response)
+        return response
+
+    def status(self):
+        return {
+            'loaded_at': time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(self.loaded_at)) if self.loaded_at else None,
+            'reloads': self.reloads,
+            'datasets': {name: {'version': dataset.version, 'records': len(dataset)}
+                         for name, dataset in self.datasets.items()},
+            'cache': {'size': self.cache.size, 'entries': len(self.cache),
+                      'hits': self.cache.hits, 'misses': self.cache.misses},
+        }
+
+
+def make_server(service, host='127.0.0.1', port=PORT):
+    class Handler(http.server.BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'  # 연결을 재사용하는 클라이언트를 위해 keep-alive
+        # 헤더와 본문을 따로 쓰므로, Nagle 과 상대의 지연 ACK 가 겹쳐 응답마다 ~40ms 씩 멈추지 않도록
+        disable_nagle_algorithm = True
+
+        def _send(self, status, body):
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            url = urllib.parse.urlsplit(self.path)
+            if url.path == '/status':
+                self._send(200, json.dumps(service.status()).encode('utf-8'))
+                return
+            params = {key: values[-1] for key, values in urllib.parse.parse_qs(url.query).items()}
+            self._send(*service.query(url.path, params))
+
+        def do_POST(self):
+            self.rfile.read(int(self.headers.get('Content-Length') or 0))
+            if urllib.parse.urlsplit(self.path).path != '/reload':
+                self._send(404, json.dumps({'error': f"Unknown endpoint: {self.path}"}).encode('utf-8'))
+                return
+            try:
+                changed = service.reload(force=True)
+            except Exception as e:
+                logger.exception("Reload failed; keeping previous snapshot")
+                self._send(500, json.dumps({'error': str(e)}).encode('utf-8'))
+                return
+            self._send(200, json.dumps({'reloaded': changed}).encode('utf-8'))
+
+        def log_message(self, format, *args):
+            pass
+
+    return http.server.ThreadingHTTPServer((host, port), Handler)
@@ -0,0 +1,104 @@
+import json
+import os
+import subprocess
+import sys
+import zlib
+
+from stock_finder.records import RecordStore
+
+# 종목 목록을 해시로 N개 샤드에 나눠 프로세스(또는 서버)별로 따로 수집하고, 마지막에 합친다.
+#
+#   한 대에서:    python main_read_file_korean.py --shards 4
+#   여러 대에서:  각 서버에서 --shard i/4 실행 -> shards/ 디렉터리를 한 곳에 모은 뒤 --merge 4
+#
+# 샤드마다 shards/<i>-of-<N>/ 아래에 진행 상황(progress.bin), 실패 기록, 출력 파일을 따로 둔다.
+SHARDS_DIR = "shards"
+
+
+def parse_shard(text):
+    """'2/8' -> (2, 8)"""
+    index, count = (int(part) for part in text.split('/'))
+    if not 0 <= index < count:
+        raise ValueError(f"Shard index must be in [0, {count}): {text}")
+    return index, count
+
+
+def shard_of(symbol, count):
+    # 프로세스/서버가 달라도 같은 결과가 나와야 하므로 내장 hash() 대신 crc32 사용
+    return zlib.crc32(symbol.encode('utf-8')) % count
+
+
+def select_shard(symbols, index, count):
+    return [symbol for symbol in symbols if shard_of(symbol, count) == index]
+
+
+def shard_dir(index, count):
+    return os.path.join(SHARDS_DIR, f"{index}-of-{count}")
+
+
+def open_shard_store(index, count, symbols, main_store_filename='progress.bin', legacy_json='progress.json'):
+    """샤드 진행 상황 저장소를 연다. 처음 만들 때는 기존 전체 진행 상황에서 이 샤드 종목만 가져온다.
+
+    전체 진행 상황이 아직 progress.json 뿐이면 그 파일에서 가져온다. 샤드 프로세스 여러 개가 동시에
+    열 수 있으므로 progress.bin 으로 변환하지 않고 읽기만 한다.
+    """
+    filename = os.path.join(shard_dir(index, count), 'progress.bin')
+    is_new = not os.path.exists(filename)
+    os.makedirs(os.path.dirname(filename), exist_ok=True)
+    store = RecordStore(filename)
+    if is_new and os.path.exists(main_store_filename):
+        main_store = RecordStore(main_store_filename, readonly=True)
+        for symbol in symbols:
+            if symbol in main_store:
+                store[symbol] = main_store[symbol]
+        main_store.close()
+    elif is_new and legacy_json and os.path.exists(legacy_json):
+        with open(legacy_json, 'r') as f:
+            legacy = json.load(f)
+        for symbol in symbols:
+            if symbol in legacy:
+                store[symbol] = legacy[symbol]
+    return store
+
+
+def open_shard_stores(count):
+    stores = []
+    for index in range(count):
+        filename = os.path.join(shard_dir(index, count), 'progress.bin')
+        stores.append(RecordStore(filename, readonly=True) if os.path.exists(filename) else None)
+    return stores
+
+
+def merged_records(symbols, stores):
+    """universe 순서대로 (symbol, record) 를 반환. 여러 샤드에 있으면 해시상 담당 샤드의 기록을 우선."""
+    count = len(stores)
+    for symbol in symbols:
+        owner = stores[shard_of(symbol, count)]
+        if owner is not None and symbol in owner:
+            yield symbol, owner[symbol]
+            continue
+        # 샤드 수를 바꿔 실행한 적이 있으면 다른 샤드에 남아 있을 수 있음
+        for store in stores:
+            if store is not None and symbol in store:
+                yield symbol, store[symbol]
+                break
+
+
+def shard_options(count=None, http_cache_mode=None):
+    """샤드 프로세스에 넘길 스크립트 옵션. None 인 값은 넘기지 않아 스크립트 설정값을 따른다."""
+    options = []
+    if count is not None:
+        options += ['--count', str(count)]
+    if http_cache_mode is not None:
+        options += ['--http-cache', http_cache_mode]
+    return options
+
+
+def run_local_shards(script_path, count, options=()):
+    """같은 스크립트를 --shard i/N (+ options) 으로 N개 프로세스에서 동시에 실행하고 실패한 샤드 번호를 반환."""
+    processes = [
+        subprocess.Popen([sys.executable, script_path, '--shard', f"{index}/{count}", *options],
+                         cwd=os.path.dirname(os.path.abspath(script_path)))
+        for index in range(count)
+    ]
+    return [index for index, process in enumerate(processes) if process.wait() != 0]
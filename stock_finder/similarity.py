@@ -0,0 +1,156 @@
+import re
+import threading
+import zlib
+
+import numpy as np
+
+# 설명 문장이 거의 같은 ETF(예: Innovator Defined Protection 시리즈, 단일 종목 2x/옵션 인컴 ETF)를
+# MinHash + LSH 로 묶는다. 설명 하나당 서명 계산과 버킷 조회만 하므로 전체 비용은 ETF 수에 거의 비례한다.
+NUM_PERM = 128  # 서명 길이
+BANDS = 32  # LSH 밴드 수 (밴드당 4행: 유사도 0.5 -> 후보 확률 약 87%, 0.8 -> 거의 100%)
+SHINGLE_SIZE = 3  # 단어 3-gram
+THRESHOLD = 0.8  # 추정 Jaccard 유사도가 이 이상이면 near-duplicate
+
+_PRIME = (1 << 31) - 1
+_rng = np.random.default_rng(20240724)  # 서명은 실행 간에 비교할 수 있도록 고정 seed
+_A = _rng.integers(1, _PRIME, NUM_PERM, dtype=np.uint64)
+_B = _rng.integers(0, _PRIME, NUM_PERM, dtype=np.uint64)
+
+# 소문자/숫자 뒤의 마침표에서만 나눠 'U.S. Treasury' 같은 약어는 자르지 않음
+_SENTENCE_END = re.compile(r'(?<=[a-z0-9%)”"][.!?])\s+(?=[A-Z“"])')
+
+
+def shingles(text, size=SHINGLE_SIZE):
+    # 'No description available.' 같은 짧은 문구는 색인하지 않음
+    words = re.findall(r'\w+', text.lower())
+    if len(words) <= size:
+        return set()
+    return {' '.join(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+
+def signature(text):
+    """MinHash 서명 (uint64 NUM_PERM 개). 단어가 없으면 None."""
+    tokens = shingles(text)
+    if not tokens:
+        return None
+    hashes = np.fromiter((zlib.crc32(token.encode('utf-8')) for token in tokens),
+                         dtype=np.uint64, count=len(tokens)) % _PRIME
+    return ((np.outer(_A, hashes) + _B[:, None]) % _PRIME).min(axis=1)
+
+
+def split_sentences(text):
+    return [sentence for sentence in _SENTENCE_END.split(text.strip()) if sentence]
+
+
+class SimilarityIndex:
+    """key -> 설명 MinHash 서명. 같은 밴드 값을 가진 key 만 후보로 비교한다."""
+
+    def __init__(self, bands=BANDS, threshold=THRESHOLD):
+        self.rows = NUM_PERM // bands
+        self.threshold = threshold
+        self.signatures = {}
+        self._buckets = [{} for _ in range(bands)]
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.signatures)
+
+    def __contains__(self, key):
+        return key in self.signatures
+
+    def _bands(self, sig):
+        return [sig[i * self.rows:(i + 1) * self.rows].tobytes() for i in range(len(self._buckets))]
+
+    def add(self, key, text):
+        sig = signature(text)
+        if sig is None:
+            return
+        with self._lock:
+            self.signatures[key] = sig
+            for bucket, band in zip(self._buckets, self._bands(sig)):
+                bucket.setdefault(band, []).append(key)
+
+    def query(self, text=None, key=None, threshold=None, limit=None):
+        """비슷한 [(key, 추정 유사도)] 를 유사도 순으로. key 를 주면 그 항목의 서명으로 찾고 자신은 제외."""
+        sig = self.signatures.get(key) if key is not None else signature(text)
+        if sig is None:
+            return []
+        threshold = self.threshold if threshold is None else threshold
+        with self._lock:
+            candidates = {other for bucket, band in zip(self._buckets, self._bands(sig))
+                          for other in bucket.get(band, ())}
+            candidates.discard(key)
+            scored = [(other, float(np.mean(self.signatures[other] == sig))) for other in candidates]
+        scored = sorted((item for item in scored if item[1] >= threshold), key=lambda item: -item[1])
+        return scored[:limit] if limit else scored
+
+    def clusters(self, threshold=None):
+        """near-duplicate 묶음 목록 (2개 이상인 것만, 큰 묶음부터). 후보 쌍만 비교하는 union-find."""
+        threshold = self.threshold if threshold is None else threshold
+        parent = {}
+
+        def find(key):
+            while parent.get(key, key) != key:
+                parent[key] = parent.get(parent[key], parent[key])
+                key = parent[key]
+            return key
+
+        for bucket in self._buckets:
+            for keys in bucket.values():
+                for other in keys[1:]:
+                    if find(other) != find(keys[0]) and \
+                            np.mean(self.signatures[other] == self.signatures[keys[0]]) >= threshold:
+                        parent[find(other)] = find(keys[0])
+        groups = {}
+        for key in self.signatures:
+            groups.setdefault(find(key), []).append(key)
+        return sorted((group for group in groups.values() if len(group) > 1), key=len, reverse=True)
+
+
+class DedupTranslator:
+    """비슷한 설명을 이미 번역했으면 달라진 문장만 번역하고 나머지는 기존 번역을 그대로 쓴다.
+
+    translate(text) 는 원래 번역 함수. 문장 단위 대응을 위해 문장을 줄바꿈으로 이어 한 번에 번역한다.
+    번역 결과의 줄 수가 맞지 않으면 문장 대응을 알 수 없으므로 대표 번역으로 쓰지 않는다. 모든 문장을
+    번역한 경우에는 그 결과를 이어 붙여 그대로 쓰고, 일부 문장만 번역한 경우에만 전체를 다시 번역한다.
+    """
+
+    def __init__(self, translate, threshold=THRESHOLD):
+        self.translate = translate
+        self.index = SimilarityIndex(threshold=threshold)
+        self.translations = {}  # key -> {영문 문장: 번역 문장}
+        self.reused = 0  # 기존 번역을 재사용한 문장 수
+        self.translated = 0  # 새로 번역한 문장 수
+        self.fallbacks = 0  # 줄 수가 맞지 않아 설명 전체를 다시 번역한 횟수
+        self._lock = threading.Lock()
+
+    def _translate_lines(self, lines):
+        return [part.strip() for part in self.translate('\n'.join(lines)).split('\n') if part.strip()]
+
+    def __call__(self, key, text):
+        sentences = split_sentences(text)
+        reference = {}
+        for other, _ in self.index.query(text, threshold=self.index.threshold):
+            if other in self.translations:
+                reference = self.translations[other]
+                break
+
+        missing = list(dict.fromkeys(sentence for sentence in sentences if sentence not in reference))
+        translated = self._translate_lines(missing) if missing else []
+        if len(translated) != len(missing):
+            # 같은 문장이 반복되는 설명도 있으므로 중복을 뺀 문장 목록과 비교
+            if missing == list(dict.fromkeys(sentences)):
+                with self._lock:
+                    self.translated += len(missing)
+                return ' '.join(translated)
+            with self._lock:
+                self.fallbacks += 1
+            return self.translate(text)
+
+        mapping = dict(zip(missing, translated))
+        with self._lock:
+            self.reused += len(sentences) - len(missing)
+            self.translated += len(missing)
+            self.translations[key] = {sentence: reference.get(sentence) or mapping[sentence] for sentence in sentences}
+        self.index.add(key, text)
+        return ' '.join(self.translations[key][sentence] for sentence in sentences)
@@ -0,0 +1,78 @@
+import json
+import os
+
+from stock_finder import cli, delta
+from stock_finder.formatting import OUTPUTS
+from stock_finder.records import RecordStore
+
+
+def etf(symbol, summary):
+    return {'info': {'symbol': symbol, 'longName': f"{symbol} ETF", 'category': 'Large Blend',
+                     'longBusinessSummary': summary},
+            'top_holdings': [{'name': 'Apple', 'symbol': 'AAPL', 'percent': '7.01%'}]}
+
+
+def read_delta(filename):
+    with open(filename, 'r', encoding='utf-8') as f:
+        return [json.loads(line) for line in f]
+
+
+def test_record_run_exports_changes_since_previous_run(tmp_path, monkeypatch):
+    runs_dir, data_dir = str(tmp_path / 'runs'), str(tmp_path / 'data')
+    store = RecordStore(str(tmp_path / 'progress.bin'))
+    store['SPY'] = etf('SPY', 'S&P 500')
+    store['QQQ'] = etf('QQQ', 'Nasdaq 100')
+
+    monkeypatch.setattr(delta, 'new_run_id', lambda runs_dir: '20240801_120000')
+    first = delta.record_run(['SPY', 'QQQ', 'XLE'], store, *OUTPUTS['etfs'], runs_dir=runs_dir, data_dir=data_dir)
+    assert delta.load_manifest(first, runs_dir) == {'SPY': store.digest('SPY'), 'QQQ': store.digest('QQQ')}
+    assert not os.path.exists(data_dir)  # 비교할 이전 실행이 없음
+
+    store['QQQ'] = etf('QQQ', 'Nasdaq 100 (updated)')
+    store['XLE'] = etf('XLE', 'Energy')
+    monkeypatch.setattr(delta, 'new_run_id', lambda runs_dir: '20240802_120000')
+    delta.record_run(['QQQ', 'XLE'], store, *OUTPUTS['etfs'], runs_dir=runs_dir, data_dir=data_dir)
+
+    lines = read_delta(os.path.join(data_dir, 'etf_data_delta_20240801_120000_to_20240802_120000.jsonl'))
+    assert [(line['op'], line['symbol']) for line in lines] == [('added', 'XLE'), ('changed', 'QQQ'),
+                                                                ('removed', 'SPY')]
+    assert 'Nasdaq 100 (updated)' in lines[1]['text'] and lines[1]['summary'].startswith('QQQ ETF(티커: QQQ)')
+    store.close()
+
+
+def test_run_ids_in_the_same_second_do_not_collide(tmp_path, monkeypatch):
+    runs_dir = str(tmp_path / 'runs')
+    monkeypatch.setattr(delta.time, 'strftime', lambda fmt: '20240801_120000' if fmt == '%Y%m%d_%H%M%S' else '')
+    store = RecordStore(str(tmp_path / 'progress.bin'))
+    store['SPY'] = etf('SPY', 'S&P 500')
+    run_ids = [delta.record_run(['SPY'], store, *OUTPUTS['etfs'], runs_dir=runs_dir, data_dir=str(tmp_path))
+               for _ in range(12)]
+    assert run_ids[:3] == ['20240801_120000', '20240801_120000_1', '20240801_120000_2']
+    assert delta.list_runs(runs_dir) == run_ids
+    store.close()
+
+
+def test_cli_delta_is_named_after_the_checkpoint(tmp_path, monkeypatch, capsys):
+    base_dir = tmp_path / 'us_etf'
+    base_dir.mkdir()
+    store = RecordStore(str(base_dir / 'progress.bin'))
+    store['SPY'] = etf('SPY', 'S&P 500')
+    delta.save_manifest('20240801_120000', delta.record_hashes(['SPY'], store), str(base_dir / 'runs'))
+    store['QQQ'] = etf('QQQ', 'Nasdaq 100')
+    store.flush()
+    monkeypatch.setattr(cli, 'ROOT', str(tmp_path))
+
+    cli.main(['delta', 'etfs', '--since', '20240801_120000'])
+    filename = capsys.readouterr().out.strip()
+    checkpoint = delta.checkpoint_id(delta.record_hashes(store, store))
+    assert filename == str(base_dir / 'data' / f"etf_data_delta_20240801_120000_to_{checkpoint}.jsonl")
+    assert [(line['op'], line['symbol']) for line in read_delta(filename)] == [('added', 'QQQ')]
+
+    # 내용이 같으면 같은 이름, 바뀌면 다른 이름
+    cli.main(['delta', 'etfs', '--since', '20240801_120000'])
+    assert capsys.readouterr().out.strip() == filename
+    store['SPY'] = etf('SPY', 'S&P 500 (updated)')
+    store.flush()
+    cli.main(['delta', 'etfs', '--since', '20240801_120000'])
+    assert capsys.readouterr().out.strip() != filename
+    store.close()
@@ -0,0 +1,74 @@
+import random
+
+import pytest
+
+from stock_finder.holdings import METRICS, HoldingsMatrix, holdings_weights
+
+SECURITIES = [f"S{i}" for i in range(40)]
+
+
+def random_holdings(rng):
+    # 비중이 연속값이라 점수가 같은 이웃이 거의 생기지 않으므로 순서까지 비교할 수 있다
+    return [{'symbol': security, 'name': security, 'percent': f"{rng.uniform(0.1, 10):.6f}%"}
+            for security in rng.sample(SECURITIES, rng.randint(1, 8))]
+
+
+def random_records(rng, count):
+    return {f"E{i}": {'top_holdings': random_holdings(rng)} for i in range(count)}
+
+
+def assert_same_neighbors(matrix, records):
+    expected = HoldingsMatrix.from_records(records, matrix.k)
+    expected.compute()
+    assert matrix.rows == expected.rows
+    for metric in METRICS:
+        for symbol in expected.rows:
+            actual = matrix.similar(symbol, metric)
+            wanted = expected.similar(symbol, metric)
+            assert [other for other, _ in actual] == [other for other, _ in wanted], (metric, symbol)
+            assert [score for _, score in actual] == pytest.approx([score for _, score in wanted])
+        assert set(matrix.neighbors[metric]) == set(expected.neighbors[metric])
+
+
+def test_holdings_weights():
+    holdings = [{'symbol': 'AAPL', 'percent': '7.00%'}, {'symbol': 'AAPL', 'percent': '1.00%'},
+                {'symbol': 'N/A', 'percent': '5.00%'}, {'symbol': 'MSFT', 'percent': ''}]
+    assert holdings_weights(holdings) == pytest.approx({'AAPL': 0.08})
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_update_matches_full_recompute(seed):
+    rng = random.Random(seed)
+    records = random_records(rng, 60)
+    matrix = HoldingsMatrix.from_records(records, k=5)
+    matrix.compute()
+    for step in range(30):
+        symbol = f"E{rng.randrange(70)}"
+        if step % 5 == 4 and symbol in records:
+            del records[symbol]
+            matrix.update(symbol, [])
+        else:
+            records[symbol] = {'top_holdings': random_holdings(rng)}
+            matrix.update(symbol, records[symbol]['top_holdings'])
+        assert_same_neighbors(matrix, records)
+
+
+def test_updated_leaves_previous_matrix_unchanged():
+    rng = random.Random(7)
+    records = random_records(rng, 50)
+    previous = HoldingsMatrix.from_records(records, k=5)
+    previous.compute()
+    before = {metric: {symbol: list(neighbors) for symbol, neighbors in previous.neighbors[metric].items()}
+              for metric in METRICS}
+
+    changed = dict(records)
+    changed['E3'] = {'top_holdings': random_holdings(rng)}
+    changed['E99'] = {'top_holdings': random_holdings(rng)}
+    del changed['E10']
+    matrix, count = previous.updated(changed)
+    assert count == 3
+    assert_same_neighbors(matrix, changed)
+    assert previous.neighbors == before
+    assert_same_neighbors(previous, records)
+
+    assert previous.updated(records)[1] == 0
@@ -0,0 +1,36 @@
+import types
+
+import pytest
+
+from stock_finder.http_cache import HttpCache
+
+URL = 'https://query2.finance.yahoo.com/v10/finance/quoteSummary/AAPL?modules=price&crumb=abc'
+
+
+def response(status_code):
+    return types.SimpleNamespace(status_code=status_code, reason='', headers={}, content=b'{}')
+
+
+def fetch(cache, status_code):
+    sent = []
+
+    def send():
+        sent.append(status_code)
+        return response(status_code)
+
+    cache.fetch('GET', URL, None, None, send, lambda meta, content: meta['status_code'])
+    return bool(sent)
+
+
+@pytest.mark.parametrize('status_code, cached', [
+    (200, True), (404, True), (401, False), (403, False), (429, False), (500, False), (503, False),
+])
+def test_only_success_and_not_found_are_replayed(tmp_path, status_code, cached):
+    cache = HttpCache(str(tmp_path))
+    assert fetch(cache, status_code)
+    assert fetch(cache, status_code) is not cached
+
+
+def test_crumb_is_not_part_of_the_key(tmp_path):
+    cache = HttpCache(str(tmp_path))
+    assert cache.key('GET', URL) == cache.key('GET', URL.replace('crumb=abc', 'crumb=xyz'))
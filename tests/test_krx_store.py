@@ -0,0 +1,60 @@
+import datetime
+
+import numpy as np
+import pandas as pd
+
+from stock_finder.krx_store import KrxMetricsStore, fiscal_period
+
+VALUES = {'BPS': 50000, 'EPS': 5000, 'DPS': 1000, 'ROE': 0.1, 'Dividend Yield': 0.02}
+
+
+def test_fiscal_period_from_labels():
+    assert fiscal_period(['2022/12', '2023/12']) == '2023'
+    assert fiscal_period(pd.DatetimeIndex(['2022-12-31', '2023-12-31'])) == '2023'
+    assert fiscal_period([2022, 2023]) == '2023'
+    assert fiscal_period(['최근']) is None
+    assert fiscal_period([]) is None
+
+
+def test_stale_fundamentals_keep_their_own_period(tmp_path):
+    store = KrxMetricsStore(str(tmp_path))
+    today = datetime.date(2026, 4, 10)  # 2025 사업보고서가 있어야 할 시점
+    store.set_fundamentals('005930', '삼성전자', '2024', VALUES, today)
+    assert list(store.fundamentals['005930']['periods']) == ['2024']
+    # 2025 공시가 아직 없으므로 90일을 기다리지 않고 일주일 뒤 다시 확인
+    assert not store.needs_fundamentals('005930', today + datetime.timedelta(days=6))
+    assert store.needs_fundamentals('005930', today + datetime.timedelta(days=7))
+
+    store.set_fundamentals('005930', '삼성전자', '2025', VALUES, today + datetime.timedelta(days=7))
+    assert not store.needs_fundamentals('005930', today + datetime.timedelta(days=14))
+
+
+def test_refetched_last_close_replaces_intraday_value(tmp_path):
+    store = KrxMetricsStore(str(tmp_path))
+    store.set_fundamentals('005930', '삼성전자', '2025', VALUES, datetime.date(2026, 4, 10))
+    dates = np.array(['2026-04-09', '2026-04-10'], dtype='datetime64[D]')
+    store.add_prices('005930', dates, [60000.0, 61000.0])  # 4/10 은 장중 가격
+    assert store.update() == 2
+    assert store.last_date('005930') == datetime.date(2026, 4, 10)
+
+    # 다음 실행은 마지막 날짜부터 다시 받아 덮어씀
+    store.add_prices('005930', np.array(['2026-04-10', '2026-04-13'], dtype='datetime64[D]'), [62000.0, 63000.0])
+    assert store.update() == 2
+    _, closes, metrics = store.series('005930')
+    assert closes.tolist() == [60000.0, 62000.0, 63000.0]
+    assert metrics['PBR'].tolist() == [1.2, 1.24, 1.26]
+
+
+def test_backfilled_history_uses_the_fiscal_period_of_each_date(tmp_path):
+    store = KrxMetricsStore(str(tmp_path))
+    today = datetime.date(2025, 6, 2)
+    store.set_fundamentals('005930', '삼성전자', '2023', dict(VALUES, BPS=40000), today)
+    store.set_fundamentals('005930', '삼성전자', '2024', VALUES, today)
+    # 2024 사업보고서는 2025년 3월 말까지 공시 -> 3/31 까지는 2023, 4/1 부터는 2024 기준
+    dates = np.array(['2024-03-29', '2025-03-31', '2025-04-01', '2025-06-02'], dtype='datetime64[D]')
+    store.add_prices('005930', dates, [40000.0, 40000.0, 50000.0, 50000.0])
+    assert store.update() == 4
+    _, _, metrics = store.series('005930')
+    # 2024-03-29 는 저장된 가장 오래된 2023 기준
+    assert metrics['PBR'].tolist() == [1.0, 1.0, 1.0, 1.0]
+    assert metrics['Fair Value'].tolist() == [40000.0, 40000.0, 50000.0, 50000.0]
@@ -0,0 +1,67 @@
+import json
+
+import pytest
+
+from stock_finder import metrics as metrics_module
+from stock_finder.metrics import Metrics
+
+
+class FakeClock:
+    def __init__(self, now):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock(1000.0)
+    monkeypatch.setattr(metrics_module.time, 'time', clock)
+    monkeypatch.setattr(metrics_module.time, 'perf_counter', clock)
+    return clock
+
+
+def test_snapshot_rate_and_eta(clock):
+    metrics = Metrics(filename=None, window=60)
+    metrics.start(10)
+    for i, symbol in enumerate(['A', 'B', 'C', 'D']):
+        clock.now = 1002.0 + i
+        with metrics.stage(symbol, 'info'):
+            clock.now += 0.5 if symbol == 'C' else 0.1
+        metrics.symbol_done(symbol, ok=symbol != 'D')
+
+    clock.now = 1010.0
+    snapshot = metrics.snapshot()
+    # 시작 후 10초 동안 4개 완료 -> 0.4개/초, 남은 6개 -> 15초
+    assert (snapshot['done'], snapshot['failed'], snapshot['symbols_per_sec'], snapshot['eta_s']) == (4, 1, 0.4, 15.0)
+    assert snapshot['stages']['info']['count'] == 4 and snapshot['stages']['info']['max_ms'] == 500.0
+    assert snapshot['slowest'][0]['symbol'] == 'C'
+
+    # window 보다 오래된 완료는 처리량에서 빠진다
+    clock.now = 1070.0
+    snapshot = metrics.snapshot()
+    assert snapshot['symbols_per_sec'] == 0 and snapshot['eta_s'] is None
+
+
+def test_retries_and_errors_are_counted_per_endpoint_and_symbol(clock):
+    metrics = Metrics(filename=None)
+    metrics.start(3)
+    metrics.record_error('SPY', 'holdings', ConnectionError(), final=False)
+    metrics.record_error('SPY', 'holdings', ConnectionError(), final=False)
+    metrics.record_error('SPY', 'holdings', ConnectionError(), final=True)
+    metrics.record_error('QQQ', 'info', TimeoutError(), final=False)
+    snapshot = metrics.snapshot()
+    assert snapshot['retries'] == 3
+    assert snapshot['retries_by_endpoint'] == {'holdings': 2, 'info': 1}
+    assert snapshot['most_retried'] == [{'symbol': 'SPY', 'retries': 2}, {'symbol': 'QQQ', 'retries': 1}]
+    assert snapshot['errors'] == {'holdings:ConnectionError': 3, 'info:TimeoutError': 1}
+
+
+def test_stop_writes_the_final_snapshot(tmp_path, clock):
+    filename = tmp_path / 'metrics.json'
+    metrics = Metrics(filename=str(filename), write_interval=3600)
+    metrics.start(1)
+    metrics.symbol_done('A')
+    metrics.stop()
+    assert json.loads(filename.read_text())['done'] == 1
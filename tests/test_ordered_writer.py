@@ -0,0 +1,84 @@
+from stock_finder.ordered_writer import OrderedWriter, StreamingTextFile
+from stock_finder.scheduler import RunBudget
+
+SYMBOLS = ['A', 'B', 'C', 'D', 'E']
+
+
+class ListSink:
+    def __init__(self):
+        self.records = []
+
+    def write(self, record):
+        self.records.append(record)
+
+
+class CountingRecords(dict):
+    """쓸 차례가 되었을 때만 읽는지 확인하기 위해 읽은 종목을 기록하는 저장소."""
+
+    def __init__(self, *args):
+        super().__init__(*args)
+        self.reads = []
+
+    def __getitem__(self, symbol):
+        self.reads.append(symbol)
+        return super().__getitem__(symbol)
+
+
+def writer_for(sinks, **kwargs):
+    records = CountingRecords({symbol: f"{symbol}\n" for symbol in SYMBOLS})
+    return OrderedWriter(SYMBOLS, kwargs.pop('window', 2), sinks, records, **kwargs), records
+
+
+def test_out_of_order_puts_are_written_in_universe_order():
+    sink = ListSink()
+    written = []
+    writer, records = writer_for([sink], on_written=written.append)
+    writer.put('C')
+    writer.put('B')
+    # A 를 기다리는 동안은 기록을 읽지 않는다
+    assert sink.records == [] and records.reads == []
+    assert writer.admits('B') and not writer.admits('C')
+    writer.put('A')
+    assert sink.records == ['A\n', 'B\n', 'C\n'] and written == [1, 2, 3]
+    assert writer.admits('E')
+
+
+def test_failed_slots_are_skipped():
+    sink = ListSink()
+    writer, records = writer_for([sink])
+    writer.put('B', ok=False)
+    writer.put('A')
+    writer.put('C')
+    assert sink.records == ['A\n', 'C\n'] and writer.next_index == 3
+    assert 'B' not in records.reads
+
+
+def test_close_flushes_the_buffered_tail():
+    sink = ListSink()
+    writer, _ = writer_for([sink], window=5)
+    # A, C 는 오지 않음 (예산 소진)
+    writer.put('E')
+    writer.put('B')
+    writer.put('D', ok=False)
+    assert sink.records == []
+    writer.close()
+    assert sink.records == ['B\n', 'E\n'] and writer.written == 2
+
+
+def test_budget_stop_renames_tmp_files_to_partial(tmp_path):
+    base = tmp_path / 'data' / 'etf_data_korean_translated'
+    text_file = StreamingTextFile(f"{base}.txt", str.upper, separator='--\n')
+    writer, _ = writer_for([text_file])
+    budget = RunBudget(max_requests=2)
+    for symbol in SYMBOLS:
+        if not budget.acquire():
+            break
+        writer.put(symbol)
+    text_file.snapshot(str(tmp_path / 'intermediate.txt'))
+    writer.close()
+
+    suffix = "_partial" if budget.exhausted else ""
+    text_file.commit(f"{base}{suffix}.txt")
+    assert sorted(path.name for path in (tmp_path / 'data').iterdir()) == ['etf_data_korean_translated_partial.txt']
+    assert (tmp_path / 'data' / 'etf_data_korean_translated_partial.txt').read_text() == 'A\n--\nB\n'
+    assert (tmp_path / 'intermediate.txt').read_text() == 'A\n--\nB\n'
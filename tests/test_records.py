@@ -0,0 +1,143 @@
+import math
+
+import pytest
+
+from stock_finder.records import (RecordStore, decode_value, encode_record, encode_value,
+                                  format_financial_value, parse_financial_value)
+
+STOCK = {
+    'info': {
+        'symbol': 'AAPL',
+        'longName': 'Apple Inc.',
+        'sector': 'Technology',
+        'longBusinessSummary': '애플은 아이폰을 만든다.',
+        'financials': {'매출액': '383,285,000,000.00', '영업이익': '', '부채비율': '-12.50'},
+    }
+}
+ETF = {
+    'info': {'symbol': 'SPY', 'longName': 'SPDR S&P 500', 'category': 'Large Blend', 'extra': None},
+    'top_holdings': [{'name': 'Apple', 'symbol': 'AAPL', 'percent': '7.01%'}],
+    'count': 3, 'ratio': 0.25, 'flags': [True, False],
+}
+
+
+def roundtrip(value):
+    out = encode_value(value, bytearray())
+    decoded, pos = decode_value(bytes(out), 0)
+    assert pos == len(out)
+    return decoded
+
+
+def test_roundtrip_stock_and_etf():
+    assert roundtrip(STOCK) == STOCK
+    assert roundtrip(ETF) == ETF
+
+
+def test_numeric_financials_use_packed_form():
+    out = encode_value(STOCK['info']['financials'], bytearray())
+    # 'financials' 키 밖에서는 일반 문자열로 저장
+    assert b'383,285' in out
+    out = encode_value({'financials': STOCK['info']['financials']}, bytearray())
+    assert b'f' in out and b'383,285' not in out
+
+
+@pytest.mark.parametrize('financials', [
+    {'매출액': '1,234.5'},  # 소수 자릿수가 다름
+    {'매출액': '1234.50'},  # 천 단위 구분 없음
+    {'매출액': 'N/A'},
+    {'매출액': 12.5},
+    {'알수없는항목': '1.00'},
+    {'매출액': '1,234.567'},  # 반올림되는 값
+])
+def test_financials_that_do_not_roundtrip_are_kept_verbatim(financials):
+    value = {'info': {'financials': financials}}
+    assert roundtrip(value) == value
+
+
+def test_containers_without_financials_are_stored_as_json():
+    out = encode_value(ETF, bytearray())
+    assert out[:1] == b'j'
+    out = encode_value(STOCK, bytearray())
+    # financials 를 담은 경로(STOCK -> info)만 태그 형식, 나머지 문자열은 그대로
+    assert out[:1] == b'm' and b'f' in out and b'383,285' not in out
+
+
+def test_financial_value_helpers():
+    assert math.isnan(parse_financial_value(''))
+    assert format_financial_value(parse_financial_value('-1,000.25')) == '-1,000.25'
+
+
+def test_store_reopen_and_overwrite(tmp_path):
+    filename = str(tmp_path / 'progress.bin')
+    store = RecordStore(filename)
+    store['AAPL'] = STOCK
+    store['SPY'] = ETF
+    store['AAPL'] = {'info': {'symbol': 'AAPL'}}
+    assert store['SPY'] == ETF
+    digest = store.digest('SPY')
+    store.close()
+
+    store = RecordStore(filename)
+    assert list(store) == ['AAPL', 'SPY']
+    assert store['AAPL'] == {'info': {'symbol': 'AAPL'}}
+    assert store.digest('SPY') == digest
+    store.compact()
+    assert store['SPY'] == ETF
+    store.close()
+
+
+def test_truncated_last_record_is_dropped(tmp_path):
+    filename = str(tmp_path / 'progress.bin')
+    store = RecordStore(filename)
+    store['AAPL'] = STOCK
+    store.close()
+    complete_size = (tmp_path / 'progress.bin').stat().st_size
+    # 두 번째 기록을 쓰다가 중단된 상황
+    with open(filename, 'ab') as f:
+        f.write(encode_record('SPY', ETF)[:-5])
+
+    store = RecordStore(filename)
+    assert list(store) == ['AAPL']
+    assert store['AAPL'] == STOCK
+    assert (tmp_path / 'progress.bin').stat().st_size == complete_size
+    store['SPY'] = ETF
+    store.close()
+    assert dict(RecordStore(filename).items()) == {'AAPL': STOCK, 'SPY': ETF}
+
+
+def test_legacy_json_is_converted_once(tmp_path):
+    legacy = tmp_path / 'progress.json'
+    legacy.write_text('{"SPY": {"info": {"symbol": "SPY"}}}')
+    filename = str(tmp_path / 'progress.bin')
+    RecordStore(filename, str(legacy)).close()
+    legacy.write_text('{"QQQ": {}}')
+    assert list(RecordStore(filename, str(legacy))) == ['SPY']
+
+
+def test_readonly_leaves_partial_tail_for_the_writer(tmp_path):
+    filename = str(tmp_path / 'progress.bin')
+    writer = RecordStore(filename)
+    writer['AAPL'] = STOCK
+    partial = encode_record('SPY', ETF)
+    # 수집 중인 프로세스가 두 번째 기록을 아직 쓰는 중
+    writer._file.write(partial[:10])
+    writer._file.flush()
+    size = (tmp_path / 'progress.bin').stat().st_size
+
+    reader = RecordStore(filename, readonly=True)
+    assert list(reader) == ['AAPL'] and reader['AAPL'] == STOCK
+    assert (tmp_path / 'progress.bin').stat().st_size == size
+    with pytest.raises(ValueError):
+        reader['QQQ'] = {}
+    with pytest.raises(ValueError):
+        reader.compact()
+    reader.close()
+
+    writer._file.write(partial[10:])
+    writer.close()
+    assert RecordStore(filename, readonly=True)['SPY'] == ETF
+
+
+def test_readonly_requires_existing_file(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        RecordStore(str(tmp_path / 'missing.bin'), readonly=True)
@@ -0,0 +1,97 @@
+import concurrent.futures
+import threading
+
+import pytest
+
+from stock_finder.retry import RetryScheduler, load_dead_letters, merge_dead_letters
+from stock_finder.scheduler import RunBudget
+
+
+class FakeFetch:
+    """symbol 별로 처음 failures[symbol] 번은 실패하는 가짜 요청 함수. 호출 순서를 기록한다."""
+
+    def __init__(self, failures=None):
+        self.failures = dict(failures or {})
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def __call__(self, symbol, endpoint='info'):
+        with self._lock:
+            self.calls.append((symbol, endpoint))
+            if self.failures.get(symbol, 0) > 0:
+                self.failures[symbol] -= 1
+                raise ConnectionError(f"fake error for {symbol}")
+        return f"{symbol}:{endpoint}"
+
+
+@pytest.fixture
+def executor():
+    with concurrent.futures.ThreadPoolExecutor(max_workers=2) as executor:
+        yield executor
+
+
+def scheduler_for(executor, fetch, symbols, **kwargs):
+    kwargs.setdefault('retry_delay', (0.001, 0.002))
+    scheduler = RetryScheduler(executor, max_in_flight=kwargs.pop('max_in_flight', 2), **kwargs)
+    for symbol in symbols:
+        scheduler.add(symbol, 'info', fetch, symbol)
+    return scheduler
+
+
+def test_failed_task_waits_on_the_delay_queue_without_blocking_others(executor):
+    fetch = FakeFetch({'A': 1})
+    scheduler = scheduler_for(executor, fetch, ['A', 'B', 'C'], max_in_flight=1, retry_delay=(0.05, 0.05))
+    results = list(scheduler.run())
+    # A 의 재시도를 기다리는 동안 B, C 를 먼저 처리
+    assert fetch.calls == [('A', 'info'), ('B', 'info'), ('C', 'info'), ('A', 'info')]
+    assert results[-1] == ('A', 'info', 'A:info')
+    assert scheduler.retry_count == 1 and scheduler.dead_letters == []
+
+
+def test_dead_letters_are_written_and_dropped_after_a_successful_replay(executor, tmp_path):
+    filename = str(tmp_path / 'dead_letters.jsonl')
+    fetch = FakeFetch({'A': 3, 'B': 3})
+    scheduler = scheduler_for(executor, fetch, ['A', 'B', 'C'], max_retries=3)
+    results = {symbol: result for symbol, _, result in scheduler.run()}
+    assert results == {'A': None, 'B': None, 'C': 'C:info'}
+    assert merge_dead_letters(filename, scheduler) == 2
+    entries = sorted(load_dead_letters(filename), key=lambda d: d['symbol'])  # 재시도 지연이 무작위라 순서는 다를 수 있음
+    assert [(d['symbol'], d['endpoint'], d['attempts']) for d in entries] == [('A', 'info', 3), ('B', 'info', 3)]
+    assert entries[0]['error'] == 'ConnectionError: fake error for A'
+
+    # 실패 기록의 A 만 다시 시도해 성공: A 는 지우고, 시도하지 않은 B 는 유지
+    replay = scheduler_for(executor, FakeFetch(), [d['symbol'] for d in entries[:1]])
+    assert list(replay.run()) == [('A', 'info', 'A:info')]
+    assert merge_dead_letters(filename, replay) == 1
+    assert [d['symbol'] for d in load_dead_letters(filename)] == ['B']
+
+
+def test_request_budget_skips_new_tasks_but_runs_follow_ups(executor):
+    fetch = FakeFetch()
+    budget = RunBudget(max_requests=2)
+    scheduler = scheduler_for(executor, fetch, ['A', 'B', 'C', 'D'], max_in_flight=1, budget=budget)
+    results = []
+    for symbol, endpoint, result in scheduler.run():
+        results.append((symbol, endpoint))
+        if endpoint == 'info':
+            # 시작한 종목의 후속 요청은 예산과 무관하게 처리
+            scheduler.add(symbol, 'holdings', fetch, symbol, 'holdings', follow_up=True)
+    assert results == [('A', 'info'), ('A', 'holdings'), ('B', 'info'), ('B', 'holdings')]
+    assert [task.symbol for task in scheduler.skipped] == ['C', 'D']
+    assert budget.exhausted and scheduler.attempted == {'A', 'B'}
+
+
+def test_gate_holds_new_tasks_until_admitted(executor):
+    fetch = FakeFetch()
+    done = set()
+    # B 는 A 가 끝나야 시작할 수 있다 (OrderedWriter.admits 와 같은 역할)
+    scheduler = scheduler_for(executor, fetch, ['A', 'B'], gate=lambda symbol: symbol != 'B' or 'A' in done)
+    for symbol, _, _ in scheduler.run():
+        done.add(symbol)
+        if symbol == 'A':
+            assert fetch.calls == [('A', 'info')]
+    assert fetch.calls == [('A', 'info'), ('B', 'info')]
+
+    # 처리 중인 작업이 없으면 보류하지 않는다
+    fetch = FakeFetch()
+    assert [symbol for symbol, _, _ in scheduler_for(executor, fetch, ['B'], gate=lambda symbol: False).run()] == ['B']
@@ -0,0 +1,52 @@
+import pytest
+
+from stock_finder import scheduler
+from stock_finder.scheduler import RunBudget, load_market_caps, parse_market_cap, prioritize_symbols
+
+
+@pytest.mark.parametrize('text, value', [
+    ('$1.2T', 1.2e12),
+    ('500B', 500e9),
+    ('1,077.76B', 1077.76e9),
+    ('22.55m', 22.55e6),
+    ('950K', 950e3),
+    ('12345', 12345.0),
+    ('', 0.0),
+    ('  ', 0.0),
+    ('-', 0.0),
+    ('n/a', 0.0),
+    ('12X', 0.0),
+    ('B', 0.0),
+])
+def test_parse_market_cap(text, value):
+    assert parse_market_cap(text) == pytest.approx(value)
+
+
+def test_larger_symbols_first(tmp_path):
+    listing = tmp_path / 'list.txt'
+    listing.write_text("Symbol\tName\tMarket Cap\nSMAL\tSmall\t22.55M\nBIG\t\t$1.2T\nMID\tMid\t500B\nNONE\tNone\t-\n")
+    caps = load_market_caps(str(listing))
+    assert prioritize_symbols(['NONE', 'SMAL', 'NEW', 'MID', 'BIG'], caps) == ['BIG', 'MID', 'SMAL', 'NONE', 'NEW']
+
+
+def test_request_budget_stops_after_max_requests():
+    budget = RunBudget(max_requests=3)
+    assert [budget.acquire() for _ in range(5)] == [True, True, True, False, False]
+    assert budget.exhausted and budget.requests == 3
+
+
+def test_time_budget_stops_after_max_seconds(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(scheduler.time, 'monotonic', lambda: now[0])
+    budget = RunBudget(max_seconds=60)
+    assert budget.acquire()
+    now[0] = 159.9
+    assert budget.acquire() and not budget.exhausted
+    now[0] = 160.0
+    assert not budget.acquire() and budget.exhausted
+    assert budget.elapsed() == 60.0 and budget.requests == 2
+
+
+def test_no_budget_never_stops():
+    budget = RunBudget()
+    assert all(budget.acquire() for _ in range(1000)) and not budget.exhausted
@@ -0,0 +1,57 @@
+import pytest
+
+from stock_finder.screener import Screener, StockTable
+
+
+def stock(symbol, sector, **financials):
+    return {'info': {'symbol': symbol, 'longName': symbol, 'sector': sector,
+                     'financials': {key: f"{value:,.2f}" for key, value in financials.items()}}}
+
+
+RECORDS = {
+    'AAPL': stock('AAPL', 'Technology', 매출액=383e9, 영업이익=114e9, 부채비율=82.0),
+    'MSFT': stock('MSFT', 'Technology', 매출액=211e9, 영업이익=88e9, 부채비율=45.0),
+    'XOM': stock('XOM', 'Energy', 매출액=344e9, 영업이익=50e9, 부채비율=44.0),
+    'JPM': stock('JPM', 'Financial Services', 매출액=158e9),
+}
+
+
+@pytest.fixture
+def screener():
+    return Screener(StockTable.from_records(RECORDS), cache_size=2)
+
+
+def symbols(screener, indices):
+    return [screener.table.symbols[i] for i in indices]
+
+
+def test_screen_and_sort(screener):
+    assert symbols(screener, screener.screen('부채비율 < 50')) == ['MSFT', 'XOM']
+    assert symbols(screener, screener.screen('sector == "Technology"', '영업이익 / 매출액')) == ['MSFT', 'AAPL']
+    # 값이 없는 종목은 정렬 방향과 관계없이 맨 뒤
+    assert symbols(screener, screener.screen(None, '영업이익', descending=False)) == ['XOM', 'MSFT', 'AAPL', 'JPM']
+    assert screener.columns('부채비율 < 50', '매출액') == ['매출액', '부채비율']
+    with pytest.raises(ValueError):
+        screener.screen('부채비율 <')
+
+
+def test_expression_cache_is_bounded(screener):
+    for threshold in range(10):
+        screener.screen(f'부채비율 < {threshold}', f'매출액 * {threshold}')
+    assert len(screener._filters) == 2 and len(screener._sort_keys) == 2
+    assert list(screener._filters) == ['부채비율 < 8', '부채비율 < 9']
+    # 최근에 쓴 식은 남는다
+    screener.screen('부채비율 < 8')
+    screener.screen('부채비율 < 100')
+    assert list(screener._filters) == ['부채비율 < 8', '부채비율 < 100']
+
+
+def test_missing_values_never_match(screener):
+    # JPM 은 부채비율/영업이익이 없다
+    assert symbols(screener, screener.screen('부채비율 != 50')) == ['AAPL', 'MSFT', 'XOM']
+    assert symbols(screener, screener.screen('not (부채비율 < 50)')) == ['AAPL']
+    assert symbols(screener, screener.screen('not (영업이익 > 60e9 and 부채비율 > 0)')) == ['XOM']
+    assert symbols(screener, screener.screen('not (부채비율 < 50 or sector == "Energy")')) == ['AAPL']
+    # 다른 쪽 조건만으로 참/거짓이 정해지면 값이 없어도 된다
+    assert symbols(screener, screener.screen('부채비율 < 50 or sector == "Financial Services"')) == ['MSFT', 'XOM', 'JPM']
+    assert symbols(screener, screener.screen('not (부채비율 < 50 and sector == "Energy")')) == ['AAPL', 'MSFT', 'JPM']
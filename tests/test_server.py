@@ -0,0 +1,52 @@
+import json
+
+from stock_finder.holdings import HoldingsMatrix
+from stock_finder.records import RecordStore
+from stock_finder.server import QueryService
+
+
+def etf(symbol, holdings):
+    return {'info': {'symbol': symbol, 'longName': f"{symbol} ETF", 'category': 'Large Blend'},
+            'top_holdings': [{'name': name, 'symbol': name, 'percent': percent} for name, percent in holdings]}
+
+
+RECORDS = {
+    'QQQ': etf('QQQ', [('AAPL', '8.50%'), ('MSFT', '7.90%'), ('NVDA', '6.10%')]),
+    'XLK': etf('XLK', [('AAPL', '14.20%'), ('MSFT', '12.80%'), ('AVGO', '5.30%')]),
+    'SPY': etf('SPY', [('AAPL', '7.10%'), ('MSFT', '6.60%'), ('AMZN', '3.70%')]),
+    'XLE': etf('XLE', [('XOM', '22.70%'), ('CVX', '16.90%')]),
+}
+
+
+def query(service, path, **params):
+    status, body = service.query(path, params)
+    return status, json.loads(body)
+
+
+def test_overlap_follows_reload(tmp_path):
+    base = str(tmp_path / 'progress')
+    store = RecordStore(base + '.bin')
+    for symbol, record in RECORDS.items():
+        store[symbol] = record
+    service = QueryService({'etfs': base}, cache_size=16)
+
+    status, payload = query(service, '/overlap', symbol='qqq', limit='2')
+    assert status == 200
+    assert [result['symbol'] for result in payload['results']] == ['XLK', 'SPY']
+    assert query(service, '/overlap', symbol='XLE')[1]['results'] == []
+    assert query(service, '/overlap', symbol='ABCD')[0] == 404
+    assert query(service, '/overlap', symbol='QQQ', metric='jaccard')[0] == 400
+
+    # XLE 가 기술주 ETF 로 바뀌면 다시 읽은 뒤 QQQ 의 이웃에 나타난다
+    previous = service.datasets['etfs'].holdings
+    store['XLE'] = etf('XLE', [('AAPL', '9.00%'), ('NVDA', '9.00%'), ('MSFT', '9.00%')])
+    store.close()
+    assert service.reload(force=True) == ['etfs']
+    holdings = service.datasets['etfs'].holdings
+    assert holdings is not previous
+    status, payload = query(service, '/overlap', symbol='QQQ', limit='1')
+    assert payload['results'][0]['symbol'] == 'XLE'
+
+    expected = HoldingsMatrix.from_records(service.datasets['etfs'].records)
+    expected.compute()
+    assert holdings.neighbors == expected.neighbors
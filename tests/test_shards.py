@@ -0,0 +1,100 @@
+import json
+import types
+
+import pytest
+
+from stock_finder import cli, shards
+from stock_finder.formatting import format_etf_text
+from stock_finder.records import RecordStore
+
+UNIVERSE = [f"ETF{i:03d}" for i in range(200)]
+
+
+def etf(symbol):
+    return {'info': {'symbol': symbol, 'longName': f"{symbol} Fund", 'category': 'Large Blend',
+                     'longBusinessSummary': f"{symbol} 설명"},
+            'top_holdings': [{'name': 'Apple', 'symbol': 'AAPL', 'percent': '7.01%'}]}
+
+
+class FakeProcess:
+    def __init__(self, argv, cwd):
+        self.argv = argv
+
+    def wait(self):
+        return 0
+
+
+def test_sharded_scrape_passes_count_and_http_cache_to_every_shard(monkeypatch):
+    launched, merged = [], []
+
+    def popen(argv, cwd):
+        launched.append(argv[1:])
+        return FakeProcess(argv, cwd)
+
+    module = types.SimpleNamespace(__file__='/repo/us_stock/main_read_file_korean.py', STOCK_COUNT=5567,
+                                   HTTP_CACHE_MODE=None, merge_shards=merged.append)
+    monkeypatch.setattr(cli, 'load_script', lambda command: module)
+    monkeypatch.setattr(shards.subprocess, 'Popen', popen)
+
+    cli.main(['scrape-stocks', '--count', '500', '--http-cache', 'replay', '--shards', '2'])
+    assert launched == [[module.__file__, '--shard', f"{i}/2", '--count', '500', '--http-cache', 'replay']
+                        for i in range(2)]
+    # 합치는 단계(현재 프로세스)도 같은 설정
+    assert (module.STOCK_COUNT, module.HTTP_CACHE_MODE, merged) == (500, 'replay', [2])
+
+    launched.clear()
+    cli.main(['scrape-stocks', '--shards', '2'])
+    assert launched == [[module.__file__, '--shard', f"{i}/2"] for i in range(2)]
+
+
+def test_shard_assignment_is_stable_and_complete():
+    # 프로세스/서버가 달라도 같은 값 (내장 hash() 처럼 실행마다 바뀌지 않음)
+    assert [shards.shard_of(symbol, 4) for symbol in ['AAPL', 'MSFT', 'SPY', 'QQQ', '005930']] == [0, 3, 3, 2, 0]
+    for count in (1, 2, 3, 8):
+        parts = [shards.select_shard(UNIVERSE, index, count) for index in range(count)]
+        assert sorted(sum(parts, [])) == UNIVERSE  # 빠짐도 중복도 없음
+        assert all(parts)
+
+
+@pytest.mark.parametrize('text', ['4/4', '-1/4', '1'])
+def test_parse_shard_rejects_bad_values(text):
+    with pytest.raises(ValueError):
+        shards.parse_shard(text)
+
+
+def test_merged_shards_match_a_single_process_run(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    count = 3
+    # 이전 형식의 전체 진행 상황이 앞쪽 50개를 이미 담고 있는 상태에서 샤드 실행
+    with open('progress.json', 'w') as f:
+        json.dump({symbol: etf(symbol) for symbol in UNIVERSE[:50]}, f)
+    for index in range(count):
+        symbols = shards.select_shard(UNIVERSE, index, count)
+        store = shards.open_shard_store(index, count, symbols)
+        assert list(store) == [symbol for symbol in symbols if symbol in UNIVERSE[:50]]
+        for symbol in reversed(symbols):  # 완료 순서는 universe 순서와 다름
+            store[symbol] = etf(symbol)
+        store.close()
+
+    single = RecordStore(str(tmp_path / 'single.bin'))
+    for symbol in UNIVERSE:
+        single[symbol] = etf(symbol)
+    merged = RecordStore(str(tmp_path / 'merged.bin'))
+    for symbol, record in shards.merged_records(UNIVERSE, shards.open_shard_stores(count)):
+        merged[symbol] = record
+    single.close()
+    merged.close()
+    assert (tmp_path / 'merged.bin').read_bytes() == (tmp_path / 'single.bin').read_bytes()
+
+    text = ''.join(format_etf_text(record) for _, record in shards.merged_records(UNIVERSE, shards.open_shard_stores(count)))
+    assert text == ''.join(format_etf_text(etf(symbol)) for symbol in UNIVERSE)
+
+
+def test_merge_falls_back_to_other_shards(tmp_path, monkeypatch):
+    # 샤드 수를 바꿔 실행한 적이 있으면 담당이 아닌 샤드에 남은 기록도 사용
+    monkeypatch.chdir(tmp_path)
+    owner = shards.shard_of('AAPL', 2)
+    store = shards.open_shard_store(1 - owner, 2, [])
+    store['AAPL'] = etf('AAPL')
+    store.close()
+    assert [symbol for symbol, _ in shards.merged_records(['AAPL', 'MSFT'], shards.open_shard_stores(2))] == ['AAPL']
@@ -0,0 +1,61 @@
+from stock_finder.similarity import DedupTranslator
+
+BASE = ("The fund seeks to track the Nasdaq-100 Index. It invests at least 90% of its assets in index securities. "
+        "The index includes the largest non-financial companies listed on Nasdaq. The fund is rebalanced quarterly. "
+        "Holdings are weighted by market capitalization.")
+VARIANT = BASE.replace("rebalanced quarterly", "rebalanced annually")
+
+
+class FakeTranslate:
+    def __init__(self, merge_lines=False):
+        self.calls = []
+        self.merge_lines = merge_lines
+
+    def __call__(self, text):
+        self.calls.append(text)
+        lines = [f"<{line}>" for line in text.split('\n')]
+        # 번역기가 줄을 합쳐 버리는 경우 (줄 수가 맞지 않음)
+        return ' '.join(lines) if self.merge_lines else '\n'.join(lines)
+
+
+def test_similar_description_translates_only_changed_sentences():
+    translate = FakeTranslate()
+    translator = DedupTranslator(translate)
+    first = translator('QQQ', BASE)
+    second = translator('QQQM', VARIANT)
+    assert len(translate.calls) == 2
+    assert translate.calls[1] == "The fund is rebalanced annually."
+    assert second == first.replace("rebalanced quarterly", "rebalanced annually")
+    assert translator.reused == 4 and translator.translated == 6
+
+
+def test_line_mismatch_without_reference_costs_one_call():
+    translate = FakeTranslate(merge_lines=True)
+    translator = DedupTranslator(translate)
+    result = translator('QQQ', BASE)
+    assert len(translate.calls) == 1
+    assert result.startswith("<The fund seeks to track the Nasdaq-100 Index.")
+    # 문장 대응을 모르므로 대표 번역으로 쓰지 않음
+    assert 'QQQ' not in translator.translations
+
+
+def test_line_mismatch_with_repeated_sentence_costs_one_call():
+    translate = FakeTranslate(merge_lines=True)
+    translator = DedupTranslator(translate)
+    text = BASE + " The fund is rebalanced quarterly."
+    translator('QQQ', text)
+    assert len(translate.calls) == 1
+    assert translator.translated == 5 and translator.fallbacks == 0
+
+
+def test_line_mismatch_with_reference_translates_whole_text():
+    translate = FakeTranslate()
+    translator = DedupTranslator(translate)
+    translator('QQQ', BASE)
+    translate.merge_lines = True
+    # 두 문장이 바뀌어 줄바꿈으로 이어 번역했는데 한 줄로 돌아옴
+    text = VARIANT.replace("market capitalization.", "market capitalization every year.")
+    translator('QQQM', text)
+    assert translate.calls[-1] == text
+    assert len(translate.calls) == 3
+    assert translator.translated == 5 and translator.fallbacks == 1
@@ -1,196 +1,302 @@
 import yfinance as yf
 from yahooquery import Ticker
 import os
-import time
+import sys
+import argparse
 import pandas as pd
-import random
-import json
 import concurrent.futures
+import logging
 from deep_translator import GoogleTranslator
 
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from stock_finder.scheduler import load_market_caps, prioritize_symbols, RunBudget
+from stock_finder.retry import RetryScheduler, load_dead_letters, save_dead_letters, merge_dead_letters
+from stock_finder.ordered_writer import OrderedWriter, StreamingTextFile
+from stock_finder.records import RecordStore
+from stock_finder import http_cache
+from stock_finder.metrics import Metrics
+from stock_finder import shards
+from stock_finder import delta
+from stock_finder.formatting import OUTPUTS, format_etf_text, format_etf_summary
+from stock_finder.similarity import DedupTranslator
+
+# 로깅 설정 (진행 상황은 Metrics 가 주기적으로 남김)
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
 # 사용자가 원하는 ETF 개수를 지정할 수 있는 전역 변수
 ETF_COUNT = 3602  # 원하는 ETF 수로 설정
 MAX_WORKERS = 10  # 동시에 실행할 최대 worker 수
+PRIORITIZE_BY_ASSETS = True  # 운용자산 규모가 큰 ETF부터 처리
+TIME_BUDGET_SECONDS = None  # 실행 시간 제한(초), None 이면 제한 없음 (예: 20 * 60)
+REQUEST_BUDGET = None  # 신규로 가져올 ETF 수 제한, None 이면 제한 없음
+MAX_RETRIES = 3  # endpoint 별 최대 시도 횟수 (재시도는 지연 큐에서 대기하며 worker 를 점유하지 않음)
+RETRY_DELAY = (5, 10)  # 재시도 전 대기 시간 범위(초)
+DEAD_LETTER_FILE = "dead_letters.jsonl"  # 최종 실패 기록
+REPLAY_DEAD_LETTERS = False  # True 이면 최종 실패 기록에 있는 ETF/endpoint 만 다시 시도
+REORDER_WINDOW = 200  # 출력 순서를 맞추기 위해 먼저 시작할 수 있는 최대 ETF 수
+HTTP_CACHE_MODE = None  # 'record' | 'replay' | 'offline', None 이면 캐시 사용 안 함
+HTTP_CACHE_DIR = "http_cache"  # Yahoo/번역 응답 저장 위치
+METRICS_FILE = "metrics.json"  # 처리량/ETA/단계별 소요 시간 (주기적으로 갱신)
+METRICS_PORT = None  # 지정하면 http://127.0.0.1:<port>/ 에서 같은 내용을 제공 (샤드 실행은 <port>+샤드 번호)
+DELTA_SINCE_RUN = None  # 변경분(delta) 기준 실행 ID, None 이면 직전 실행 (runs/ 참고)
+DEDUP_TRANSLATION = True  # 설명이 거의 같은 ETF 는 이미 번역한 문장을 재사용하고 달라진 문장만 번역
 
 # Google Translate 객체 생성
 translator = GoogleTranslator(source='en', target='ko')
+dedup_translator = DedupTranslator(translator.translate)
+
+metrics = Metrics(METRICS_FILE, METRICS_PORT)
 
 # 파일 read 하여 추출(파일 추출 출처 : https://stockanalysis.com/etf/)
-def get_us_etf_list(filename, limit):
+def get_us_etf_list(filename, limit, list_filename=None):
     with open(filename, 'r') as file:
         etfs = [line.strip() for line in file if line.strip()]
+    if list_filename:
+        etfs = prioritize_symbols(etfs, load_market_caps(list_filename))
     return etfs[:limit]
 
-def get_top_holdings(symbol, max_retries=3):
-    for attempt in range(max_retries):
-        try:
-            print(f"Fetching holdings for {symbol} using yahooquery (Attempt {attempt + 1})")
-            etf = Ticker(symbol)
-            
-            holdings_data = etf.fund_top_holdings
-            
-            if isinstance(holdings_data, pd.DataFrame) and not holdings_data.empty:
-                holdings = []
-                for _, row in holdings_data.iterrows():
-                    holding_percent = row.get('holdingPercent', 0) * 100
-                    holding_info = {
-                        'name': row.get('holdingName', 'N/A'),
-                        'symbol': row.get('symbol', 'N/A'),
-                        'percent': f"{holding_percent:.2f}%"
-                    }
-                    holdings.append(holding_info)
-                
-                return holdings[:5]  # Return only top 5 holdings
-            else:
-                print(f"No holdings data available for {symbol}")
-                return []
-        except Exception as e:
-            print(f"Error fetching top holdings for {symbol}: {str(e)}")
-            if attempt < max_retries - 1:
-                time.sleep(random.uniform(5, 10))  # Random delay before retrying
-            else:
-                print(f"Max retries reached for {symbol}")
-                return []
+def get_top_holdings(symbol):
+    # 1회만 시도하고 실패 시 예외를 던짐 (재시도는 RetryScheduler 가 담당)
+    etf = Ticker(symbol)
+    
+    with metrics.stage(symbol, 'holdings'):
+        holdings_data = etf.fund_top_holdings
+    
+    if isinstance(holdings_data, pd.DataFrame) and not holdings_data.empty:
+        holdings = []
+        for _, row in holdings_data.iterrows():
+            holding_percent = row.get('holdingPercent', 0) * 100
+            holding_info = {
+                'name': row.get('holdingName', 'N/A'),
+                'symbol': row.get('symbol', 'N/A'),
+                'percent': f"{holding_percent:.2f}%"
+            }
+            holdings.append(holding_info)
+        
+        return holdings[:5]  # Return only top 5 holdings
+    else:
+        return []
 
-def translate_to_korean(text):
+def translate_to_korean(text, symbol=None):
     try:
-        print(f"Attempting to translate: {text[:50]}...")  # 번역 시도 로그
-        translated = translator.translate(text)
-        print(f"Translation result: {translated[:50]}...")  # 번역 결과 로그
-        return translated
+        if DEDUP_TRANSLATION and symbol:
+            return dedup_translator(symbol, text)
+        return translator.translate(text)
     except Exception as e:
-        print(f"Translation error: {str(e)}")
+        logging.error(f"Translation error: {str(e)}")
         return f"[번역 실패: {str(e)}] " + text  # 번역 실패 시 오류 메시지와 함께 원본 텍스트 반환
 
-def get_etf_data(symbol, max_retries=3):
-    for attempt in range(max_retries):
-        try:
-            etf = yf.Ticker(symbol)
-            
-            info = etf.info
-            original_summary = info.get("longBusinessSummary", "No description available.")
-            translated_summary = translate_to_korean(original_summary)
-            
-            required_info = {
-                "symbol": info.get("symbol", symbol),
-                "longName": info.get("longName", "N/A"),
-                "category": info.get("category", "N/A"),
-                "longBusinessSummary": translated_summary
-            }
-            
-            top_holdings = get_top_holdings(symbol)
-            
-            return {
-                "info": required_info,
-                "top_holdings": top_holdings
-            }
-        except Exception as e:
-            print(f"Error fetching data for {symbol}: {str(e)}")
-            if attempt < max_retries - 1:
-                time.sleep(random.uniform(5, 10))  # Random delay before retrying
-            else:
-                print(f"Max retries reached for {symbol}")
-                return None
+def get_etf_data(symbol):
+    # 1회만 시도하고 실패 시 예외를 던짐. 편입종목은 main 에서 별도 작업(holdings)으로 가져옴
+    etf = yf.Ticker(symbol)
+    
+    with metrics.stage(symbol, 'info'):
+        info = etf.info
+    original_summary = info.get("longBusinessSummary", "No description available.")
+    with metrics.stage(symbol, 'translate'):
+        translated_summary = translate_to_korean(original_summary, symbol)
+    
+    required_info = {
+        "symbol": info.get("symbol", symbol),
+        "longName": info.get("longName", "N/A"),
+        "category": info.get("category", "N/A"),
+        "longBusinessSummary": translated_summary,
+        "originalSummary": original_summary  # 비슷한 ETF 검색용 영문 원문
+    }
+    
+    return {
+        "info": required_info,
+        "top_holdings": []
+    }
 
 def save_all_text(data, filename):
     with open(filename, 'w', encoding='utf-8') as f:
         for etf in data:
-            info = etf['info']
-            content = f"티커: {info['symbol']}\n"
-            content += f"이름: {info['longName']}\n"
-            content += f"카테고리: {info['category']}\n"
-            content += f"\n설명:\n{info['longBusinessSummary']}\n\n"
-            
-            if etf['top_holdings']:
-                content += "편입종목 상위 5개:\n"
-                for holding in etf['top_holdings']:
-                    content += f"- {holding['name']} ({holding['symbol']}): {holding['percent']}\n"
-            
-            if len(content) > 1000:
-                content += "\n[참고 : 1000 글자가 넘는 내용입니다.]\n"
-            
-            content += '\n' + '='*50 + '\n\n'
-            f.write(content)
+            f.write(format_etf_text(etf))
 
-def save_progress(processed_etfs, filename='progress.json'):
-    with open(filename, 'w') as f:
-        json.dump(processed_etfs, f)
-
-def load_progress(filename='progress.json'):
-    if os.path.exists(filename):
-        with open(filename, 'r') as f:
-            return json.load(f)
-    return {}
-
-def process_etf(symbol, processed_etfs):
-    if symbol in processed_etfs:
-        print(f"Skipping already processed ETF: {symbol}")
-        return processed_etfs[symbol]
-
-    print(f"Fetching data for {symbol}...")
-    data = get_etf_data(symbol)
-    
-    if data:
-        processed_etfs[symbol] = data
-        save_progress(processed_etfs)
-    
-    print(f"Completed processing {symbol}\n")
-    return data
+def load_progress(filename='progress.bin', legacy_json='progress.json'):
+    # 종목별 기록을 덧붙이는 바이너리 저장소. 기존 progress.json 은 처음 한 번만 변환
+    return RecordStore(filename, legacy_json)
 
 def generate_natural_language_summary(data):
     summaries = []
     for etf in data:
-        info = etf['info']
-        summary = f"{info['longName']}(티커: {info['symbol']})은 {info['category']} 카테고리에 속하는 ETF입니다.\n"
-        summary += f"이 ETF에 대한 설명은 다음과 같습니다.\n{info['longBusinessSummary']}\n\n"
-        
-        if etf['top_holdings']:
-            summary += "주요 편입 종목으로는 "
-            holdings = [f"{h['name']}({h['percent']})" for h in etf['top_holdings']]
-            summary += ", ".join(holdings) + " 등이 있습니다."
-        
-        summaries.append(summary)
+        summaries.append(format_etf_summary(etf))
         summaries.append('=' * 50)  # 50개의 '=' 문자로 구분선 추가
     
     return "\n\n".join(summaries)
 
-def main():
+def read_universe():
     symbol_file = "extracted_symbols.txt"  # 추출된 symbol 파일 이름
+    list_file = "us_etf_list_240724.txt" if PRIORITIZE_BY_ASSETS else None
     print(f"Reading {ETF_COUNT} US ETFs from {symbol_file}...")
-    us_etfs = get_us_etf_list(symbol_file, ETF_COUNT)
+    us_etfs = get_us_etf_list(symbol_file, ETF_COUNT, list_file)
     print(f"Found {len(us_etfs)} US ETFs")
+    return us_etfs
+
+def open_text_outputs(out_dir):
+    text_file = StreamingTextFile(os.path.join(out_dir, "data/etf_data_korean_translated.txt"), format_etf_text)
+    nl_file = StreamingTextFile(os.path.join(out_dir, "data/etf_data_natural_language_summary.txt"),
+                                lambda etf: format_etf_summary(etf) + "\n\n" + '=' * 50,
+                                separator="\n\n")
+    return text_file, nl_file
+
+def main(shard=None):
+    cache = http_cache.install(HTTP_CACHE_DIR, HTTP_CACHE_MODE)
+    us_etfs = read_universe()
     
-    processed_etfs = load_progress()
-    all_etf_data = []
+    # 샤드 실행이면 담당 ETF만 처리하고 진행 상황/출력은 shards/<i>-of-<N>/ 아래에 따로 저장
+    out_dir = "."
+    if shard:
+        us_etfs = shards.select_shard(us_etfs, *shard)
+        out_dir = shards.shard_dir(*shard)
+        print(f"Shard {shard[0]}/{shard[1]}: {len(us_etfs)} ETFs")
+    dead_letter_file = os.path.join(out_dir, DEAD_LETTER_FILE)
+    
+    processed_etfs = shards.open_shard_store(*shard, us_etfs) if shard else load_progress()
+    # 재시도 실행도 출력 파일은 전체 ETF 로 쓰고, 새로 가져오는 것만 실패 기록에 있는 ETF/endpoint 로 제한
+    replay_endpoints = None
+    if REPLAY_DEAD_LETTERS:
+        replay_endpoints = {}
+        for entry in load_dead_letters(dead_letter_file):
+            replay_endpoints.setdefault(entry['symbol'], set()).add(entry['endpoint'])
+        print(f"Replaying {len(replay_endpoints)} ETFs from {dead_letter_file}")
+    
+    metrics.filename = os.path.join(out_dir, METRICS_FILE)
+    if shard and metrics.port:
+        metrics.port += shard[0]  # 샤드 프로세스마다 다른 포트 사용
+    budget = RunBudget(TIME_BUDGET_SECONDS, REQUEST_BUDGET)
+    pending = {}  # info 는 받았고 holdings 를 기다리는 ETF
+    
+    # 완료 순서와 무관하게 ETF 목록 순서대로 바로 파일에 씀 (전체 결과를 메모리에 모으지 않음)
+    text_file, nl_file = open_text_outputs(out_dir)
+    
+    def save_intermediate(written):
+        if written % 100 == 0:
+            print(f"Processed {written} ETFs. Saving intermediate results...")
+            text_file.snapshot(os.path.join(out_dir, f"data/etf_data_intermediate_korean_translated_{written}.txt"))
+    
+    writer = OrderedWriter(us_etfs, REORDER_WINDOW, [text_file, nl_file], processed_etfs, save_intermediate)
     
     with concurrent.futures.ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
-        future_to_symbol = {executor.submit(process_etf, symbol, processed_etfs): symbol for symbol in us_etfs}
+        scheduler = RetryScheduler(executor, MAX_WORKERS, MAX_RETRIES, RETRY_DELAY, budget=budget,
+                                   gate=writer.admits, metrics=metrics)
+        skipped = scheduled = 0
+        for symbol in us_etfs:
+            endpoints = replay_endpoints.get(symbol, ()) if replay_endpoints is not None else None
+            if symbol in processed_etfs and endpoints and 'holdings' in endpoints:
+                # holdings 만 실패했던 ETF 는 info 를 다시 가져오지 않음
+                pending[symbol] = processed_etfs[symbol]
+                scheduler.add(symbol, 'holdings', get_top_holdings, symbol)
+                scheduled += 1
+            elif symbol in processed_etfs:
+                writer.put(symbol)
+                skipped += 1
+            elif endpoints is None or endpoints:
+                scheduler.add(symbol, 'info', get_etf_data, symbol)
+                scheduled += 1
+            else:
+                writer.put(symbol, ok=False)
+        print(f"Skipping {skipped} already processed ETFs")
+        metrics.start(scheduled)
         
-        for i, future in enumerate(concurrent.futures.as_completed(future_to_symbol), 1):
-            symbol = future_to_symbol[future]
-            try:
-                data = future.result()
+        for symbol, endpoint, data in scheduler.run():
+            if endpoint == 'info':
                 if data:
-                    all_etf_data.append(data)
-            except Exception as exc:
-                print(f'{symbol} generated an exception: {exc}')
+                    pending[symbol] = data
+                    scheduler.add(symbol, 'holdings', get_top_holdings, symbol, follow_up=True)
+                else:
+                    metrics.symbol_done(symbol, ok=False)
+                    writer.put(symbol, ok=False)
+                continue
             
-            if i % 100 == 0:
-                print(f"Processed {i} ETFs. Saving intermediate results...")
-                save_all_text(all_etf_data, f"data/etf_data_intermediate_korean_translated_{i}.txt")
+            etf_data = pending.pop(symbol)
+            etf_data['top_holdings'] = data or []
+            with metrics.stage(symbol, 'checkpoint'):
+                processed_etfs[symbol] = etf_data
+            metrics.symbol_done(symbol, data is not None)
+            writer.put(symbol)
+    writer.close()
+    metrics.stop()
+    
+    failed = merge_dead_letters(dead_letter_file, scheduler)
+    print(f"Retries: {scheduler.retry_count}, failed: {len(scheduler.dead_letters)} "
+          f"({failed} recorded in {dead_letter_file})")
+    
+    # 예산 소진 시 완료된 ETF만 별도 파일에 저장 (기존 전체 결과 파일은 유지)
+    suffix = ""
+    if budget.exhausted:
+        suffix = "_partial"
+        print(f"Budget exhausted after {budget.elapsed():.0f}s / {budget.requests} requests: "
+              f"writing {writer.written} of {len(us_etfs)} ETFs")
     
     # ETF 정보와 top 5 보유 종목을 텍스트 파일로 저장
-    text_filename = "data/etf_data_korean_translated.txt"
-    os.makedirs(os.path.dirname(text_filename), exist_ok=True)
-    save_all_text(all_etf_data, text_filename)
+    text_filename = os.path.join(out_dir, f"data/etf_data_korean_translated{suffix}.txt")
+    text_file.commit(text_filename)
     print(f"Saved final ETF data to text file: {text_filename}")
     
     # 자연어 처리된 결과물 생성 및 저장
-    nl_summary = generate_natural_language_summary(all_etf_data)
-    nl_filename = "data/etf_data_natural_language_summary.txt"
-    with open(nl_filename, 'w', encoding='utf-8') as f:
-        f.write(nl_summary)
+    nl_filename = os.path.join(out_dir, f"data/etf_data_natural_language_summary{suffix}.txt")
+    nl_file.commit(nl_filename)
     print(f"Saved natural language summary to: {nl_filename}")
+    
+    # 전체 출력 파일을 새로 쓴 경우에만 실행 기록을 남김 (샤드/예산 소진 실행은 제외)
+    if not suffix and not shard:
+        delta.record_run(us_etfs, processed_etfs, *OUTPUTS['etfs'], since=DELTA_SINCE_RUN)
+    
+    if DEDUP_TRANSLATION:
+        print(f"Translation: {dedup_translator.translated} sentences translated, "
+              f"{dedup_translator.reused} reused from similar ETFs, "
+              f"{dedup_translator.fallbacks} descriptions retranslated whole")
+    if cache:
+        print(f"HTTP cache ({cache.mode}): {cache.hits} hits, {cache.misses} misses")
+
+def merge_shards(count):
+    """샤드별 진행 상황을 합쳐 ETF 목록 순서대로 최종 텍스트 파일과 progress.bin 을 만든다."""
+    us_etfs = read_universe()
+    stores = shards.open_shard_stores(count)
+    processed_etfs = load_progress()
+    text_file, nl_file = open_text_outputs(".")
+    merged = []
+    for symbol, etf in shards.merged_records(us_etfs, stores):
+        processed_etfs[symbol] = etf
+        text_file.write(etf)
+        nl_file.write(etf)
+        merged.append(symbol)
+    processed_etfs.compact()
+    text_file.commit("data/etf_data_korean_translated.txt")
+    nl_file.commit("data/etf_data_natural_language_summary.txt")
+    delta.record_run(merged, processed_etfs, *OUTPUTS['etfs'], since=DELTA_SINCE_RUN)
+    
+    # holdings 실패 기록은 info 가 저장된 ETF 에도 남아 있어야 다시 시도할 수 있음
+    dead_letters = {}
+    for index in range(count):
+        for entry in load_dead_letters(os.path.join(shards.shard_dir(index, count), DEAD_LETTER_FILE)):
+            if entry['endpoint'] == 'holdings' or entry['symbol'] not in processed_etfs:
+                dead_letters[(entry['symbol'], entry['endpoint'])] = entry
+    save_dead_letters(list(dead_letters.values()), DEAD_LETTER_FILE)
+    print(f"Merged {len(merged)} of {len(us_etfs)} ETFs from {count} shards "
+          f"({sum(store is None for store in stores)} missing), {len(dead_letters)} failures")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="미국 ETF 정보 수집 및 한국어 번역")
+    parser.add_argument('--shard', type=shards.parse_shard, help="i/N: N개로 나눈 ETF 중 i번째만 처리")
+    parser.add_argument('--shards', type=int, help="N개 프로세스로 나눠 실행한 뒤 결과를 합침")
+    parser.add_argument('--merge', type=int, metavar='N', help="N개 샤드의 결과만 합침")
+    parser.add_argument('--count', type=int, help="처리할 ETF 수 (기본: ETF_COUNT)")
+    parser.add_argument('--http-cache', choices=http_cache.MODES, help="HTTP 캐시 모드 (기본: HTTP_CACHE_MODE)")
+    args = parser.parse_args()
+    if args.count is not None:
+        ETF_COUNT = args.count
+    if args.http_cache is not None:
+        HTTP_CACHE_MODE = args.http_cache
+    
+    if args.shards:
+        failed_shards = shards.run_local_shards(__file__, args.shards, shards.shard_options(args.count, args.http_cache))
+        if failed_shards:
+            print(f"Shards {failed_shards} failed; merging available results")
+        merge_shards(args.shards)
+    elif args.merge:
+        merge_shards(args.merge)
+    else:
+        main(args.shard)
\ No newline at end of file
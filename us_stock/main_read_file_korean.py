@@ -1,13 +1,23 @@
 import os
-import time
+import sys
+import argparse
 import numpy as np
-import random
-import json
 import concurrent.futures
 from deep_translator import GoogleTranslator
 import yfinance as yf
 import logging
 
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from stock_finder.scheduler import load_market_caps, prioritize_symbols, RunBudget
+from stock_finder.retry import RetryScheduler, load_dead_letters, save_dead_letters, merge_dead_letters
+from stock_finder.ordered_writer import OrderedWriter, StreamingTextFile
+from stock_finder.records import RecordStore
+from stock_finder import http_cache
+from stock_finder.metrics import Metrics
+from stock_finder import shards
+from stock_finder import delta
+from stock_finder.formatting import OUTPUTS, format_stock_text, format_stock_summary
+
 # 로깅 설정
 logging.basicConfig(level=logging.INFO, 
                     format='%(asctime)s - %(levelname)s - %(message)s',
@@ -16,13 +26,30 @@ logging.basicConfig(level=logging.INFO,
 # 사용자가 원하는 stock 개수를 지정할 수 있는 전역 변수
 STOCK_COUNT = 5567  # 원하는 stock 수로 설정
 MAX_WORKERS = 10  # 동시에 실행할 최대 worker 수
+PRIORITIZE_BY_MARKET_CAP = True  # 시가총액이 큰 종목부터 처리
+TIME_BUDGET_SECONDS = None  # 실행 시간 제한(초), None 이면 제한 없음 (예: 20 * 60)
+REQUEST_BUDGET = None  # 신규로 가져올 종목 수 제한, None 이면 제한 없음
+MAX_RETRIES = 3  # 종목별 최대 시도 횟수 (재시도는 지연 큐에서 대기하며 worker 를 점유하지 않음)
+RETRY_DELAY = (5, 10)  # 재시도 전 대기 시간 범위(초)
+DEAD_LETTER_FILE = "dead_letters.jsonl"  # 최종 실패 기록
+REPLAY_DEAD_LETTERS = False  # True 이면 최종 실패 기록에 있는 종목만 다시 시도
+REORDER_WINDOW = 200  # 출력 순서를 맞추기 위해 먼저 시작할 수 있는 최대 종목 수
+HTTP_CACHE_MODE = None  # 'record' | 'replay' | 'offline', None 이면 캐시 사용 안 함
+HTTP_CACHE_DIR = "http_cache"  # Yahoo/번역 응답 저장 위치
+METRICS_FILE = "metrics.json"  # 처리량/ETA/단계별 소요 시간 (주기적으로 갱신)
+METRICS_PORT = None  # 지정하면 http://127.0.0.1:<port>/ 에서 같은 내용을 제공 (샤드 실행은 <port>+샤드 번호)
+DELTA_SINCE_RUN = None  # 변경분(delta) 기준 실행 ID, None 이면 직전 실행 (runs/ 참고)
 
 # Google Translate 객체 생성
 translator = GoogleTranslator(source='en', target='ko')
 
-def get_us_stock_list(filename, limit):
+metrics = Metrics(METRICS_FILE, METRICS_PORT)
+
+def get_us_stock_list(filename, limit, list_filename=None):
     with open(filename, 'r') as file:
         stocks = [line.strip() for line in file if line.strip()]
+    if list_filename:
+        stocks = prioritize_symbols(stocks, load_market_caps(list_filename))
     return stocks[:limit]
 
 def translate_to_korean(text):
@@ -32,15 +59,6 @@ def translate_to_korean(text):
         logging.error(f"Translation error: {str(e)}")
         return f"[번역 실패: {str(e)}] " + text
 
-def truncate_to_last_sentence(text, max_length=1000):
-    if len(text) <= max_length:
-        return text
-    truncated = text[:max_length]
-    last_period = truncated.rfind('.')
-    if last_period != -1:
-        return truncated[:last_period + 1]
-    return truncated
-
 def safe_get(dictionary, key, default=""):
     value = dictionary.get(key, default)
     if value in ["N/A", "None", None]:
@@ -99,133 +117,192 @@ def get_financial_data(ticker):
         logging.error(f"Error in get_financial_data: {str(e)}")
     return {}
 
-def get_stock_data(symbol, max_retries=3):
-    for attempt in range(max_retries):
-        try:
-            ticker = yf.Ticker(symbol)
-            info = ticker.info
-            
-            original_summary = safe_get(info, "longBusinessSummary", "No description available.")
-            translated_summary = translate_to_korean(original_summary)
-            
-            financials = get_financial_data(ticker)
-
-            return {
-                "info": {
-                    "symbol": safe_get(info, "symbol", symbol),
-                    "longName": safe_get(info, "longName"),
-                    "sector": safe_get(info, "sector"),
-                    "industry": safe_get(info, "industry"),
-                    "category": safe_get(info, "industry"),  # Using industry as category if not available
-                    "longBusinessSummary": translated_summary,
-                    "financials": {k: (f"{v:,.2f}" if v != 0 else "") for k, v in financials.items()}
-                }
-            }
-        except Exception as e:
-            logging.error(f"Error fetching data for {symbol}: {str(e)}")
-            if attempt < max_retries - 1:
-                time.sleep(random.uniform(5, 10))
-            else:
-                logging.error(f"Max retries reached for {symbol}")
-                return None
+def get_stock_data(symbol):
+    # 1회만 시도하고 실패 시 예외를 던짐 (재시도는 RetryScheduler 가 담당)
+    ticker = yf.Ticker(symbol)
+    with metrics.stage(symbol, 'info'):
+        info = ticker.info
+    
+    original_summary = safe_get(info, "longBusinessSummary", "No description available.")
+    with metrics.stage(symbol, 'translate'):
+        translated_summary = translate_to_korean(original_summary)
+    
+    with metrics.stage(symbol, 'financials'):
+        financials = get_financial_data(ticker)
+
+    return {
+        "info": {
+            "symbol": safe_get(info, "symbol", symbol),
+            "longName": safe_get(info, "longName"),
+            "sector": safe_get(info, "sector"),
+            "industry": safe_get(info, "industry"),
+            "category": safe_get(info, "industry"),  # Using industry as category if not available
+            "longBusinessSummary": translated_summary,
+            "financials": {k: (f"{v:,.2f}" if v != 0 else "") for k, v in financials.items()}
+        }
+    }
 
 def save_all_text(data, filename):
     with open(filename, 'w', encoding='utf-8') as f:
         for stock in data:
-            info = stock.get('info', {})
-            content = f"티커: {info.get('symbol', '')}\n"
-            content += f"이름: {info.get('longName', '')}\n"
-            content += f"섹터: {info.get('sector', '')}\n"
-            content += f"산업: {info.get('industry', '')}\n"
-            content += f"카테고리: {info.get('category', '')}\n"
-            content += "\n재무제표 정보 (최근 1년):\n"
-            financials = info.get('financials', {})
-            for key, value in financials.items():
-                content += f"{key}: {value}\n"
-            content += f"\n설명:\n{truncate_to_last_sentence(info.get('longBusinessSummary', ''))}\n\n"
-            content += '\n' + '='*50 + '\n\n'
-            f.write(content)
-
-def save_progress(processed_etfs, filename='progress.json'):
-    with open(filename, 'w') as f:
-        json.dump(processed_etfs, f)
-
-def load_progress(filename='progress.json'):
-    if os.path.exists(filename):
-        with open(filename, 'r') as f:
-            return json.load(f)
-    return {}
-
-def process_stock(symbol, processed_etfs):
-    if symbol in processed_etfs:
-        print(f"Skipping already processed STOCK: {symbol}")
-        return processed_etfs[symbol]
+            f.write(format_stock_text(stock))
 
-    print(f"Fetching data for {symbol}...")
-    data = get_stock_data(symbol)
-    
-    if data:
-        processed_etfs[symbol] = data
-        save_progress(processed_etfs)
-    
-    print(f"Completed processing {symbol}\n")
-    return data
+def load_progress(filename='progress.bin', legacy_json='progress.json'):
+    # 종목별 기록을 덧붙이는 바이너리 저장소. 기존 progress.json 은 처음 한 번만 변환
+    return RecordStore(filename, legacy_json)
 
 def generate_natural_language_summary(data):
     summaries = []
     for stock in data:
-        info = stock.get('info', {})
-        summary = f"{info.get('longName', '')}(티커: {info.get('symbol', '')})은 "
-        if info.get('sector'):
-            summary += f"{info.get('sector')} 섹터"
-        if info.get('industry'):
-            summary += f", {info.get('industry')} 산업"
-        summary += "에 속하는 주식입니다.\n"
-        if info.get('category'):
-            summary += f"카테고리: {info.get('category')}\n"
-        summary += "\n재무제표 정보 (최근 1년):\n"
-        for key, value in info.get('financials', {}).items():
-            summary += f"{key}: {value}\n"
-        summary += f"\n이 주식에 대한 설명은 다음과 같습니다.\n{truncate_to_last_sentence(info.get('longBusinessSummary', ''))}\n\n"
-        summaries.append(summary)
+        summaries.append(format_stock_summary(stock))
         summaries.append('=' * 50)
     return "\n\n".join(summaries)
 
-def main():
+def read_universe():
     symbol_file = "extracted_symbols.txt"
+    list_file = "us_stocks_list_240726.txt" if PRIORITIZE_BY_MARKET_CAP else None
     logging.info(f"Reading {STOCK_COUNT} US stocks from {symbol_file}...")
-    us_stocks = get_us_stock_list(symbol_file, STOCK_COUNT)
+    us_stocks = get_us_stock_list(symbol_file, STOCK_COUNT, list_file)
     logging.info(f"Found {len(us_stocks)} US stocks")
+    return us_stocks
+
+def open_text_outputs(out_dir):
+    text_file = StreamingTextFile(os.path.join(out_dir, "data/stock_data_korean_translated.txt"), format_stock_text)
+    nl_file = StreamingTextFile(os.path.join(out_dir, "data/stock_data_natural_language_summary.txt"),
+                                lambda stock: format_stock_summary(stock) + "\n\n" + '=' * 50,
+                                separator="\n\n")
+    return text_file, nl_file
+
+def main(shard=None):
+    cache = http_cache.install(HTTP_CACHE_DIR, HTTP_CACHE_MODE)
+    us_stocks = read_universe()
     
-    processed_stocks = load_progress()
-    all_stock_data = []
+    # 샤드 실행이면 담당 종목만 처리하고 진행 상황/출력은 shards/<i>-of-<N>/ 아래에 따로 저장
+    out_dir = "."
+    if shard:
+        us_stocks = shards.select_shard(us_stocks, *shard)
+        out_dir = shards.shard_dir(*shard)
+        logging.info(f"Shard {shard[0]}/{shard[1]}: {len(us_stocks)} stocks")
+    dead_letter_file = os.path.join(out_dir, DEAD_LETTER_FILE)
+    
+    # 재시도 실행도 출력 파일은 전체 종목으로 쓰고, 새로 가져오는 것만 실패 기록에 있는 종목으로 제한
+    replay_symbols = None
+    if REPLAY_DEAD_LETTERS:
+        replay_symbols = {d['symbol'] for d in load_dead_letters(dead_letter_file)}
+        logging.info(f"Replaying {len(replay_symbols)} stocks from {dead_letter_file}")
+    
+    processed_stocks = shards.open_shard_store(*shard, us_stocks) if shard else load_progress()
+    metrics.filename = os.path.join(out_dir, METRICS_FILE)
+    if shard and metrics.port:
+        metrics.port += shard[0]  # 샤드 프로세스마다 다른 포트 사용
+    budget = RunBudget(TIME_BUDGET_SECONDS, REQUEST_BUDGET)
+    
+    # 완료 순서와 무관하게 종목 목록 순서대로 바로 파일에 씀 (전체 결과를 메모리에 모으지 않음)
+    text_file, nl_file = open_text_outputs(out_dir)
+    
+    def save_intermediate(written):
+        if written % 100 == 0:
+            logging.info(f"Processed {written} stocks. Saving intermediate results...")
+            text_file.snapshot(os.path.join(out_dir, f"data/stock_data_intermediate_korean_translated_{written}.txt"))
+    
+    writer = OrderedWriter(us_stocks, REORDER_WINDOW, [text_file, nl_file], processed_stocks, save_intermediate)
     
     with concurrent.futures.ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
-        future_to_symbol = {executor.submit(process_stock, symbol, processed_stocks): symbol for symbol in us_stocks}
+        scheduler = RetryScheduler(executor, MAX_WORKERS, MAX_RETRIES, RETRY_DELAY, budget=budget,
+                                   gate=writer.admits, metrics=metrics)
+        skipped = scheduled = 0
+        for symbol in us_stocks:
+            if symbol in processed_stocks:
+                writer.put(symbol)
+                skipped += 1
+            elif replay_symbols is None or symbol in replay_symbols:
+                scheduler.add(symbol, 'info', get_stock_data, symbol)
+                scheduled += 1
+            else:
+                writer.put(symbol, ok=False)
+        logging.info(f"Skipping {skipped} already processed stocks")
+        metrics.start(scheduled)
         
-        for i, future in enumerate(concurrent.futures.as_completed(future_to_symbol), 1):
-            symbol = future_to_symbol[future]
-            try:
-                data = future.result()
-                if data:
-                    all_stock_data.append(data)
-            except Exception as exc:
-                logging.error(f'{symbol} generated an exception: {exc}')
-            
-            if i % 100 == 0:
-                logging.info(f"Processed {i} stocks. Saving intermediate results...")
-                save_all_text(all_stock_data, f"data/stock_data_intermediate_korean_translated_{i}.txt")
+        for symbol, endpoint, data in scheduler.run():
+            if data:
+                with metrics.stage(symbol, 'checkpoint'):
+                    processed_stocks[symbol] = data
+            metrics.symbol_done(symbol, bool(data))
+            writer.put(symbol, ok=bool(data))
+    writer.close()
+    metrics.stop()
     
-    text_filename = "data/stock_data_korean_translated.txt"
-    os.makedirs(os.path.dirname(text_filename), exist_ok=True)
-    save_all_text(all_stock_data, text_filename)
+    failed = merge_dead_letters(dead_letter_file, scheduler)
+    logging.info(f"Retries: {scheduler.retry_count}, failed: {len(scheduler.dead_letters)} "
+                 f"({failed} recorded in {dead_letter_file})")
+    
+    # 예산 소진 시 완료된 종목만 별도 파일에 저장 (기존 전체 결과 파일은 유지)
+    suffix = ""
+    if budget.exhausted:
+        suffix = "_partial"
+        logging.info(f"Budget exhausted after {budget.elapsed():.0f}s / {budget.requests} requests: "
+                     f"writing {writer.written} of {len(us_stocks)} stocks")
+    
+    text_filename = os.path.join(out_dir, f"data/stock_data_korean_translated{suffix}.txt")
+    text_file.commit(text_filename)
     logging.info(f"Saved final stock data to text file: {text_filename}")
     
-    nl_summary = generate_natural_language_summary(all_stock_data)
-    nl_filename = "data/stock_data_natural_language_summary.txt"
-    with open(nl_filename, 'w', encoding='utf-8') as f:
-        f.write(nl_summary)
+    nl_filename = os.path.join(out_dir, f"data/stock_data_natural_language_summary{suffix}.txt")
+    nl_file.commit(nl_filename)
     logging.info(f"Saved natural language summary to: {nl_filename}")
+    
+    # 전체 출력 파일을 새로 쓴 경우에만 실행 기록을 남김 (샤드/예산 소진 실행은 제외)
+    if not suffix and not shard:
+        delta.record_run(us_stocks, processed_stocks, *OUTPUTS['stocks'], since=DELTA_SINCE_RUN)
+    
+    if cache:
+        logging.info(f"HTTP cache ({cache.mode}): {cache.hits} hits, {cache.misses} misses")
+
+def merge_shards(count):
+    """샤드별 진행 상황을 합쳐 종목 목록 순서대로 최종 텍스트 파일과 progress.bin 을 만든다."""
+    us_stocks = read_universe()
+    stores = shards.open_shard_stores(count)
+    processed_stocks = load_progress()
+    text_file, nl_file = open_text_outputs(".")
+    merged = []
+    for symbol, stock in shards.merged_records(us_stocks, stores):
+        processed_stocks[symbol] = stock
+        text_file.write(stock)
+        nl_file.write(stock)
+        merged.append(symbol)
+    processed_stocks.compact()
+    text_file.commit("data/stock_data_korean_translated.txt")
+    nl_file.commit("data/stock_data_natural_language_summary.txt")
+    delta.record_run(merged, processed_stocks, *OUTPUTS['stocks'], since=DELTA_SINCE_RUN)
+    
+    dead_letters = {}
+    for index in range(count):
+        for entry in load_dead_letters(os.path.join(shards.shard_dir(index, count), DEAD_LETTER_FILE)):
+            if entry['symbol'] not in processed_stocks:
+                dead_letters[(entry['symbol'], entry['endpoint'])] = entry
+    save_dead_letters(list(dead_letters.values()), DEAD_LETTER_FILE)
+    logging.info(f"Merged {len(merged)} of {len(us_stocks)} stocks from {count} shards "
+                 f"({sum(store is None for store in stores)} missing), {len(dead_letters)} failures")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="미국 주식 정보 수집 및 한국어 번역")
+    parser.add_argument('--shard', type=shards.parse_shard, help="i/N: N개로 나눈 종목 중 i번째만 처리")
+    parser.add_argument('--shards', type=int, help="N개 프로세스로 나눠 실행한 뒤 결과를 합침")
+    parser.add_argument('--merge', type=int, metavar='N', help="N개 샤드의 결과만 합침")
+    parser.add_argument('--count', type=int, help="처리할 종목 수 (기본: STOCK_COUNT)")
+    parser.add_argument('--http-cache', choices=http_cache.MODES, help="HTTP 캐시 모드 (기본: HTTP_CACHE_MODE)")
+    args = parser.parse_args()
+    if args.count is not None:
+        STOCK_COUNT = args.count
+    if args.http_cache is not None:
+        HTTP_CACHE_MODE = args.http_cache
+    
+    if args.shards:
+        failed_shards = shards.run_local_shards(__file__, args.shards, shards.shard_options(args.count, args.http_cache))
+        if failed_shards:
+            logging.error(f"Shards {failed_shards} failed; merging available results")
+        merge_shards(args.shards)
+    elif args.merge:
+        merge_shards(args.merge)
+    else:
+        main(args.shard)
\ No newline at end of file